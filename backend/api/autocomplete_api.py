@@ -0,0 +1,439 @@
+"""
+Autocomplete API - Escape Room Finder
+Search-box suggestions for room names, venue names, themes and cities,
+answered entirely from an in-process prefix index so keystroke traffic never
+reaches Postgres.
+
+Each kind of suggestion has its own PrefixIndex: a sorted list of
+(key, id) pairs searched with bisect, where every word start of a label is a
+key ("the haunted manor" is found by "hau" and "man" too). Matches at the
+start of a label rank first, then by popularity: view_count for rooms,
+google_rating for venues, total views for themes and room_count for cities.
+
+The index is built at startup (see main.py lifespan), then refreshed from
+rows whose updated_at moved past the last refresh, with a periodic full
+rebuild to pick up hard deletes.
+"""
+
+import asyncio
+import heapq
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+from sqlalchemy import func, or_, select
+
+from database import SessionLocal
+from models import City, Room, Venue
+
+router = APIRouter(prefix="/api/autocomplete", tags=["autocomplete"])
+
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "60"))
+AUTOCOMPLETE_REBUILD_SECONDS = float(os.getenv("AUTOCOMPLETE_REBUILD_SECONDS", "3600"))
+
+# Prefixes matching more than CACHE_MIN_MATCHES keys have their top results
+# memoised until an entry under them changes. All of them are memoised when
+# the index is built, so the widest ranges (the first keystrokes) never pay
+# for a scan; narrower ones are cheap to rank directly.
+CACHE_MIN_MATCHES = 500
+MAX_LIMIT = 20
+
+
+# ============================================================================
+# Response Models
+# ============================================================================
+
+
+class Suggestion(BaseModel):
+    id: Union[int, str]
+    label: str
+    slug: Optional[str] = None
+    subtitle: Optional[str] = None
+
+
+class AutocompleteResponse(BaseModel):
+    query: str
+    rooms: List[Suggestion]
+    venues: List[Suggestion]
+    themes: List[Suggestion]
+    cities: List[Suggestion]
+
+
+# ============================================================================
+# Prefix Index
+# ============================================================================
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def index_keys(label: str) -> list:
+    """The label from each word start onwards; the first key is the whole label"""
+    words = normalize(label).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    def __init__(self, items: list = ()):
+        """items: (id, label, score, suggestion) tuples"""
+        self.items = {}  # id -> (score, suggestion, keys)
+        self.keys = []  # sorted (key, id)
+        self.prefix_cache = {}
+
+        for item_id, label, score, suggestion in items:
+            keys = index_keys(label)
+            if keys:
+                self.items[item_id] = (score, suggestion, keys)
+                self.keys.extend((key, item_id) for key in keys)
+        self.keys.sort()
+        self.warm()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item_id, label: str, score: float, suggestion: dict):
+        self.remove(item_id)
+        keys = index_keys(label)
+        if not keys:
+            return
+        for key in keys:
+            insort(self.keys, (key, item_id))
+        self.items[item_id] = (score, suggestion, keys)
+        self.invalidate(keys)
+
+    def remove(self, item_id):
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        for key in item[2]:
+            i = bisect_left(self.keys, (key, item_id))
+            if i < len(self.keys) and self.keys[i] == (key, item_id):
+                del self.keys[i]
+        self.invalidate(item[2])
+
+    def invalidate(self, keys: list):
+        for key in keys:
+            for length in range(1, len(key) + 1):
+                self.prefix_cache.pop(key[:length], None)
+
+    def match_range(self, prefix: str) -> tuple:
+        # Every key starting with `prefix` sits in one contiguous run
+        start = bisect_left(self.keys, (prefix,))
+        return start, bisect_left(self.keys, (prefix + "\uffff",), start)
+
+    def warm(self):
+        """Memoise every prefix with more than CACHE_MIN_MATCHES matches"""
+        prefixes = {key[:1] for key, _ in self.keys}
+        while prefixes:
+            longer = set()
+            for prefix in prefixes:
+                start, end = self.match_range(prefix)
+                if end - start > CACHE_MIN_MATCHES:
+                    self.prefix_cache[prefix] = self.rank(start, end, MAX_LIMIT)
+                    longer.update(
+                        key[: len(prefix) + 1]
+                        for key, _ in self.keys[start:end]
+                        if len(key) > len(prefix)
+                    )
+            prefixes = longer
+
+    def search(self, prefix: str, limit: int) -> list:
+        cached = self.prefix_cache.get(prefix)
+        if cached is not None:
+            return cached[:limit]
+
+        start, end = self.match_range(prefix)
+        if end - start <= CACHE_MIN_MATCHES:
+            return self.rank(start, end, limit)
+
+        cached = self.prefix_cache[prefix] = self.rank(start, end, MAX_LIMIT)
+        return cached[:limit]
+
+    def rank(self, start: int, end: int, limit: int) -> list:
+        leading = {}  # id -> matched at the start of its label
+        for key, item_id in self.keys[start:end]:
+            at_start = key == self.items[item_id][2][0]
+            leading[item_id] = leading.get(item_id, False) or at_start
+
+        best = heapq.nsmallest(
+            limit,
+            leading,
+            key=lambda item_id: (
+                not leading[item_id],
+                -self.items[item_id][0],
+                self.items[item_id][1]["label"],
+            ),
+        )
+        return [self.items[item_id][1] for item_id in best]
+
+
+# ============================================================================
+# Loading From the Database
+# ============================================================================
+
+
+def room_items(db, since: Optional[datetime] = None):
+    """(id, label, score, suggestion or None to remove, updated_at) for rooms"""
+    stmt = select(
+        Room.id,
+        Room.name,
+        Room.slug,
+        Room.view_count,
+        Room.is_published,
+        Room.updated_at,
+        Venue.name.label("venue_name"),
+        Venue.city,
+        Venue.is_active,
+        Venue.updated_at.label("venue_updated_at"),
+    ).join(Venue, Room.venue_id == Venue.id)
+    if since is None:
+        stmt = stmt.where(Room.is_published == True, Venue.is_active == True)
+    else:
+        # A venue being deactivated or renamed changes its rooms too
+        stmt = stmt.where(or_(Room.updated_at >= since, Venue.updated_at >= since))
+
+    for row in db.execute(stmt):
+        visible = row.is_published and row.is_active
+        suggestion = {
+            "id": row.id,
+            "label": row.name,
+            "slug": row.slug,
+            "subtitle": f"{row.venue_name}, {row.city}",
+        }
+        yield (
+            row.id,
+            row.name,
+            row.view_count or 0,
+            suggestion if visible else None,
+            max(filter(None, (row.updated_at, row.venue_updated_at)), default=None),
+        )
+
+
+def venue_items(db, since: Optional[datetime] = None):
+    stmt = select(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.google_rating,
+        Venue.google_review_count,
+        Venue.is_active,
+        Venue.updated_at,
+    )
+    if since is None:
+        stmt = stmt.where(Venue.is_active == True)
+    else:
+        stmt = stmt.where(Venue.updated_at >= since)
+
+    for row in db.execute(stmt):
+        suggestion = {"id": row.id, "label": row.name, "subtitle": row.city}
+        # Rating first, review count breaks ties between equal ratings
+        score = float(row.google_rating or 0) + (row.google_review_count or 0) / 1e6
+        yield (
+            row.id,
+            row.name,
+            score,
+            suggestion if row.is_active else None,
+            row.updated_at,
+        )
+
+
+def city_items(db, since: Optional[datetime] = None):
+    stmt = select(
+        City.id,
+        City.name,
+        City.slug,
+        City.country,
+        City.room_count,
+        City.updated_at,
+    )
+    if since is None:
+        stmt = stmt.where(City.room_count > 0)
+    else:
+        stmt = stmt.where(City.updated_at >= since)
+
+    for row in db.execute(stmt):
+        suggestion = {
+            "id": row.id,
+            "label": row.name,
+            "slug": row.slug,
+            "subtitle": f"{row.room_count} rooms",
+        }
+        yield (
+            row.id,
+            row.name,
+            row.room_count or 0,
+            suggestion if row.room_count else None,
+            row.updated_at,
+        )
+
+
+def theme_items(db) -> list:
+    """Themes are few, so they are always reloaded whole"""
+    rows = db.execute(
+        select(Room.theme, func.count(), func.coalesce(func.sum(Room.view_count), 0))
+        .join(Venue, Room.venue_id == Venue.id)
+        .where(
+            Room.theme.isnot(None), Room.is_published == True, Venue.is_active == True
+        )
+        .group_by(Room.theme)
+    )
+    return [
+        (
+            theme,
+            theme,
+            views,
+            {"id": theme, "label": theme, "subtitle": f"{count} rooms"},
+        )
+        for theme, count, views in rows
+    ]
+
+
+LOADERS = {"rooms": room_items, "venues": venue_items, "cities": city_items}
+
+
+def newest(rows: list, current: Optional[datetime]) -> Optional[datetime]:
+    return max(filter(None, [current, *(row[4] for row in rows)]), default=None)
+
+
+# ============================================================================
+# Autocomplete Index
+# ============================================================================
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self.indexes = {
+            name: PrefixIndex() for name in ("rooms", "venues", "themes", "cities")
+        }
+        self.watermarks = {}
+        self.built_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def search(self, query: str, limit: int) -> dict:
+        prefix = normalize(query)
+        if not prefix:
+            return {name: [] for name in self.indexes}
+        return {
+            name: index.search(prefix, limit) for name, index in self.indexes.items()
+        }
+
+    @classmethod
+    def build(cls) -> "AutocompleteIndex":
+        """Load everything (blocking; run off the event loop)"""
+        index = cls()
+        db = SessionLocal()
+        try:
+            for name, loader in LOADERS.items():
+                rows = list(loader(db))
+                index.indexes[name] = PrefixIndex(row[:4] for row in rows)
+                index.watermarks[name] = newest(rows, None)
+            index.indexes["themes"] = PrefixIndex(theme_items(db))
+        finally:
+            db.close()
+
+        index.built_at = time.monotonic()
+        return index
+
+    def load_changes(self) -> dict:
+        """Rows changed since the last refresh (blocking; run off the event loop)"""
+        db = SessionLocal()
+        try:
+            changes = {
+                name: list(loader(db, self.watermarks.get(name) or datetime.min))
+                for name, loader in LOADERS.items()
+            }
+            changes["themes"] = theme_items(db) if changes["rooms"] else None
+        finally:
+            db.close()
+        return changes
+
+    def apply_changes(self, changes: dict) -> int:
+        """Apply load_changes() output; cheap, so it runs on the event loop
+        between requests and never races a search"""
+        applied = 0
+        for name in LOADERS:
+            index = self.indexes[name]
+            for item_id, label, score, suggestion, _ in changes[name]:
+                if suggestion is None:
+                    index.remove(item_id)
+                else:
+                    index.put(item_id, label, score, suggestion)
+                applied += 1
+            self.watermarks[name] = newest(changes[name], self.watermarks.get(name))
+
+        if changes["themes"] is not None:
+            self.indexes["themes"] = PrefixIndex(changes["themes"])
+        return applied
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+async def load_autocomplete_index():
+    """Build the index at startup; the API still starts if the database is down"""
+    global autocomplete_index
+    start = time.perf_counter()
+    try:
+        autocomplete_index = await asyncio.to_thread(AutocompleteIndex.build)
+    except Exception as e:
+        print(f"⚠️  Autocomplete index not built: {e}")
+        return
+
+    sizes = ", ".join(
+        f"{len(index)} {name}" for name, index in autocomplete_index.indexes.items()
+    )
+    print(
+        f"🔎 Autocomplete index built in {time.perf_counter() - start:.2f}s ({sizes})"
+    )
+
+
+async def refresh_autocomplete_forever():
+    """Apply changed rows every AUTOCOMPLETE_REFRESH_SECONDS, rebuild hourly"""
+    global autocomplete_index
+    while True:
+        await asyncio.sleep(AUTOCOMPLETE_REFRESH_SECONDS)
+        try:
+            index = autocomplete_index
+            stale = (
+                not index.ready
+                or time.monotonic() - index.built_at > AUTOCOMPLETE_REBUILD_SECONDS
+            )
+            if stale:
+                autocomplete_index = await asyncio.to_thread(AutocompleteIndex.build)
+            else:
+                changes = await asyncio.to_thread(index.load_changes)
+                index.apply_changes(changes)
+        except Exception as e:
+            print(f"⚠️  Autocomplete refresh failed: {e}")
+
+
+# ============================================================================
+# Autocomplete Endpoint
+# ============================================================================
+
+
+@router.get("", response_model=AutocompleteResponse)
+async def autocomplete(
+    q: str = Query(..., description="What has been typed so far", max_length=100),
+    limit: int = Query(5, description="Suggestions per kind", ge=1, le=MAX_LIMIT),
+):
+    """
+    Prefix suggestions for the search box, served from memory
+
+    Example:
+    GET /api/autocomplete?q=hau
+    """
+    return AutocompleteResponse(query=q, **autocomplete_index.search(q, limit))
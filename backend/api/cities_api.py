@@ -0,0 +1,109 @@
+"""
+Cities API - Escape Room Finder
+Serves city listings and landing-page summaries straight from the cities
+table, whose counts and average price are kept up to date by
+scraper/city_aggregates.py, so each request is a single indexed read.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import City
+
+router = APIRouter(prefix="/api/cities", tags=["cities"])
+
+
+# ============================================================================
+# Response Models
+# ============================================================================
+
+
+class CitySummary(BaseModel):
+    id: int
+    name: str
+    slug: str
+    state: Optional[str]
+    country: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    venue_count: int
+    room_count: int
+    avg_price: Optional[float]
+
+
+class CityDetail(CitySummary):
+    page_title: Optional[str]
+    meta_description: Optional[str]
+    ai_description: Optional[str]
+
+
+class CitiesResponse(BaseModel):
+    total: int
+    cities: List[CitySummary]
+
+
+def city_summary(city: City) -> dict:
+    return {
+        "id": city.id,
+        "name": city.name,
+        "slug": city.slug,
+        "state": city.state,
+        "country": city.country,
+        "latitude": float(city.latitude) if city.latitude is not None else None,
+        "longitude": float(city.longitude) if city.longitude is not None else None,
+        "venue_count": city.venue_count or 0,
+        "room_count": city.room_count or 0,
+        "avg_price": float(city.avg_price) if city.avg_price is not None else None,
+    }
+
+
+# ============================================================================
+# City List
+# ============================================================================
+
+
+@router.get("", response_model=CitiesResponse)
+def get_cities(
+    country: Optional[str] = Query(
+        None, description="ISO country code", min_length=2, max_length=2
+    ),
+    min_rooms: int = Query(1, description="Hide cities with fewer rooms", ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Cities with escape rooms, busiest first
+
+    Example:
+    GET /api/cities?country=GB
+    """
+    query = db.query(City).filter(City.room_count >= min_rooms)
+    if country:
+        query = query.filter(City.country == country.upper())
+
+    cities = query.order_by(City.room_count.desc(), City.name).all()
+    return CitiesResponse(
+        total=len(cities), cities=[CitySummary(**city_summary(c)) for c in cities]
+    )
+
+
+# ============================================================================
+# City Summary (for landing pages)
+# ============================================================================
+
+
+@router.get("/{slug}", response_model=CityDetail)
+def get_city(slug: str, db: Session = Depends(get_db)):
+    city = db.query(City).filter(City.slug == slug).first()
+    if not city:
+        raise HTTPException(status_code=404, detail="City not found")
+
+    return CityDetail(
+        **city_summary(city),
+        page_title=city.page_title,
+        meta_description=city.meta_description,
+        ai_description=city.ai_description,
+    )
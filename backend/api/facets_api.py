@@ -0,0 +1,276 @@
+"""
+Facets API - Escape Room Finder
+Filter-option counts for the browse page and map: rooms per theme,
+difficulty, price bucket and player-count bucket for the current filters,
+computed in one GROUP BY GROUPING SETS pass and cached in-process.
+
+Each facet is counted with every filter applied except its own, so selecting
+a theme still shows how many rooms the other themes would give.
+"""
+
+import operator
+import os
+import threading
+import time
+from itertools import pairwise
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from geoalchemy2.elements import WKTElement
+from geoalchemy2.functions import ST_DWithin
+from pydantic import BaseModel
+from sqlalchemy import and_, case, func, literal_column, select, text, true, tuple_
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Room, Venue
+from scraper.currency import usd_amount
+
+router = APIRouter(prefix="/api/rooms", tags=["rooms"])
+
+FACETS_CACHE_TTL_SECONDS = float(os.getenv("FACETS_CACHE_TTL_SECONDS", "300"))
+FACETS_CACHE_MAX_ENTRIES = 512
+
+# Upper bounds of each bucket; the last bucket is open-ended
+PRICE_BUCKETS_USD = (20, 30, 40)
+PLAYER_BUCKETS = (4, 6, 8)  # by maximum group size
+
+
+# ============================================================================
+# Response Models
+# ============================================================================
+
+
+class FacetCount(BaseModel):
+    value: Union[int, str]
+    count: int
+
+
+class FacetsResponse(BaseModel):
+    total: int
+    themes: List[FacetCount]
+    difficulties: List[FacetCount]
+    price_buckets: List[FacetCount]
+    player_buckets: List[FacetCount]
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+
+class TTLCache:
+    """Small thread-safe dict cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            now = time.monotonic()
+            if len(self.entries) >= self.max_entries:
+                self.entries = {
+                    k: entry for k, entry in self.entries.items() if entry[0] >= now
+                }
+            if len(self.entries) >= self.max_entries:
+                # Still full of live entries: drop the one closest to expiring
+                del self.entries[min(self.entries, key=lambda k: self.entries[k][0])]
+            self.entries[key] = (now + self.ttl, value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+facets_cache = TTLCache(FACETS_CACHE_TTL_SECONDS, FACETS_CACHE_MAX_ENTRIES)
+
+
+# ============================================================================
+# Facet Query
+# ============================================================================
+
+
+PRICE_LABELS = [
+    f"under_{PRICE_BUCKETS_USD[0]}",
+    *(f"{low}_{high}" for low, high in pairwise(PRICE_BUCKETS_USD)),
+    f"{PRICE_BUCKETS_USD[-1]}_plus",
+]
+PLAYER_LABELS = [
+    f"up_to_{PLAYER_BUCKETS[0]}",
+    *(f"{low + 1}_{high}" for low, high in pairwise(PLAYER_BUCKETS)),
+    f"{PLAYER_BUCKETS[-1] + 1}_plus",
+]
+
+
+def bucket_expression(column, bounds: tuple, labels: list, compare):
+    # Literal bounds, not bind params, so the SELECT and GROUP BY copies of the
+    # expression are textually identical and Postgres can match them
+    whens = [
+        (compare(column, literal_column(str(bound))), label)
+        for bound, label in zip(bounds, labels, strict=False)
+    ]
+    return case((column.is_(None), "unknown"), *whens, else_=labels[-1])
+
+
+def compute_facets(db, location_filters: list, facet_filters: dict) -> dict:
+    """One GROUPING SETS pass; each facet's counts ignore that facet's filter"""
+    price_bucket = bucket_expression(
+        Room.price_usd, PRICE_BUCKETS_USD, PRICE_LABELS, operator.lt
+    )
+    player_bucket = bucket_expression(
+        Room.max_players, PLAYER_BUCKETS, PLAYER_LABELS, operator.le
+    )
+    dimensions = {
+        "themes": Room.theme,
+        "difficulties": Room.difficulty,
+        "price_buckets": price_bucket,
+        "player_buckets": player_bucket,
+    }
+
+    def filters_except(facet):
+        conditions = [cond for name, cond in facet_filters.items() if name != facet]
+        return and_(true(), *conditions)
+
+    stmt = (
+        select(
+            func.grouping(*dimensions.values()).label("grouping_id"),
+            *(expr.label(name) for name, expr in dimensions.items()),
+            *(
+                func.count().filter(filters_except(name)).label(f"{name}_count")
+                for name in dimensions
+            ),
+            func.count().filter(filters_except(None)).label("total"),
+        )
+        .join_from(Room, Venue, Room.venue_id == Venue.id)
+        .where(Room.is_published == True, Venue.is_active == True, *location_filters)
+        .group_by(
+            func.grouping_sets(
+                *(tuple_(expr) for expr in dimensions.values()), text("()")
+            )
+        )
+    )
+
+    # grouping() sets a bit for every dimension a row is NOT grouped by, first
+    # dimension highest, so the set grouped by dimension i leaves bit i clear
+    names = list(dimensions)
+    all_bits = (1 << len(names)) - 1
+    set_ids = {
+        all_bits ^ (1 << (len(names) - 1 - i)): name for i, name in enumerate(names)
+    }
+
+    facets = {name: [] for name in names}
+    total = 0
+    for row in db.execute(stmt):
+        if row.grouping_id == all_bits:
+            total = row.total
+            continue
+        name = set_ids[row.grouping_id]
+        value = row._mapping[name]
+        count = row._mapping[f"{name}_count"]
+        if value is not None and count:
+            facets[name].append({"value": value, "count": count})
+
+    facets["themes"].sort(key=lambda f: (-f["count"], f["value"]))
+    facets["difficulties"].sort(key=lambda f: f["value"])
+    for name, labels in (
+        ("price_buckets", PRICE_LABELS),
+        ("player_buckets", PLAYER_LABELS),
+    ):
+        order = {label: i for i, label in enumerate([*labels, "unknown"])}
+        facets[name].sort(key=lambda f: order[f["value"]])
+
+    return {"total": total, **facets}
+
+
+# ============================================================================
+# Facets Endpoint
+# ============================================================================
+
+
+@router.get("/facets", response_model=FacetsResponse)
+def get_room_facets(
+    # Location: a city name, or a map circle
+    city: Optional[str] = Query(None, description="City name"),
+    lat: Optional[float] = Query(None, description="Latitude", ge=-90, le=90),
+    lng: Optional[float] = Query(None, description="Longitude", ge=-180, le=180),
+    radius: float = Query(10, description="Radius in kilometers", ge=0.1, le=100),
+    # Facet filters
+    theme: Optional[str] = Query(None, description="Theme"),
+    min_difficulty: Optional[int] = Query(None, ge=1, le=5),
+    max_difficulty: Optional[int] = Query(None, ge=1, le=5),
+    group_size: Optional[int] = Query(None, description="Group size", ge=1),
+    max_price: Optional[float] = Query(
+        None, description="Maximum price per person, in price_currency", ge=0
+    ),
+    price_currency: str = Query("USD", min_length=3, max_length=3),
+    db: Session = Depends(get_db),
+):
+    """
+    Room counts per filter option for the current filters
+
+    Example:
+    GET /api/rooms/facets?city=London&theme=Horror
+    """
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="lat and lng go together")
+
+    max_price_usd = None
+    if max_price is not None:
+        max_price_usd = usd_amount(db, max_price, price_currency)
+        if max_price_usd is None:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown price_currency: {price_currency}"
+            )
+        max_price_usd = round(max_price_usd, 2)
+
+    key = (
+        city.strip().lower() if city else None,
+        lat,
+        lng,
+        radius if lat is not None else None,
+        theme,
+        min_difficulty,
+        max_difficulty,
+        group_size,
+        max_price_usd,
+    )
+    cached = facets_cache.get(key)
+    if cached is not None:
+        return cached
+
+    location_filters = []
+    if city:
+        location_filters.append(Venue.city.ilike(f"%{city.strip()}%"))
+    if lat is not None:
+        point = WKTElement(f"POINT({lng} {lat})", srid=4326)
+        location_filters.append(ST_DWithin(Venue.location, point, radius * 1000))
+
+    facet_filters = {}
+    if theme:
+        facet_filters["themes"] = Room.theme == theme
+    if min_difficulty or max_difficulty:
+        facet_filters["difficulties"] = and_(
+            Room.difficulty >= (min_difficulty or 1),
+            Room.difficulty <= (max_difficulty or 5),
+        )
+    if max_price_usd is not None:
+        facet_filters["price_buckets"] = Room.price_usd <= max_price_usd
+    if group_size:
+        facet_filters["player_buckets"] = and_(
+            Room.min_players <= group_size, Room.max_players >= group_size
+        )
+
+    response = FacetsResponse(**compute_facets(db, location_filters, facet_filters))
+    facets_cache.set(key, response)
+    return response
@@ -3,18 +3,17 @@ Map API Endpoint - Escape Room Finder
 Returns rooms within a radius with filtering options
 """
 
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
+from fastapi import APIRouter, Query, HTTPException, Request
+from sqlalchemy.orm import Session
 from typing import Optional, List
 from pydantic import BaseModel, Field
-from geoalchemy2.functions import ST_DWithin, ST_Distance, ST_MakePoint
-from geoalchemy2.elements import WKTElement
-from sqlalchemy import text
 
-# Assuming your models are imported
-# from models import Venue, Room, RoomPhoto
-# from database import get_db
+from api.read_queries import list_themes, map_rooms, room_by_slug
+from api.room_detail import count_view, expansions, parse_include, venue_dict
+from database import SessionLocal
+from media import media_base_url
+from models import RoomView
+from scraper.currency import usd_amount
 
 router = APIRouter(prefix="/api/rooms", tags=["rooms"])
 
@@ -58,6 +57,8 @@ class RoomResponse(BaseModel):
     min_price_per_person: Optional[float]
     max_price_per_person: Optional[float]
     price_per_person: Optional[bool]
+    currency: Optional[str] = None
+    price_usd: Optional[float] = None
     success_rate: Optional[float]
     primary_image_url: Optional[str]
     view_count: int
@@ -66,6 +67,10 @@ class RoomResponse(BaseModel):
     # Related data
     venue: VenueResponse
     distance_km: Optional[float] = None
+    # Detail expansions (?include=photos,nearby,similar on the slug route)
+    photos: Optional[List[dict]] = None
+    nearby: Optional[List[dict]] = None
+    similar: Optional[List[dict]] = None
 
     class Config:
         from_attributes = True
@@ -78,6 +83,37 @@ class MapResponse(BaseModel):
     rooms: List[RoomResponse]
 
 
+def room_response_dict(row) -> dict:
+    """RoomResponse fields of a read_queries ROOM_COLUMNS row (without venue)"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "slug": row.slug,
+        "short_description": row.short_description,
+        "description": row.description,
+        "theme": row.theme,
+        "sub_themes": row.sub_themes,
+        "difficulty": row.difficulty,
+        "min_players": row.min_players,
+        "max_players": row.max_players,
+        "optimal_players": row.optimal_players,
+        "duration_minutes": row.duration_minutes,
+        "min_price_per_person": float(row.min_price_per_person)
+        if row.min_price_per_person is not None
+        else None,
+        "max_price_per_person": float(row.max_price_per_person)
+        if row.max_price_per_person is not None
+        else None,
+        "price_per_person": row.price_per_person,
+        "currency": row.currency,
+        "price_usd": float(row.price_usd) if row.price_usd is not None else None,
+        "success_rate": float(row.success_rate) if row.success_rate else None,
+        "primary_image_url": row.primary_image_url,
+        "view_count": row.view_count,
+        "is_featured": row.is_featured,
+    }
+
+
 # ============================================================================
 # Map Endpoint - Geospatial Search with Filters
 # ============================================================================
@@ -107,7 +143,10 @@ async def get_rooms_map(
         None, description="Ideal group size (finds rooms that fit this)", ge=1
     ),
     max_price: Optional[float] = Query(
-        None, description="Maximum price per person", ge=0
+        None, description="Maximum price per person, in price_currency", ge=0
+    ),
+    price_currency: str = Query(
+        "USD", description="Currency of max_price", min_length=3, max_length=3
     ),
     min_rating: Optional[float] = Query(
         None, description="Minimum Google rating", ge=0, le=5
@@ -136,157 +175,50 @@ async def get_rooms_map(
     # Build Query
     # ========================================================================
 
-    from models import Room, Venue  # Import your models
-    from database import SessionLocal  # Import your session maker
-
     db = SessionLocal()
 
     try:
-        # Create point from lat/lng for geospatial query
-        user_location = WKTElement(f"POINT({lng} {lat})", srid=4326)
-
-        # Base query with JOIN
-        query = (
-            db.query(
-                Room,
-                Venue,
-                # Calculate distance in kilometers
-                (ST_Distance(Venue.location, user_location) / 1000).label(
-                    "distance_km"
-                ),
-            )
-            .join(Venue, Room.venue_id == Venue.id)
-            .filter(
-                # Only published rooms
-                Room.is_published == True,
-                # Only active venues
-                Venue.is_active == True,
-                # Within radius (converted to meters)
-                ST_DWithin(
-                    Venue.location,
-                    user_location,
-                    radius * 1000,  # Convert km to meters
-                ),
-            )
-        )
-
-        # ====================================================================
-        # Apply Filters
-        # ====================================================================
-
-        if theme:
-            query = query.filter(Room.theme == theme)
-
-        if min_difficulty:
-            query = query.filter(Room.difficulty >= min_difficulty)
-
-        if max_difficulty:
-            query = query.filter(Room.difficulty <= max_difficulty)
-
-        if group_size:
-            # Room must accommodate this group size
-            query = query.filter(
-                Room.min_players <= group_size, Room.max_players >= group_size
-            )
-        elif min_players or max_players:
-            # Or use min/max separately
-            if min_players:
-                query = query.filter(Room.max_players >= min_players)
-            if max_players:
-                query = query.filter(Room.min_players <= max_players)
-
+        max_price_usd = None
         if max_price:
-            # Filter by the minimum per-person price when available.
-            query = query.filter(
-                Room.min_price_per_person.isnot(None),
-                Room.min_price_per_person <= max_price,
-            )
+            # Compare normalised USD prices so rooms in any currency qualify.
+            max_price_usd = usd_amount(db, max_price, price_currency)
+            if max_price_usd is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown price_currency: {price_currency}",
+                )
+            max_price_usd = round(max_price_usd, 2)
+
+        # Unset (or zero) filters are bound as None and switched off in SQL;
+        # group_size takes precedence over min/max players
+        rows, total = map_rooms(
+            db,
+            lat,
+            lng,
+            radius,
+            sort_by=sort_by,
+            page=page,
+            page_size=page_size,
+            theme=theme or None,
+            min_difficulty=min_difficulty or None,
+            max_difficulty=max_difficulty or None,
+            group_size=group_size or None,
+            min_players=None if group_size else min_players or None,
+            max_players=None if group_size else max_players or None,
+            max_price_usd=max_price_usd,
+            min_rating=min_rating or None,
+        )
 
-        if min_rating:
-            query = query.filter(Venue.google_rating >= min_rating)
-
-        # ====================================================================
-        # Sorting
-        # ====================================================================
-
-        if sort_by == "distance":
-            query = query.order_by(text("distance_km"))
-        elif sort_by == "rating":
-            query = query.order_by(Venue.google_rating.desc().nullslast())
-        elif sort_by == "price":
-            # Sort by minimum per-person price when available.
-            query = query.order_by(Room.min_price_per_person.asc().nullslast())
-        elif sort_by == "difficulty":
-            query = query.order_by(Room.difficulty.desc())
-        elif sort_by == "popularity":
-            query = query.order_by(Room.view_count.desc())
-        else:
-            # Default to distance
-            query = query.order_by(func.literal_column("distance_km").asc())
-
-        # ====================================================================
-        # Get Total Count (before pagination)
-        # ====================================================================
-
-        total = query.count()
-
-        # ====================================================================
-        # Pagination
-        # ====================================================================
-
-        offset = (page - 1) * page_size
-        results = query.offset(offset).limit(page_size).all()
-
-        # ====================================================================
-        # Format Response
-        # ====================================================================
-
-        rooms = []
-        for room, venue, distance in results:
-            # Convert room to dict
-            room_dict = {
-                "id": room.id,
-                "name": room.name,
-                "slug": room.slug,
-                "short_description": room.short_description,
-                "description": room.description,
-                "theme": room.theme,
-                "sub_themes": room.sub_themes,
-                "difficulty": room.difficulty,
-                "min_players": room.min_players,
-                "max_players": room.max_players,
-                "optimal_players": room.optimal_players,
-                "duration_minutes": room.duration_minutes,
-                "min_price_per_person": float(room.min_price_per_person)
-                if room.min_price_per_person is not None
-                else None,
-                "max_price_per_person": float(room.max_price_per_person)
-                if room.max_price_per_person is not None
+        rooms = [
+            RoomResponse(
+                **room_response_dict(row),
+                venue=venue_dict(row),
+                distance_km=round(float(row.distance_km), 2)
+                if row.distance_km
                 else None,
-                "price_per_person": room.price_per_person,
-                "success_rate": float(room.success_rate) if room.success_rate else None,
-                "primary_image_url": room.primary_image_url,
-                "view_count": room.view_count,
-                "is_featured": room.is_featured,
-                "distance_km": round(float(distance), 2) if distance else None,
-                "venue": {
-                    "id": venue.id,
-                    "name": venue.name,
-                    "address": venue.address,
-                    "city": venue.city,
-                    "state": venue.state,
-                    "latitude": float(venue.latitude) if venue.latitude else None,
-                    "longitude": float(venue.longitude) if venue.longitude else None,
-                    "phone": venue.phone,
-                    "website": venue.website,
-                    "google_rating": float(venue.google_rating)
-                    if venue.google_rating
-                    else None,
-                    "google_review_count": venue.google_review_count,
-                },
-            }
-
-            rooms.append(RoomResponse(**room_dict))
+            )
+            for row in rows
+        ]
 
         return MapResponse(total=total, page=page, page_size=page_size, rooms=rooms)
 
@@ -304,20 +236,10 @@ async def get_themes():
     """
     Get list of all available themes
     """
-    from models import Room
-    from database import SessionLocal
-
     db = SessionLocal()
 
     try:
-        themes = (
-            db.query(Room.theme)
-            .distinct()
-            .filter(Room.theme.isnot(None), Room.is_published == True)
-            .all()
-        )
-
-        return {"themes": [t[0] for t in themes if t[0]]}
+        return {"themes": list_themes(db)}
 
     finally:
         db.close()
@@ -331,75 +253,33 @@ async def get_themes():
 @router.get("/slug/{slug}", response_model=RoomResponse)
 async def get_room_by_slug(
     slug: str,
+    request: Request,
+    include: Optional[str] = Query(
+        None, description="Comma-separated expansions: photos, nearby, similar"
+    ),
     # db: Session = Depends(get_db)
 ):
     """
-    Get detailed room information by slug
+    Get detailed room information by slug (the venue is always included)
     """
-    from models import Room, Venue
-    from database import SessionLocal
+    includes = parse_include(include) | {"venue"}
 
     db = SessionLocal()
 
     try:
-        room = (
-            db.query(Room)
-            .options(joinedload(Room.venue))
-            .filter(Room.slug == slug, Room.is_published == True)
-            .first()
-        )
+        room = room_by_slug(db, slug)
 
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
 
-        # Increment view count
-        room.view_count += 1
-        db.commit()
-
-        # Format response
         room_dict = {
-            "id": room.id,
-            "name": room.name,
-            "slug": room.slug,
-            "short_description": room.short_description,
-            "description": room.description,
-            "theme": room.theme,
-            "sub_themes": room.sub_themes,
-            "difficulty": room.difficulty,
-            "min_players": room.min_players,
-            "max_players": room.max_players,
-            "optimal_players": room.optimal_players,
-            "duration_minutes": room.duration_minutes,
-            "min_price_per_person": float(room.min_price_per_person)
-            if room.min_price_per_person is not None
-            else None,
-            "max_price_per_person": float(room.max_price_per_person)
-            if room.max_price_per_person is not None
-            else None,
-            "price_per_person": room.price_per_person,
-            "success_rate": float(room.success_rate) if room.success_rate else None,
-            "primary_image_url": room.primary_image_url,
-            "view_count": room.view_count,
-            "is_featured": room.is_featured,
-            "venue": {
-                "id": room.venue.id,
-                "name": room.venue.name,
-                "address": room.venue.address,
-                "city": room.venue.city,
-                "state": room.venue.state,
-                "latitude": float(room.venue.latitude) if room.venue.latitude else None,
-                "longitude": float(room.venue.longitude)
-                if room.venue.longitude
-                else None,
-                "phone": room.venue.phone,
-                "website": room.venue.website,
-                "google_rating": float(room.venue.google_rating)
-                if room.venue.google_rating
-                else None,
-                "google_review_count": room.venue.google_review_count,
-            },
+            **room_response_dict(room),
+            # Count this view in the response, as before
+            "view_count": (room.view_count or 0) + 1,
+            **expansions(db, room, includes, media_base_url(request)),
         }
 
+        count_view(db, room.id)
         return RoomResponse(**room_dict)
 
     finally:
@@ -420,10 +300,6 @@ async def track_room_view(
     """
     Track a room view for analytics
     """
-    from models import RoomView
-    from database import SessionLocal
-    import hashlib
-
     db = SessionLocal()
 
     try:
@@ -439,5 +315,11 @@ async def track_room_view(
 
         return {"status": "success"}
 
+    except Exception as e:
+        # Analytics only: a lost view must not fail the page that sent it
+        db.rollback()
+        print(f"⚠️  Could not record view of room {room_id}: {e}")
+        return {"status": "error"}
+
     finally:
         db.close()
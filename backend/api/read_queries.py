@@ -0,0 +1,385 @@
+"""
+Read-only data access for the room endpoints: list, map, detail and themes.
+
+Every statement is a select() built once at import with bindparam()s, and
+each optional filter is written as `(:param IS NULL OR condition)`, so a
+request only binds values to a statement object that already exists. The
+statement's cache key is memoised and its compiled SQL stays in the engine's
+compiled cache, so nothing is rebuilt or recompiled per request. psycopg2
+inlines the values client-side, so Postgres still sees `NULL IS NULL` and
+folds the unused filters away.
+
+Rows are returned as-is (Row objects, attribute access by column label) and
+go straight to the serializers in api/room_detail.py. No ORM identities are
+created, so there is nothing to flush or expire when the session closes.
+"""
+
+from datetime import datetime, timedelta
+
+from geoalchemy2.elements import WKTElement
+from geoalchemy2.functions import ST_Distance, ST_DWithin
+from sqlalchemy import Float, Integer, String, and_, bindparam, func, or_, select
+from sqlalchemy.orm import aliased
+
+from models import Room, RoomPhoto, RoomView, Venue
+
+TRENDING_DAYS = 30
+
+PUBLISHED = and_(Room.is_published == True, Venue.is_active == True)
+
+
+def optional(param, condition):
+    """`condition`, or no filter at all when `param` is bound to None"""
+    return or_(param.is_(None), condition)
+
+
+# ============================================================================
+# Columns
+# ============================================================================
+
+# Variants of the room's primary ingested photo (photo_urls() input)
+PRIMARY_PHOTO_VARIANTS = (
+    select(RoomPhoto.variants)
+    .where(RoomPhoto.room_id == Room.id, RoomPhoto.is_primary == True)
+    .order_by(RoomPhoto.id)
+    .limit(1)
+    .scalar_subquery()
+    .label("primary_photo_variants")
+)
+
+# /api/rooms list items (room_list_item)
+LIST_COLUMNS = (
+    Room.id,
+    Room.name,
+    Room.theme,
+    Room.difficulty,
+    Room.min_price_per_person,
+    Room.max_price_per_person,
+    Room.currency,
+    Room.latitude,
+    Room.longitude,
+    Room.primary_image_url,
+    Room.image_urls,
+    Room.duration_minutes,
+    Venue.city,
+    Venue.name.label("venue_name"),
+    PRIMARY_PHOTO_VARIANTS,
+)
+
+# Full room documents (map results, detail pages)
+ROOM_COLUMNS = (
+    Room.id,
+    Room.name,
+    Room.slug,
+    Room.short_description,
+    Room.description,
+    Room.theme,
+    Room.sub_themes,
+    Room.difficulty,
+    Room.min_players,
+    Room.max_players,
+    Room.optimal_players,
+    Room.duration_minutes,
+    Room.min_price_per_person,
+    Room.max_price_per_person,
+    Room.price_per_person,
+    Room.currency,
+    Room.price_usd,
+    Room.success_rate,
+    Room.primary_image_url,
+    Room.image_urls,
+    Room.view_count,
+    Room.is_featured,
+    Room.venue_id,
+)
+
+# The room's venue, prefixed so it fits in the same row (venue_dict)
+VENUE_COLUMNS = (
+    Venue.name.label("venue_name"),
+    Venue.address.label("venue_address"),
+    Venue.city.label("venue_city"),
+    Venue.state.label("venue_state"),
+    Venue.latitude.label("venue_latitude"),
+    Venue.longitude.label("venue_longitude"),
+    Venue.phone.label("venue_phone"),
+    Venue.website.label("venue_website"),
+    Venue.google_rating.label("venue_google_rating"),
+    Venue.google_review_count.label("venue_google_review_count"),
+)
+
+
+# ============================================================================
+# List (/api/rooms)
+# ============================================================================
+
+city_pattern = bindparam("city_pattern", type_=String)
+theme_pattern = bindparam("theme_pattern", type_=String)
+difficulty = bindparam("difficulty", type_=Integer)
+
+LIST_ROOMS = (
+    select(*LIST_COLUMNS)
+    .join(Venue, Room.venue_id == Venue.id)
+    .where(
+        PUBLISHED,
+        optional(city_pattern, Venue.city.ilike(city_pattern)),
+        optional(theme_pattern, Room.theme.ilike(theme_pattern)),
+        optional(difficulty, Room.difficulty == difficulty),
+    )
+)
+
+# A venues.city value's city slug, as scraper/city_aggregates.py computes it
+# (indexed, see schema.py)
+VENUE_CITY_SLUG = func.btrim(
+    func.lower(func.regexp_replace(Venue.city, "[^A-Za-z0-9]+", "-", "g")), "-"
+)
+
+# Every spelling of one city, by slug, most viewed first (static snapshots)
+ROOMS_IN_CITY = (
+    select(*LIST_COLUMNS)
+    .join(Venue, Room.venue_id == Venue.id)
+    .where(PUBLISHED, VENUE_CITY_SLUG == bindparam("slug", type_=String))
+    .order_by(Room.view_count.desc(), Room.id)
+)
+
+recent_views = (
+    select(RoomView.room_id, func.count(RoomView.id).label("recent_views"))
+    .where(RoomView.viewed_at >= bindparam("viewed_since"))
+    .group_by(RoomView.room_id)
+    .subquery()
+)
+
+LIST_ROOMS_TRENDING = LIST_ROOMS.outerjoin(
+    recent_views, Room.id == recent_views.c.room_id
+).order_by(recent_views.c.recent_views.desc().nullslast(), Room.id)
+
+
+def list_rooms(
+    db,
+    city: str | None = None,
+    theme: str | None = None,
+    difficulty: int | None = None,
+    sort: str | None = None,
+) -> list:
+    params = {
+        "city_pattern": f"%{city}%" if city else None,
+        "theme_pattern": f"%{theme}%" if theme else None,
+        "difficulty": difficulty or None,
+    }
+    if sort == "trending":
+        params["viewed_since"] = datetime.utcnow() - timedelta(days=TRENDING_DAYS)
+        return db.execute(LIST_ROOMS_TRENDING, params).all()
+    return db.execute(LIST_ROOMS, params).all()
+
+
+def rooms_in_city(db, slug: str) -> list:
+    return db.execute(ROOMS_IN_CITY, {"slug": slug}).all()
+
+
+# ============================================================================
+# Map (/api/rooms/map)
+# ============================================================================
+
+point = bindparam("point", type_=Venue.location.type)
+distance_km = (ST_Distance(Venue.location, point) / 1000).label("distance_km")
+
+map_theme = bindparam("theme", type_=String)
+min_difficulty = bindparam("min_difficulty", type_=Integer)
+max_difficulty = bindparam("max_difficulty", type_=Integer)
+group_size = bindparam("group_size", type_=Integer)
+min_players = bindparam("min_players", type_=Integer)
+max_players = bindparam("max_players", type_=Integer)
+max_price_usd = bindparam("max_price_usd", type_=Float)
+min_rating = bindparam("min_rating", type_=Float)
+
+MAP_BASE = (
+    select(
+        *ROOM_COLUMNS,
+        *VENUE_COLUMNS,
+        distance_km,
+        func.count().over().label("total"),
+    )
+    .join(Venue, Room.venue_id == Venue.id)
+    .where(
+        PUBLISHED,
+        ST_DWithin(Venue.location, point, bindparam("radius_m", type_=Float)),
+        optional(map_theme, Room.theme == map_theme),
+        optional(min_difficulty, Room.difficulty >= min_difficulty),
+        optional(max_difficulty, Room.difficulty <= max_difficulty),
+        optional(
+            group_size,
+            and_(Room.min_players <= group_size, Room.max_players >= group_size),
+        ),
+        optional(min_players, Room.max_players >= min_players),
+        optional(max_players, Room.min_players <= max_players),
+        optional(max_price_usd, Room.price_usd <= max_price_usd),
+        optional(min_rating, Venue.google_rating >= min_rating),
+    )
+)
+
+MAP_ORDER = {
+    "distance": distance_km.asc(),
+    "rating": Venue.google_rating.desc().nullslast(),
+    "price": Room.price_usd.asc().nullslast(),
+    "difficulty": Room.difficulty.desc(),
+    "popularity": Room.view_count.desc(),
+}
+
+# One statement per sort key, each compiled once
+MAP_ROOMS = {
+    sort_by: MAP_BASE.order_by(order)
+    .limit(bindparam("limit", type_=Integer))
+    .offset(bindparam("offset", type_=Integer))
+    for sort_by, order in MAP_ORDER.items()
+}
+
+
+def map_rooms(
+    db,
+    lat: float,
+    lng: float,
+    radius_km: float,
+    sort_by: str = "distance",
+    page: int = 1,
+    page_size: int = 20,
+    **filters,
+) -> tuple:
+    """(rows, total) for one page of rooms within radius_km; `filters` are
+    the optional MAP_BASE parameters (theme, min_difficulty, ..., min_rating)"""
+    params = {
+        "point": WKTElement(f"POINT({lng} {lat})", srid=4326),
+        "radius_m": radius_km * 1000,
+        "theme": None,
+        "min_difficulty": None,
+        "max_difficulty": None,
+        "group_size": None,
+        "min_players": None,
+        "max_players": None,
+        "max_price_usd": None,
+        "min_rating": None,
+        **filters,
+        "limit": page_size,
+        "offset": (page - 1) * page_size,
+    }
+    rows = db.execute(MAP_ROOMS.get(sort_by, MAP_ROOMS["distance"]), params).all()
+
+    total = rows[0].total if rows else 0
+    if not rows and page > 1:
+        # Past the last page: the window count is unavailable, so count directly
+        total = db.execute(
+            select(func.count()).select_from(
+                MAP_BASE.with_only_columns(Room.id).subquery()
+            ),
+            params,
+        ).scalar()
+    return rows, total
+
+
+# ============================================================================
+# Detail (/api/rooms/{id}, /api/rooms/slug/{slug}, snapshots)
+# ============================================================================
+
+DETAIL_BASE = (
+    select(*ROOM_COLUMNS, *VENUE_COLUMNS)
+    .join(Venue, Room.venue_id == Venue.id)
+    .where(PUBLISHED)
+)
+
+ROOM_BY_ID = DETAIL_BASE.where(Room.id == bindparam("room_id", type_=Integer))
+ROOM_BY_SLUG = DETAIL_BASE.where(Room.slug == bindparam("slug", type_=String))
+ROOMS_BY_IDS = DETAIL_BASE.where(
+    Room.id.in_(bindparam("room_ids", expanding=True))
+).order_by(Room.id)
+
+PHOTOS_FOR_ROOMS = (
+    select(
+        RoomPhoto.room_id,
+        RoomPhoto.id,
+        RoomPhoto.width,
+        RoomPhoto.height,
+        RoomPhoto.is_primary,
+        RoomPhoto.variants,
+    )
+    .where(RoomPhoto.room_id.in_(bindparam("room_ids", expanding=True)))
+    .order_by(RoomPhoto.room_id, RoomPhoto.display_order, RoomPhoto.id)
+)
+
+origin = aliased(Venue)
+nearby_distance_km = (ST_Distance(Venue.location, origin.location) / 1000).label(
+    "distance_km"
+)
+
+NEARBY_ROOMS = (
+    select(
+        Room.id,
+        Room.name,
+        Room.slug,
+        Room.theme,
+        Room.difficulty,
+        Room.duration_minutes,
+        Room.min_price_per_person,
+        Room.max_price_per_person,
+        Room.currency,
+        Room.primary_image_url,
+        Venue.name.label("venue_name"),
+        Venue.city,
+        nearby_distance_km,
+    )
+    .join(Venue, Room.venue_id == Venue.id)
+    .join(origin, origin.id == bindparam("venue_id", type_=Integer))
+    .where(
+        Room.id != bindparam("room_id", type_=Integer),
+        PUBLISHED,
+        ST_DWithin(Venue.location, origin.location, bindparam("radius_m", type_=Float)),
+    )
+    .order_by(nearby_distance_km, Room.view_count.desc())
+    .limit(bindparam("limit", type_=Integer))
+)
+
+
+def room_by_id(db, room_id: int):
+    return db.execute(ROOM_BY_ID, {"room_id": room_id}).first()
+
+
+def room_by_slug(db, slug: str):
+    return db.execute(ROOM_BY_SLUG, {"slug": slug}).first()
+
+
+def rooms_by_ids(db, room_ids: list) -> list:
+    return db.execute(ROOMS_BY_IDS, {"room_ids": list(room_ids)}).all()
+
+
+def room_photos(db, room_ids: list) -> dict:
+    """{room_id: photo rows in display order} for many rooms in one query"""
+    photos = {room_id: [] for room_id in room_ids}
+    for row in db.execute(PHOTOS_FOR_ROOMS, {"room_ids": list(room_ids)}):
+        photos[row.room_id].append(row)
+    return photos
+
+
+def nearby_rooms(db, room, radius_km: float, limit: int) -> list:
+    """Other published rooms within radius_km of the room's venue, nearest
+    first (none when the venue has no location)"""
+    return db.execute(
+        NEARBY_ROOMS,
+        {
+            "room_id": room.id,
+            "venue_id": room.venue_id,
+            "radius_m": radius_km * 1000,
+            "limit": limit,
+        },
+    ).all()
+
+
+# ============================================================================
+# Themes (/api/rooms/themes)
+# ============================================================================
+
+THEMES = (
+    select(Room.theme)
+    .distinct()
+    .where(Room.theme.isnot(None), Room.is_published == True)
+)
+
+
+def list_themes(db) -> list:
+    return [theme for theme in db.scalars(THEMES) if theme]
@@ -0,0 +1,207 @@
+"""
+include= expansion for the room detail routes (/api/rooms/{id} and
+/api/rooms/slug/{slug}), and the serializers that turn api/read_queries.py
+rows into response dicts. Each expansion costs a fixed number of queries
+however many photos or neighbours there are: the venue is selected in the
+room's own row, and photos, nearby and similar rooms are one query each, so
+a detail page renders from a single request.
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from api.read_queries import nearby_rooms, room_photos
+from api.similar_api import load_similar_rooms
+from media import photo_urls
+from models import Room
+
+INCLUDE_OPTIONS = ("venue", "photos", "nearby", "similar")
+NEARBY_RADIUS_KM = 10
+NEARBY_LIMIT = 6
+SIMILAR_LIMIT = 6
+
+
+def parse_include(include: str | None, default: tuple = ()) -> set:
+    """Comma-separated include= value; unknown names are a 400"""
+    if include is None:
+        return set(default)
+
+    includes = {name.strip() for name in include.split(",") if name.strip()}
+    unknown = includes - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}. "
+            f"Options: {', '.join(INCLUDE_OPTIONS)}",
+        )
+    return includes
+
+
+def count_view(db, room_id: int):
+    """Increment view_count in SQL and commit.
+
+    Runs after the response is built (a commit expires every loaded object)
+    and leaves updated_at alone, since a view is not a content change.
+    """
+    db.execute(
+        update(Room)
+        .where(Room.id == room_id)
+        .values(view_count=Room.view_count + 1, updated_at=Room.updated_at)
+    )
+    db.commit()
+
+
+def venue_dict(row) -> dict:
+    """The venue of a read_queries row with VENUE_COLUMNS"""
+    return {
+        "id": row.venue_id,
+        "name": row.venue_name,
+        "address": row.venue_address,
+        "city": row.venue_city,
+        "state": row.venue_state,
+        "latitude": float(row.venue_latitude) if row.venue_latitude else None,
+        "longitude": float(row.venue_longitude) if row.venue_longitude else None,
+        "phone": row.venue_phone,
+        "website": row.venue_website,
+        "google_rating": float(row.venue_google_rating)
+        if row.venue_google_rating
+        else None,
+        "google_review_count": row.venue_google_review_count,
+    }
+
+
+def photo_dicts(photos: list, base_url: str) -> list:
+    return [
+        {
+            "id": photo.id,
+            "width": photo.width,
+            "height": photo.height,
+            "is_primary": photo.is_primary,
+            **urls,
+        }
+        for photo in photos
+        if (urls := photo_urls(photo.variants, base_url))
+    ]
+
+
+def room_list_item(room, photo: dict | None) -> dict:
+    """A LIST_COLUMNS row as listed by /api/rooms; `photo` is its primary
+    photo_urls()"""
+    # Prefer explicit min/max per-person prices when available.
+    min_price = (
+        float(room.min_price_per_person)
+        if room.min_price_per_person is not None
+        else None
+    )
+    max_price = (
+        float(room.max_price_per_person)
+        if room.max_price_per_person is not None
+        else None
+    )
+    return {
+        "id": room.id,
+        "name": room.name,
+        "theme": room.theme,
+        "difficulty": room.difficulty,
+        # Expose min/max as separate fields and keep a single `price`
+        # field for existing clients (using the min when available).
+        "price_min": min_price,
+        "price_max": max_price,
+        "price": min_price,
+        "currency": room.currency,
+        "latitude": float(room.latitude) if room.latitude else None,
+        "longitude": float(room.longitude) if room.longitude else None,
+        "city": room.city,
+        "venue_name": room.venue_name,
+        "primary_image_url": photo["src"] if photo else room.primary_image_url,
+        "primary_image_srcset": photo["srcset"] if photo else None,
+        "image_urls": room.image_urls or [],
+        "duration_minutes": room.duration_minutes,
+    }
+
+
+def room_detail_dict(room, expanded: dict) -> dict:
+    """The /api/rooms/{id} document: ROOM_COLUMNS fields plus expansions()"""
+    primary_photo = next(
+        (p for p in expanded.get("photos", []) if p["is_primary"]), None
+    )
+    min_price = (
+        float(room.min_price_per_person)
+        if room.min_price_per_person is not None
+        else None
+    )
+    return {
+        "id": room.id,
+        "name": room.name,
+        "slug": room.slug,
+        "description": room.description,
+        "theme": room.theme,
+        "difficulty": room.difficulty,
+        "min_players": room.min_players,
+        "max_players": room.max_players,
+        "duration_minutes": room.duration_minutes,
+        # Expose explicit min/max, and keep `price` for existing clients.
+        "price_min": min_price,
+        "price_max": float(room.max_price_per_person)
+        if room.max_price_per_person is not None
+        else None,
+        "price": min_price,
+        "currency": room.currency,
+        "success_rate": float(room.success_rate) if room.success_rate else None,
+        "primary_image_url": primary_photo["src"]
+        if primary_photo
+        else room.primary_image_url,
+        "primary_image_srcset": primary_photo["srcset"] if primary_photo else None,
+        "image_urls": room.image_urls or [],
+        **expanded,
+    }
+
+
+def load_nearby_rooms(db, room, limit: int = NEARBY_LIMIT) -> list:
+    """Other published rooms within NEARBY_RADIUS_KM of the room's venue"""
+    rows = nearby_rooms(db, room, NEARBY_RADIUS_KM, limit)
+
+    nearby = []
+    for near in rows:
+        price_min = (
+            float(near.min_price_per_person)
+            if near.min_price_per_person is not None
+            else None
+        )
+        nearby.append(
+            {
+                "id": near.id,
+                "name": near.name,
+                "slug": near.slug,
+                "theme": near.theme,
+                "difficulty": near.difficulty,
+                "duration_minutes": near.duration_minutes,
+                "price_min": price_min,
+                "price_max": float(near.max_price_per_person)
+                if near.max_price_per_person is not None
+                else None,
+                "price": price_min,
+                "currency": near.currency,
+                "primary_image_url": near.primary_image_url,
+                "venue_name": near.venue_name,
+                "city": near.city,
+                "distance_km": round(float(near.distance_km), 2)
+                if near.distance_km is not None
+                else None,
+            }
+        )
+    return nearby
+
+
+def expansions(db, room, includes: set, base_url: str) -> dict:
+    """Response keys for everything in `includes`; `room` is a detail row"""
+    expanded = {}
+    if "venue" in includes:
+        expanded["venue"] = venue_dict(room)
+    if "photos" in includes:
+        expanded["photos"] = photo_dicts(room_photos(db, [room.id])[room.id], base_url)
+    if "nearby" in includes:
+        expanded["nearby"] = load_nearby_rooms(db, room)
+    if "similar" in includes:
+        expanded["similar"] = load_similar_rooms(db, room.id, SIMILAR_LIMIT)
+    return expanded
@@ -0,0 +1,177 @@
+"""
+Search API - Escape Room Finder
+Ranked full-text search over rooms and their venues, using the weighted
+rooms.search_vector document (see schema.py) and its GIN index. Results can
+be boosted by distance from a point, so nearby matches rank first without
+dropping good matches further away.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from geoalchemy2.elements import WKTElement
+from geoalchemy2.functions import ST_Distance
+from pydantic import BaseModel
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Room, Venue
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+SEARCH_CONFIG = "english"
+# ts_rank normalisation 1: divide by 1 + log(document length), so long
+# descriptions don't outrank a match in a room's name
+RANK_NORMALIZATION = 1
+# With a location, a room at distance d gets its rank multiplied by
+# 1 + GEO_BOOST * GEO_DECAY_KM / (GEO_DECAY_KM + d): up to (1 + GEO_BOOST)x
+# on the spot, half that bonus GEO_DECAY_KM away
+GEO_BOOST = 1.0
+GEO_DECAY_KM = 10.0
+
+
+# ============================================================================
+# Response Models
+# ============================================================================
+
+
+class SearchResult(BaseModel):
+    id: int
+    name: str
+    slug: Optional[str]
+    short_description: Optional[str]
+    theme: Optional[str]
+    difficulty: Optional[int]
+    min_price_per_person: Optional[float]
+    currency: Optional[str]
+    primary_image_url: Optional[str]
+    venue_id: int
+    venue_name: str
+    city: str
+    distance_km: Optional[float] = None
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    results: List[SearchResult]
+
+
+# ============================================================================
+# Search Endpoint
+# ============================================================================
+
+
+@router.get("", response_model=SearchResponse)
+def search(
+    q: str = Query(..., description="Search text", min_length=2, max_length=200),
+    lat: Optional[float] = Query(None, description="Boost results near", ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    city: Optional[str] = Query(None, description="Only rooms in this city"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Full-text search across room names, themes, descriptions and venues
+
+    Supports web-search syntax: "quoted phrases", or, -excluded
+
+    Example:
+    GET /api/search?q=haunted+victorian&lat=51.5074&lng=-0.1278
+    """
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="lat and lng go together")
+
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(Room.search_vector, ts_query, RANK_NORMALIZATION)
+
+    if lat is not None:
+        point = WKTElement(f"POINT({lng} {lat})", srid=4326)
+        distance_km = ST_Distance(Venue.location, point) / 1000
+        # Venues without a location get no boost
+        boost = func.coalesce(
+            1 + GEO_BOOST * GEO_DECAY_KM / (GEO_DECAY_KM + distance_km), 1
+        )
+        score = rank * boost
+    else:
+        distance_km = literal(None)
+        score = rank
+
+    stmt = (
+        select(
+            Room.id,
+            Room.name,
+            Room.slug,
+            Room.short_description,
+            Room.theme,
+            Room.difficulty,
+            Room.min_price_per_person,
+            Room.currency,
+            Room.primary_image_url,
+            Room.venue_id,
+            Venue.name.label("venue_name"),
+            Venue.city,
+            distance_km.label("distance_km"),
+            score.label("score"),
+            func.count().over().label("total"),
+        )
+        .join(Venue, Room.venue_id == Venue.id)
+        .where(
+            Room.search_vector.op("@@")(ts_query),
+            Room.is_published == True,
+            Venue.is_active == True,
+        )
+        .order_by(score.desc(), Room.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    if city:
+        stmt = stmt.where(Venue.city.ilike(f"%{city}%"))
+
+    rows = db.execute(stmt).all()
+
+    total = rows[0].total if rows else 0
+    if not rows and page > 1:
+        # Past the last page: the window count is unavailable, so count directly
+        total = db.execute(
+            select(func.count()).select_from(
+                stmt.with_only_columns(Room.id)
+                .limit(None)
+                .offset(None)
+                .order_by(None)
+                .subquery()
+            )
+        ).scalar()
+
+    results = [
+        SearchResult(
+            id=row.id,
+            name=row.name,
+            slug=row.slug,
+            short_description=row.short_description,
+            theme=row.theme,
+            difficulty=row.difficulty,
+            min_price_per_person=float(row.min_price_per_person)
+            if row.min_price_per_person is not None
+            else None,
+            currency=row.currency,
+            primary_image_url=row.primary_image_url,
+            venue_id=row.venue_id,
+            venue_name=row.venue_name,
+            city=row.city,
+            distance_km=round(float(row.distance_km), 2)
+            if row.distance_km is not None
+            else None,
+            score=round(float(row.score), 6),
+        )
+        for row in rows
+    ]
+
+    return SearchResponse(
+        query=q, total=total, page=page, page_size=page_size, results=results
+    )
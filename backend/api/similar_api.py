@@ -0,0 +1,145 @@
+"""
+Similar Rooms API - Escape Room Finder
+Serves the neighbours precomputed by scraper/similar_rooms.py: one lookup on
+the room_similar primary key (room_id, rank), joined to the rooms it points at.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Room, RoomSimilar, Venue
+
+router = APIRouter(prefix="/api/rooms", tags=["rooms"])
+
+
+# ============================================================================
+# Response Models
+# ============================================================================
+
+
+class SimilarRoom(BaseModel):
+    id: int
+    name: str
+    slug: Optional[str]
+    theme: Optional[str]
+    difficulty: Optional[int]
+    duration_minutes: Optional[int]
+    price_min: Optional[float]
+    price_max: Optional[float]
+    price: Optional[float]
+    currency: Optional[str]
+    primary_image_url: Optional[str]
+    venue_name: str
+    city: str
+    score: float
+
+
+class SimilarRoomsResponse(BaseModel):
+    room_id: int
+    rooms: List[SimilarRoom]
+
+
+# ============================================================================
+# Similar Rooms Endpoint
+# ============================================================================
+
+
+SIMILAR_COLUMNS = (
+    Room.id,
+    Room.name,
+    Room.slug,
+    Room.theme,
+    Room.difficulty,
+    Room.duration_minutes,
+    Room.min_price_per_person,
+    Room.max_price_per_person,
+    Room.currency,
+    Room.primary_image_url,
+    Venue.name.label("venue_name"),
+    Venue.city,
+    RoomSimilar.room_id.label("for_room_id"),
+    RoomSimilar.score,
+)
+
+
+def similar_query():
+    return (
+        select(*SIMILAR_COLUMNS)
+        .join(Room, RoomSimilar.similar_room_id == Room.id)
+        .join(Venue, Room.venue_id == Venue.id)
+        # Neighbours unpublished since the last run are skipped
+        .where(Room.is_published == True, Venue.is_active == True)
+    )
+
+
+def similar_card(row) -> dict:
+    price_min = (
+        float(row.min_price_per_person)
+        if row.min_price_per_person is not None
+        else None
+    )
+    return {
+        "id": row.id,
+        "name": row.name,
+        "slug": row.slug,
+        "theme": row.theme,
+        "difficulty": row.difficulty,
+        "duration_minutes": row.duration_minutes,
+        "price_min": price_min,
+        "price_max": float(row.max_price_per_person)
+        if row.max_price_per_person is not None
+        else None,
+        "price": price_min,
+        "currency": row.currency,
+        "primary_image_url": row.primary_image_url,
+        "venue_name": row.venue_name,
+        "city": row.city,
+        "score": row.score,
+    }
+
+
+def load_similar_rooms(db, room_id: int, limit: int) -> list:
+    """Precomputed neighbours of a room, best first, as SimilarRoom dicts"""
+    rows = db.execute(
+        similar_query()
+        .where(RoomSimilar.room_id == room_id)
+        .order_by(RoomSimilar.rank)
+        .limit(limit)
+    )
+    return [similar_card(row) for row in rows]
+
+
+def load_similar_rooms_bulk(db, room_ids: list, limit: int) -> dict:
+    """{room_id: neighbours} for many rooms in one query (top `limit` ranks)"""
+    similar = {room_id: [] for room_id in room_ids}
+    rows = db.execute(
+        similar_query()
+        .where(RoomSimilar.room_id.in_(room_ids), RoomSimilar.rank <= limit)
+        .order_by(RoomSimilar.room_id, RoomSimilar.rank)
+    )
+    for row in rows:
+        similar[row.for_room_id].append(similar_card(row))
+    return similar
+
+
+@router.get("/{room_id}/similar", response_model=SimilarRoomsResponse)
+def get_similar_rooms(
+    room_id: int,
+    limit: int = Query(6, description="Number of rooms", ge=1, le=12),
+    db: Session = Depends(get_db),
+):
+    """
+    Rooms most like this one (theme, difficulty, size, price and location)
+
+    Example:
+    GET /api/rooms/42/similar?limit=4
+    """
+    rooms = load_similar_rooms(db, room_id, limit)
+    return SimilarRoomsResponse(
+        room_id=room_id, rooms=[SimilarRoom(**room) for room in rooms]
+    )
@@ -0,0 +1,95 @@
+"""
+Benchmark: concurrent description pipeline throughput
+Runs describe_concurrently against the local fake Anthropic server (fixed
+per-request latency, periodic 429s) for several concurrency levels. Writes
+are discarded, so no database or network is needed.
+
+Run from backend: uv run python -m benchmarks.bench_description_pipeline
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import anthropic
+
+from scraper import ai_description_generator
+from scraper.ai_description_generator import describe_concurrently
+from scraper.fake_anthropic_server import FakeAnthropicServer
+
+
+def synthetic_venues(count: int):
+    for i in range(count):
+        yield SimpleNamespace(
+            id=i,
+            name=f"Bench Venue {i}",
+            city="London",
+            state="England",
+            google_rating=4.5,
+            google_review_count=100,
+        )
+
+
+async def run(base_url: str, count: int, concurrency: int, commit_every: int):
+    async_client = anthropic.AsyncAnthropic(
+        api_key="test", base_url=base_url, max_retries=0
+    )
+    commits = []
+
+    start = time.perf_counter()
+    written, failed = await describe_concurrently(
+        synthetic_venues(count),
+        commits.append,
+        concurrency=concurrency,
+        commit_every=commit_every,
+        async_client=async_client,
+    )
+    elapsed = time.perf_counter() - start
+
+    await async_client.close()
+    return written, failed, len(commits), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=25)
+    parser.add_argument("--commit-every", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    # Keep backoff short so the stub's 429s don't dominate the timings
+    ai_description_generator.RETRY_BASE_SECONDS = 0.05
+
+    server = FakeAnthropicServer(
+        ("127.0.0.1", 0),
+        latency=args.latency,
+        rate_limit_every=args.rate_limit_every,
+    )
+    server.serve_in_thread()
+
+    print("=" * 70)
+    print(
+        f"{args.count} venues, {args.latency}s latency, "
+        f"429 every {args.rate_limit_every} requests"
+    )
+    print("=" * 70)
+
+    try:
+        for concurrency in args.concurrency:
+            written, failed, commits, elapsed = asyncio.run(
+                run(server.base_url, args.count, concurrency, args.commit_every)
+            )
+            print(
+                f"concurrency {concurrency:>3}: {elapsed:7.2f}s  "
+                f"{written / elapsed:7.1f} venues/s  "
+                f"({written} written, {failed} failed, {commits} commits)"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
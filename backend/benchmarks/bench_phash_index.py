@@ -0,0 +1,80 @@
+"""
+Benchmark: near-duplicate lookup with PHashIndex vs a linear scan
+Stores N random 64-bit hashes, then queries perturbed copies of stored hashes
+(0 to 2 * max distance bits flipped) and random misses. Both methods must
+return the same matches. No database or images are needed.
+
+Run from backend: uv run python -m benchmarks.bench_phash_index
+"""
+
+import argparse
+import random
+import time
+
+from scraper.image_dedup import PHASH_MAX_DISTANCE, PHashIndex, hamming
+
+
+def linear_query(hashes: list, value: int, max_distance: int) -> list:
+    return sorted(
+        (distance, i)
+        for i, stored in enumerate(hashes)
+        if (distance := hamming(value, stored)) <= max_distance
+    )
+
+
+def make_queries(hashes: list, count: int, max_distance: int, rng) -> list:
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            value = rng.getrandbits(64)
+        else:
+            value = rng.choice(hashes)
+            for bit in rng.sample(range(64), rng.randint(0, 2 * max_distance)):
+                value ^= 1 << bit
+        queries.append(value)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--max-distance", type=int, default=PHASH_MAX_DISTANCE)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+
+    print(f"{args.queries} queries, max distance {args.max_distance}")
+    print("=" * 70)
+
+    for size in args.sizes:
+        hashes = [rng.getrandbits(64) for _ in range(size)]
+        queries = make_queries(hashes, args.queries, args.max_distance, rng)
+
+        start = time.perf_counter()
+        index = PHashIndex(args.max_distance)
+        for i, value in enumerate(hashes):
+            index.add(value, i)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = [sorted(index.query(value)) for value in queries]
+        indexed_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        linear = [linear_query(hashes, value, args.max_distance) for value in queries]
+        linear_elapsed = time.perf_counter() - start
+
+        assert indexed == linear, "index and linear scan disagree"
+        matched = sum(1 for result in linear if result)
+
+        print(
+            f"{size:>7} hashes: build {build * 1000:7.1f}ms  "
+            f"index {indexed_elapsed / args.queries * 1e6:8.1f}us/query  "
+            f"linear {linear_elapsed / args.queries * 1e6:9.1f}us/query  "
+            f"({linear_elapsed / indexed_elapsed:5.0f}x, {matched} matched)"
+        )
+
+
+if __name__ == "__main__":
+    main()
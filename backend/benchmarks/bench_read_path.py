@@ -0,0 +1,282 @@
+"""
+Benchmark: per-request Python CPU of the room read path
+Runs the list, map, detail and themes reads the way the endpoints did before
+api/read_queries.py (a legacy Query built per request, ORM rows hydrated into
+the session, converted to dicts by hand) and the way they do now (prebuilt
+select() statements, rows straight to the serializers). CPU time is this
+process only (time.process_time), so the database's own work is excluded;
+wall time is shown alongside. The "before" dicts carry fewer fields than the
+real responses, so the difference is if anything understated. Needs
+DATABASE_URL with some published rooms.
+
+Run from backend: uv run python -m benchmarks.bench_read_path --requests 200
+"""
+
+import argparse
+import time
+
+from geoalchemy2.elements import WKTElement
+from geoalchemy2.functions import ST_Distance, ST_DWithin
+from sqlalchemy import select, text
+from sqlalchemy.orm import contains_eager, selectinload
+
+from api.map_api import room_response_dict
+from api.read_queries import list_rooms, list_themes, map_rooms, room_by_id
+from api.room_detail import expansions, room_detail_dict, room_list_item, venue_dict
+from database import SessionLocal
+from media import MEDIA_URL, photo_urls
+from models import Room, RoomPhoto, Venue
+
+# ============================================================================
+# Before: legacy Query per request, ORM objects converted by hand
+# ============================================================================
+
+
+def legacy_venue(venue) -> dict:
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "latitude": float(venue.latitude) if venue.latitude else None,
+        "longitude": float(venue.longitude) if venue.longitude else None,
+        "phone": venue.phone,
+        "website": venue.website,
+        "google_rating": float(venue.google_rating) if venue.google_rating else None,
+        "google_review_count": venue.google_review_count,
+    }
+
+
+def legacy_list(db, city):
+    query = (
+        db.query(Room)
+        .join(Venue)
+        .filter(Room.is_published == True, Venue.is_active == True)
+    )
+    if city:
+        query = query.filter(Venue.city.ilike(f"%{city}%"))
+    rooms = query.all()
+
+    room_ids = [r.id for r in rooms]
+    primary_photos = {
+        photo.room_id: photo_urls(photo.variants, MEDIA_URL)
+        for photo in db.query(RoomPhoto).filter(
+            RoomPhoto.room_id.in_(room_ids), RoomPhoto.is_primary == True
+        )
+    }
+    return [
+        {
+            "id": room.id,
+            "name": room.name,
+            "theme": room.theme,
+            "difficulty": room.difficulty,
+            "price": float(room.min_price_per_person)
+            if room.min_price_per_person is not None
+            else None,
+            "currency": room.currency,
+            # Lazy-loads each venue not already in the session
+            "city": room.venue.city if room.venue else None,
+            "venue_name": room.venue.name if room.venue else None,
+            "primary_image_url": primary_photos[room.id]["src"]
+            if primary_photos.get(room.id)
+            else room.primary_image_url,
+            "duration_minutes": room.duration_minutes,
+        }
+        for room in rooms
+    ]
+
+
+def legacy_map(db, lat, lng, radius):
+    user_location = WKTElement(f"POINT({lng} {lat})", srid=4326)
+    query = (
+        db.query(
+            Room,
+            Venue,
+            (ST_Distance(Venue.location, user_location) / 1000).label("distance_km"),
+        )
+        .join(Venue, Room.venue_id == Venue.id)
+        .filter(
+            Room.is_published == True,
+            Venue.is_active == True,
+            ST_DWithin(Venue.location, user_location, radius * 1000),
+        )
+        .order_by(text("distance_km"))
+    )
+    total = query.count()
+    rooms = []
+    for room, venue, distance in query.offset(0).limit(20).all():
+        rooms.append(
+            {
+                "id": room.id,
+                "name": room.name,
+                "slug": room.slug,
+                "short_description": room.short_description,
+                "description": room.description,
+                "theme": room.theme,
+                "sub_themes": room.sub_themes,
+                "difficulty": room.difficulty,
+                "min_players": room.min_players,
+                "max_players": room.max_players,
+                "optimal_players": room.optimal_players,
+                "duration_minutes": room.duration_minutes,
+                "min_price_per_person": float(room.min_price_per_person)
+                if room.min_price_per_person is not None
+                else None,
+                "price_usd": float(room.price_usd)
+                if room.price_usd is not None
+                else None,
+                "currency": room.currency,
+                "view_count": room.view_count,
+                "is_featured": room.is_featured,
+                "distance_km": round(float(distance), 2) if distance else None,
+                "venue": legacy_venue(venue),
+            }
+        )
+    return total, rooms
+
+
+def legacy_detail(db, room_id):
+    room = db.scalars(
+        select(Room)
+        .join(Room.venue)
+        .options(contains_eager(Room.venue), selectinload(Room.photos))
+        .where(Room.is_published == True, Venue.is_active == True)
+        .where(Room.id == room_id)
+    ).first()
+    return {
+        "id": room.id,
+        "name": room.name,
+        "description": room.description,
+        "theme": room.theme,
+        "venue": legacy_venue(room.venue),
+        "photos": [
+            {"id": photo.id, **urls}
+            for photo in room.photos
+            if (urls := photo_urls(photo.variants, MEDIA_URL))
+        ],
+    }
+
+
+def legacy_themes(db):
+    themes = (
+        db.query(Room.theme)
+        .distinct()
+        .filter(Room.theme.isnot(None), Room.is_published == True)
+        .all()
+    )
+    return [t[0] for t in themes if t[0]]
+
+
+# ============================================================================
+# After: prebuilt select() statements, rows to the serializers
+# ============================================================================
+
+
+def core_list(db, city):
+    return [
+        room_list_item(room, photo_urls(room.primary_photo_variants, MEDIA_URL))
+        for room in list_rooms(db, city=city)
+    ]
+
+
+def core_map(db, lat, lng, radius):
+    rows, total = map_rooms(db, lat, lng, radius)
+    return total, [
+        {**room_response_dict(row), "venue": venue_dict(row)} for row in rows
+    ]
+
+
+def core_detail(db, room_id):
+    room = room_by_id(db, room_id)
+    return room_detail_dict(room, expansions(db, room, {"venue", "photos"}, MEDIA_URL))
+
+
+def core_themes(db):
+    return list_themes(db)
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+
+def time_requests(handler, count: int):
+    """Each call gets its own session, as a request does"""
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(count):
+        db = SessionLocal()
+        try:
+            handler(db)
+        finally:
+            db.close()
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / count
+    wall_ms = (time.perf_counter() - wall_start) * 1000 / count
+    return cpu_ms, wall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--city", default=None, help="List filter (default: all)")
+    parser.add_argument("--lat", type=float, default=40.7516)
+    parser.add_argument("--lng", type=float, default=-73.98)
+    parser.add_argument("--radius", type=float, default=25)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        room_id = db.scalar(
+            select(Room.id)
+            .join(Venue, Room.venue_id == Venue.id)
+            .where(Room.is_published == True, Venue.is_active == True)
+            .limit(1)
+        )
+    finally:
+        db.close()
+    if room_id is None:
+        print("No published rooms to read")
+        return
+
+    cases = [
+        (
+            "list",
+            lambda db: legacy_list(db, args.city),
+            lambda db: core_list(db, args.city),
+        ),
+        (
+            "map",
+            lambda db: legacy_map(db, args.lat, args.lng, args.radius),
+            lambda db: core_map(db, args.lat, args.lng, args.radius),
+        ),
+        (
+            "detail",
+            lambda db: legacy_detail(db, room_id),
+            lambda db: core_detail(db, room_id),
+        ),
+        ("themes", legacy_themes, core_themes),
+    ]
+
+    print("=" * 70)
+    print(f"{args.requests} requests per endpoint (ms per request)")
+    print("=" * 70)
+    print(
+        f"{'':<8} {'before cpu':>11} {'after cpu':>10} {'speedup':>8}   "
+        f"{'before wall':>11} {'after wall':>10}"
+    )
+
+    for name, before, after in cases:
+        # One untimed pass each so both start with compiled statements
+        time_requests(before, 1)
+        time_requests(after, 1)
+        before_cpu, before_wall = time_requests(before, args.requests)
+        after_cpu, after_wall = time_requests(after, args.requests)
+        print(
+            f"{name:<8} {before_cpu:11.2f} {after_cpu:10.2f} "
+            f"{before_cpu / after_cpu:7.1f}x   {before_wall:11.2f} {after_wall:10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: API worker startup and first-request latency
+Starts the API in fresh interpreters, with and without the lifespan warm-up,
+and times importing main, running the lifespan startup, the first request to
+each of a few hot routes, and the same requests once warm. Requests go
+in-process through httpx's ASGI transport, so only the database is needed
+(DATABASE_URL, as for the API).
+
+Run from backend: uv run python -m benchmarks.bench_startup --runs 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PATHS = (
+    "/api/rooms/map?lat=40.7516&lng=-73.98&radius=25&group_size=4",
+    "/api/rooms/themes",
+    "/api/rooms/facets",
+    "/api/search?q=escape",
+    "/api/cities",
+)
+STEADY_REPEATS = 20
+
+
+async def measure_worker() -> dict:
+    """Runs in the child interpreter; returns timings in milliseconds"""
+    start = time.perf_counter()
+    import httpx
+
+    import main
+
+    imported = time.perf_counter()
+    async with main.app.router.lifespan_context(main.app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://b"
+        ) as client:
+            first = {}
+            for path in PATHS:
+                t = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                first[path] = (time.perf_counter() - t) * 1000
+
+            steady = {path: [] for path in PATHS}
+            for _ in range(STEADY_REPEATS):
+                for path in PATHS:
+                    t = time.perf_counter()
+                    await client.get(path)
+                    steady[path].append((time.perf_counter() - t) * 1000)
+
+    return {
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_ms": first,
+        "steady_ms": {path: statistics.median(t) for path, t in steady.items()},
+    }
+
+
+def run_worker(warm: bool) -> dict:
+    env = dict(os.environ, WARMUP_ENABLED="1" if warm else "0")
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The API prints progress; the timings are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure_worker())))
+        return
+
+    print("=" * 70)
+    print(f"{args.runs} fresh workers per mode, {len(PATHS)} routes")
+    print("=" * 70)
+
+    for warm in (False, True):
+        runs = [run_worker(warm) for _ in range(args.runs)]
+        import_ms = statistics.median(r["import_ms"] for r in runs)
+        startup_ms = statistics.median(r["startup_ms"] for r in runs)
+        print(
+            f"\nwarm-up {'on' if warm else 'off'}: import {import_ms:.0f} ms, "
+            f"startup {startup_ms:.0f} ms"
+        )
+        for path in PATHS:
+            first = statistics.median(r["first_ms"][path] for r in runs)
+            steady = statistics.median(r["steady_ms"][path] for r in runs)
+            print(
+                f"  {path[:48]:<48} first {first:7.1f} ms  "
+                f"steady {steady:6.1f} ms  ({first / steady:4.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
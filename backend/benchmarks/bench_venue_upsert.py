@@ -0,0 +1,113 @@
+"""
+Benchmark: batched venue upsert
+Loads synthetic venues through upsert_venues_batched, then loads them again so
+every row takes the ON CONFLICT update path. A small sample is also timed
+through the per-row save for comparison. Benchmark rows are deleted afterwards.
+
+Run from backend: uv run python -m benchmarks.bench_venue_upsert --count 10000
+"""
+
+import argparse
+import random
+import time
+
+from database import SessionLocal
+from models import Venue
+from scraper.venue_scraper import (
+    VENUE_UPSERT_BATCH_SIZE,
+    save_venues_individually,
+    upsert_venues_batched,
+)
+
+PLACE_ID_PREFIX = "bench-"
+LEGACY_SOURCE = "benchmark"
+
+
+def synthetic_venues(count: int, source: str = "google") -> list:
+    rng = random.Random(42)
+    venues = []
+    for i in range(count):
+        venues.append(
+            {
+                "source": source,
+                "source_id": f"{PLACE_ID_PREFIX}{i}" if source == "google" else None,
+                "name": f"Bench Venue {source} {i}",
+                "address": f"{i} Benchmark Street, London",
+                "latitude": 51.28 + rng.random() * 0.42,
+                "longitude": -0.51 + rng.random() * 0.84,
+                "phone": None,
+                "website": f"https://bench-{i}.example.com",
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "review_count": rng.randint(0, 2000),
+                "price_level": None,
+            }
+        )
+    return venues
+
+
+def cleanup(db):
+    db.query(Venue).filter(
+        (Venue.google_place_id.like(f"{PLACE_ID_PREFIX}%"))
+        | (Venue.data_source == LEGACY_SOURCE)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def timed(label: str, count: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {count:>7} rows  {elapsed:8.2f}s  "
+        f"{count / elapsed if elapsed else 0:10.0f} rows/s"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=VENUE_UPSERT_BATCH_SIZE)
+    parser.add_argument(
+        "--legacy-sample",
+        type=int,
+        default=500,
+        help="Venues to time through the per-row path (0 to skip)",
+    )
+    args = parser.parse_args()
+
+    venues = synthetic_venues(args.count)
+    db = SessionLocal()
+
+    try:
+        cleanup(db)
+        print("=" * 70)
+
+        inserted, _ = timed(
+            "batched upsert (insert)",
+            args.count,
+            lambda: upsert_venues_batched(db, venues, args.batch_size),
+        )
+        _, updated = timed(
+            "batched upsert (update)",
+            args.count,
+            lambda: upsert_venues_batched(db, venues, args.batch_size),
+        )
+
+        if args.legacy_sample:
+            sample = synthetic_venues(args.legacy_sample, source=LEGACY_SOURCE)
+            timed(
+                "per-row save (insert)",
+                len(sample),
+                lambda: save_venues_individually(db, sample),
+            )
+
+        print("=" * 70)
+        print(f"  Inserted: {inserted}, updated: {updated}")
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import os
+import threading
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -9,12 +10,59 @@ from sqlalchemy.orm import sessionmaker
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# The engine is created on first use rather than at import, so importing
+# models or the API (scripts, tests, the startup benchmark) costs no driver
+# setup; the API's lifespan creates it and fills the pool before serving
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    DATABASE_URL,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                )
+    return _engine
+
+
+def __getattr__(name):
+    # `from database import engine` keeps working, creating it on access
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def prewarm_pool(connections: int = DB_POOL_SIZE) -> int:
+    """Open `connections` pooled connections at once so the first requests
+    don't pay for connecting; returns how many were opened"""
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(min(connections, DB_POOL_SIZE)):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()  # back to the pool, still connected
+    return len(opened)
+
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+# Create a session bound to the (lazily created) engine
+def SessionLocal():
+    return _session_factory(bind=get_engine())
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create Base class for models
 Base = declarative_base()
@@ -1,18 +1,58 @@
-from datetime import datetime, timedelta
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from typing import Optional
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import Room, RoomView, Venue
+from media import MEDIA_ROOT, MEDIA_URL, MediaFiles, media_base_url, photo_urls
+from models import Room
 
 # Import the map API router
 from api.map_api import router as map_router
+from api.room_detail import (
+    count_view,
+    expansions,
+    parse_include,
+    room_detail_dict,
+    room_list_item,
+)
+from api.read_queries import list_rooms, room_by_id
+from api.cities_api import router as cities_router
+from api.facets_api import router as facets_router
+from api.search_api import router as search_router
+from api.similar_api import router as similar_router
+from api.autocomplete_api import (
+    load_autocomplete_index,
+    refresh_autocomplete_forever,
+    router as autocomplete_router,
+)
+from scraper.room_view_partitions import ensure_partitions
+from warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start = time.perf_counter()
+    app.state.warm = False
+    app.state.warm_up = None
+    app.state.warm_up_error = None
+
+    await load_autocomplete_index()
+    await asyncio.to_thread(ensure_partitions)
+    await warm_up(app)
+    app.state.startup_seconds = round(time.perf_counter() - start, 3)
 
-app = FastAPI(title="Escape Rooms API")
+    autocomplete_refresher = asyncio.create_task(refresh_autocomplete_forever())
+    yield
+    autocomplete_refresher.cancel()
+
+
+app = FastAPI(title="Escape Rooms API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +69,17 @@ app.add_middleware(
 
 # Include the map API router
 app.include_router(map_router)
+app.include_router(cities_router)
+app.include_router(facets_router)
+app.include_router(search_router)
+app.include_router(similar_router)
+app.include_router(autocomplete_router)
+
+# Ingested room photos (scraper/photo_ingest.py), unless served from elsewhere
+if MEDIA_URL.startswith("/"):
+    app.mount(
+        MEDIA_URL, MediaFiles(directory=MEDIA_ROOT, check_dir=False), name="media"
+    )
 
 
 @app.get("/")
@@ -40,7 +91,14 @@ def read_root():
             "room_detail": "/api/rooms/{room_id}",
             "map_search": "/api/rooms/map",
             "themes": "/api/rooms/themes",
+            "facets": "/api/rooms/facets",
+            "similar_rooms": "/api/rooms/{room_id}/similar",
+            "search": "/api/search?q={text}",
+            "autocomplete": "/api/autocomplete?q={prefix}",
+            "cities": "/api/cities",
+            "city_detail": "/api/cities/{slug}",
             "health": "/health",
+            "ready": "/ready",
         },
     }
 
@@ -48,17 +106,32 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    from database import engine
+    from database import get_engine
     from sqlalchemy import text
 
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the pool is filled and hot routes are warm"""
+    if not await warm_up(app):
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming", "error": app.state.warm_up_error},
+        )
+    return {
+        "status": "ready",
+        "startup_seconds": app.state.startup_seconds,
+        "warm_up": app.state.warm_up,
+    }
+
+
 @app.get("/api/debug/room/{room_id}")
 def debug_room(room_id: int, db: Session = Depends(get_db)):
     """Debug endpoint to check room status"""
@@ -122,100 +195,43 @@ def debug_all_rooms(db: Session = Depends(get_db)):
 
 @app.get("/api/rooms")
 def get_rooms(
+    request: Request,
     city: Optional[str] = None,
     theme: Optional[str] = None,
     difficulty: Optional[int] = None,
     sort: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    query = (
-        db.query(Room)
-        .join(Venue)
-        .filter(Room.is_published == True, Venue.is_active == True)
-    )
-
-    if city:
-        query = query.filter(Venue.city.ilike(f"%{city}%"))
-    if theme:
-        query = query.filter(Room.theme.ilike(f"%{theme}%"))
-    if difficulty:
-        query = query.filter(Room.difficulty == difficulty)
-
-    if sort == "trending":
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_views = (
-            db.query(RoomView.room_id, func.count(RoomView.id).label("recent_views"))
-            .filter(RoomView.viewed_at >= thirty_days_ago)
-            .group_by(RoomView.room_id)
-            .subquery()
-        )
-        query = query.outerjoin(recent_views, Room.id == recent_views.c.room_id).order_by(
-            recent_views.c.recent_views.desc().nullslast(), Room.id
-        )
-
-    rooms = query.all()
-
-    # Debug: Log what room IDs are being returned
-    room_ids = [r.id for r in rooms]
+    rooms = list_rooms(db, city=city, theme=theme, difficulty=difficulty, sort=sort)
     print(f"\n📋 /api/rooms: Returning {len(rooms)} rooms")
-    print(f"📋 Room IDs being returned: {room_ids}")
-
-    # Also check what room IDs exist in DB (regardless of filters)
-    all_room_ids = [r[0] for r in db.query(Room.id).all()]
-    print(f"📊 Total rooms in database: {len(all_room_ids)}")
-    print(f"📊 All room IDs in DB: {all_room_ids}\n")
-
-    rooms_list = []
-    for room in rooms:
-        # Prefer explicit min/max per-person prices when available.
-        min_price = (
-            float(room.min_price_per_person)
-            if getattr(room, "min_price_per_person", None) is not None
-            else None
-        )
-        max_price = (
-            float(room.max_price_per_person)
-            if getattr(room, "max_price_per_person", None) is not None
-            else None
-        )
 
-        rooms_list.append(
-            {
-                "id": room.id,
-                "name": room.name,
-                "theme": room.theme,
-                "difficulty": room.difficulty,
-                # Expose min/max as separate fields and keep a single `price`
-                # field for existing clients (using the min when available).
-                "price_min": min_price,
-                "price_max": max_price,
-                "price": min_price,
-                "currency": room.currency,
-                "latitude": float(room.latitude) if room.latitude else None,
-                "longitude": float(room.longitude) if room.longitude else None,
-                "city": room.venue.city if room.venue else None,
-                "venue_name": room.venue.name if room.venue else None,
-                "primary_image_url": room.primary_image_url,
-                "image_urls": room.image_urls or [],
-                "duration_minutes": room.duration_minutes,
-            }
-        )
+    # Locally ingested primary photos, served as responsive WebP variants
+    base_url = media_base_url(request)
+    rooms_list = [
+        room_list_item(room, photo_urls(room.primary_photo_variants, base_url))
+        for room in rooms
+    ]
 
     return {"rooms": rooms_list}
 
 
 @app.get("/api/rooms/{room_id}")
-def get_room(room_id: int, db: Session = Depends(get_db)):
+def get_room(
+    room_id: int,
+    request: Request,
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated expansions: venue, photos, nearby, similar "
+        "(default venue,photos)",
+    ),
+    db: Session = Depends(get_db),
+):
     print(f"\n🔍 DEBUG: Fetching room {room_id}")
+    includes = parse_include(include, default=("venue", "photos"))
 
-    # Use the SAME query logic as /api/rooms to ensure consistency
+    # Use the SAME published/active filter as /api/rooms to ensure consistency
     # This ensures any room shown in the list can be accessed by ID
-    room = (
-        db.query(Room)
-        .join(Venue)
-        .filter(Room.id == room_id, Room.is_published == True, Venue.is_active == True)
-        .first()
-    )
+    room = room_by_id(db, room_id)
 
     if not room:
         # Check if room exists at all (for better error messages)
@@ -246,44 +262,11 @@ def get_room(room_id: int, db: Session = Depends(get_db)):
             detail=f"Room with ID {room_id} exists but cannot be accessed: {', '.join(issues)}",
         )
 
-    print(
-        f"✅ Room {room_id} FOUND: name='{room.name}', published={room.is_published}, venue='{room.venue.name if room.venue else None}'"
-    )
+    print(f"✅ Room {room_id} FOUND: name='{room.name}', venue='{room.venue_name}'")
     print(f"✅ Room {room_id} is accessible - returning data")
 
-    room.view_count += 1
-    db.commit()
+    expanded = expansions(db, room, includes, media_base_url(request))
+    response = room_detail_dict(room, expanded)
 
-    return {
-        "id": room.id,
-        "name": room.name,
-        "description": room.description,
-        "theme": room.theme,
-        "difficulty": room.difficulty,
-        "min_players": room.min_players,
-        "max_players": room.max_players,
-        "duration_minutes": room.duration_minutes,
-        # Expose explicit min/max, and keep `price` for existing clients.
-        "price_min": float(room.min_price_per_person)
-        if getattr(room, "min_price_per_person", None) is not None
-        else None,
-        "price_max": float(room.max_price_per_person)
-        if getattr(room, "max_price_per_person", None) is not None
-        else None,
-        "price": float(room.min_price_per_person)
-        if getattr(room, "min_price_per_person", None) is not None
-        else None,
-        "currency": room.currency,
-        "success_rate": float(room.success_rate) if room.success_rate else None,
-        "primary_image_url": room.primary_image_url,
-        "image_urls": room.image_urls or [],
-        "venue": {
-            "name": room.venue.name,
-            "city": room.venue.city,
-            "address": room.venue.address,
-            "phone": room.venue.phone,
-            "website": room.venue.website,
-        }
-        if room.venue
-        else None,
-    }
+    count_view(db, room.id)
+    return response
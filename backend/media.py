@@ -0,0 +1,43 @@
+"""
+Locally stored, content-addressed room photos and the URLs they are served at.
+Files live under MEDIA_ROOT as <hash[:2]>/<hash>/<variant>.webp and never
+change once written, so they are served with a far-future Cache-Control.
+MEDIA_URL is either a path the API mounts itself (default /media) or an
+absolute URL when the directory is published elsewhere (e.g. a CDN).
+"""
+
+import os
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", Path(__file__).resolve().parent / "media"))
+MEDIA_URL = os.getenv("MEDIA_URL", "/media").rstrip("/")
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles for content-addressed files, which are safe to cache forever"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+def media_base_url(request) -> str:
+    if MEDIA_URL.startswith(("http://", "https://")):
+        return MEDIA_URL
+    return str(request.base_url).rstrip("/") + MEDIA_URL
+
+
+def photo_urls(variants: dict | None, base_url: str) -> dict | None:
+    """src (largest width), srcset and thumbnail for a RoomPhoto's variants"""
+    if not variants or not variants.get("widths"):
+        return None
+
+    widths = variants["widths"]
+    return {
+        "src": f"{base_url}/{widths[-1]['path']}",
+        "srcset": ", ".join(f"{base_url}/{w['path']} {w['width']}w" for w in widths),
+        "thumbnail": f"{base_url}/{variants['thumbnail']['path']}",
+    }
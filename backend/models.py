@@ -5,15 +5,20 @@ from sqlalchemy import (
     ARRAY,
     DECIMAL,
     TIMESTAMP,
+    BigInteger,
     Boolean,
     CheckConstraint,
     Column,
+    Date,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -97,7 +102,8 @@ class Room(Base):
     max_price_per_person = Column(DECIMAL(10, 2))
     currency = Column(String(3), nullable=False)
     price_per_person = Column(Boolean, default=True)
-    price_usd = Column(DECIMAL(10, 2))
+    # min_price_per_person in USD, filled by scraper/currency.py
+    price_usd = Column(DECIMAL(10, 2), index=True)
     price_converted_at = Column(TIMESTAMP)
 
     # Metrics
@@ -107,11 +113,16 @@ class Room(Base):
     # AI content
     ai_review_summary = Column(JSONB)
     ai_generated_content = Column(Boolean, default=False)
+    extraction_source = Column(String(20))  # jsonld, dom_text or vision
 
     # SEO
     meta_title = Column(String(60))
     meta_description = Column(String(160))
 
+    # Search: weighted document over room and venue text, maintained by the
+    # triggers in schema.py
+    search_vector = Column(TSVECTOR)
+
     # Media
     image_urls = Column(ARRAY(Text))
     primary_image_url = Column(Text)
@@ -145,12 +156,16 @@ class Room(Base):
         CheckConstraint(
             "success_rate >= 0 AND success_rate <= 100", name="valid_success_rate"
         ),
+        Index("ix_rooms_search_vector", "search_vector", postgresql_using="gin"),
     )
 
     # Relationships
     venue = relationship("Venue", back_populates="rooms")
     photos = relationship(
-        "RoomPhoto", back_populates="room", cascade="all, delete-orphan"
+        "RoomPhoto",
+        back_populates="room",
+        cascade="all, delete-orphan",
+        order_by="RoomPhoto.display_order",
     )
     views = relationship(
         "RoomView", back_populates="room", cascade="all, delete-orphan"
@@ -172,19 +187,33 @@ class RoomPhoto(Base):
     width = Column(Integer)
     height = Column(Integer)
     file_size = Column(Integer)
+    # sha256 of the downloaded original; its WebP variants live under MEDIA_ROOT
+    content_hash = Column(String(64), index=True)
+    variants = Column(JSONB)  # {"thumbnail": {...}, "widths": [{...}, ...]}
+    # 64-bit dHash (signed) for near-duplicate detection, see scraper/image_dedup.py
+    phash = Column(BigInteger, index=True)
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
 
     room = relationship("Room", back_populates="photos")
 
+    __table_args__ = (
+        UniqueConstraint("room_id", "content_hash", name="uq_room_photos_room_hash"),
+    )
+
 
 class RoomView(Base):
+    """Raw page views, range-partitioned by month on viewed_at (schema.py);
+    scraper/room_view_partitions.py creates future partitions and rolls
+    expired ones into RoomViewDaily"""
+
     __tablename__ = "room_views"
 
-    id = Column(Integer, primary_key=True)
+    # The partition key must be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
     room_id = Column(
         Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False
     )
-    viewed_at = Column(TIMESTAMP, default=datetime.utcnow, index=True)
+    viewed_at = Column(TIMESTAMP, primary_key=True, default=datetime.utcnow, index=True)
     session_id = Column(String(100), index=True)
     ip_hash = Column(String(64))
     user_agent = Column(Text)
@@ -194,6 +223,38 @@ class RoomView(Base):
 
     room = relationship("Room", back_populates="views")
 
+    __table_args__ = {"postgresql_partition_by": "RANGE (viewed_at)"}
+
+
+class RoomViewDaily(Base):
+    """Views per room per day, kept after the raw room_views partitions for
+    those days have been dropped"""
+
+    __tablename__ = "room_view_daily"
+
+    room_id = Column(
+        Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    views = Column(Integer, nullable=False)
+    sessions = Column(Integer, nullable=False)  # distinct session_id values
+
+
+class RoomSimilar(Base):
+    """Precomputed nearest neighbours of a room (scraper/similar_rooms.py)"""
+
+    __tablename__ = "room_similar"
+
+    room_id = Column(
+        Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank = Column(Integer, primary_key=True)  # 1 = most similar
+    similar_room_id = Column(
+        Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    score = Column(Float, nullable=False)
+    computed_at = Column(TIMESTAMP, default=datetime.utcnow)
+
 
 class City(Base):
     __tablename__ = "cities"
@@ -213,3 +274,70 @@ class City(Base):
     avg_price = Column(DECIMAL(10, 2))
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
     updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ExchangeRate(Base):
+    """Units of a currency per 1 USD, loaded from a rates file"""
+
+    __tablename__ = "exchange_rates"
+
+    currency = Column(String(3), primary_key=True)
+    units_per_usd = Column(DECIMAL(18, 8), nullable=False)
+    source = Column(String(100))
+    as_of = Column(TIMESTAMP)
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        CheckConstraint("units_per_usd > 0", name="ck_exchange_rates_positive"),
+    )
+
+
+class PageFetch(Base):
+    """Validators from the last processed fetch of a URL, per consumer"""
+
+    __tablename__ = "page_fetches"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(Text, nullable=False)
+    scope = Column(String(20), nullable=False)  # rooms, images
+    etag = Column(String(200))
+    last_modified = Column(String(50))
+    content_hash = Column(String(64))
+    status_code = Column(Integer)
+    fetched_at = Column(TIMESTAMP, default=datetime.utcnow)
+    changed_at = Column(TIMESTAMP)
+
+    __table_args__ = (
+        UniqueConstraint("url", "scope", name="uq_page_fetches_url_scope"),
+    )
+
+
+class ScrapeJob(Base):
+    """One unit of scraper work, claimed by workers with FOR UPDATE SKIP LOCKED"""
+
+    __tablename__ = "scrape_jobs"
+
+    id = Column(Integer, primary_key=True)
+    stage = Column(String(30), nullable=False)  # see scraper/worker.py STAGES
+    # Identifies the work unit within its stage, so enqueueing is idempotent
+    job_key = Column(String(200), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(100))
+    locked_at = Column(TIMESTAMP)
+    heartbeat_at = Column(TIMESTAMP)
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    finished_at = Column(TIMESTAMP)
+
+    __table_args__ = (
+        UniqueConstraint("stage", "job_key", name="uq_scrape_jobs_stage_key"),
+        CheckConstraint(
+            "status IN ('pending', 'running', 'done', 'failed')",
+            name="ck_scrape_jobs_status",
+        ),
+        Index("ix_scrape_jobs_claim", "stage", "status", "run_after"),
+    )
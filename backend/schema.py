@@ -0,0 +1,232 @@
+"""
+Schema setup for databases built from models.py.
+create_all() only creates missing tables, so column additions and other DDL
+it cannot express are kept here as idempotent statements.
+
+Run from backend: uv run python -m schema
+"""
+
+from sqlalchemy import text
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import Base, get_engine
+
+# Full-text search document for a room: name (A), theme, sub-themes and venue
+# name (B), short description (C), descriptions (D). Shared by both triggers
+# and the backfill so rows always get the same vector.
+ROOM_SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION room_search_vector(
+    room_name text, theme text, sub_themes text[], short_description text,
+    description text, room_venue_id integer
+) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('english', coalesce(room_name, '')), 'A')
+        || setweight(to_tsvector('english', concat_ws(' ',
+               theme, array_to_string(sub_themes, ' '), v.name)), 'B')
+        || setweight(to_tsvector('english', coalesce(short_description, '')), 'C')
+        || setweight(to_tsvector('english', concat_ws(' ',
+               description, v.ai_description)), 'D')
+    FROM (SELECT 1) AS one
+    LEFT JOIN venues v ON v.id = room_venue_id
+$$ LANGUAGE sql STABLE
+"""
+
+ROOMS_SEARCH_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION rooms_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := room_search_vector(
+        NEW.name, NEW.theme, NEW.sub_themes, NEW.short_description,
+        NEW.description, NEW.venue_id
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Venue text is part of every room document, so renaming a venue or
+# regenerating its description refreshes that venue's rooms
+VENUES_SEARCH_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION venues_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE rooms r
+    SET search_vector = room_search_vector(
+        r.name, r.theme, r.sub_themes, r.short_description,
+        r.description, r.venue_id
+    )
+    WHERE r.venue_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# room_views is range-partitioned by month (models.RoomView). A database
+# created before that has a plain room_views table: move it aside before
+# create_all() so the partitioned table can take the name, then copy the rows
+# across (ROOM_VIEWS_COPY) once the partitions exist.
+ROOM_VIEWS_SET_ASIDE = """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE oid = to_regclass('room_views') AND relkind = 'r'
+    ) THEN
+        ALTER TABLE room_views RENAME TO room_views_unpartitioned;
+        ALTER TABLE room_views_unpartitioned
+            RENAME CONSTRAINT room_views_pkey TO room_views_unpartitioned_pkey;
+        ALTER INDEX IF EXISTS ix_room_views_viewed_at
+            RENAME TO ix_room_views_unpartitioned_viewed_at;
+        ALTER INDEX IF EXISTS ix_room_views_session_id
+            RENAME TO ix_room_views_unpartitioned_session_id;
+        ALTER SEQUENCE IF EXISTS room_views_id_seq
+            RENAME TO room_views_unpartitioned_id_seq;
+    END IF;
+END
+$$
+"""
+
+# One partition per calendar month, named room_views_yYYYYmMM, for every month
+# from from_month to to_month; existing ones are left alone. Returns how many
+# were created. Also called by scraper/room_view_partitions.py.
+# Views for a month without a partition land in room_views_default; a new
+# month's partition is built beside the table, takes that month's rows out of
+# the default, and is then attached (attaching fails while the default still
+# holds rows of its range).
+ROOM_VIEWS_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_room_views_partitions(
+    from_month date, to_month date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', from_month)::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month <= to_month LOOP
+        partition_name := 'room_views_' || to_char(month, '"y"YYYY"m"MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE room_views INCLUDING DEFAULTS)',
+                partition_name
+            );
+            IF to_regclass('room_views_default') IS NOT NULL THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM room_views_default'
+                    ' WHERE viewed_at >= %L AND viewed_at < %L RETURNING *)'
+                    ' INSERT INTO %I SELECT * FROM moved',
+                    month, (month + interval '1 month')::date, partition_name
+                );
+            END IF;
+            EXECUTE format(
+                'ALTER TABLE room_views ATTACH PARTITION %I'
+                ' FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month, (month + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql
+"""
+
+ROOM_VIEWS_COPY = """
+DO $$
+DECLARE
+    first_month date;
+BEGIN
+    IF to_regclass('room_views_unpartitioned') IS NOT NULL THEN
+        SELECT date_trunc('month', coalesce(min(viewed_at), now()))::date
+        INTO first_month
+        FROM room_views_unpartitioned;
+
+        PERFORM create_room_views_partitions(
+            first_month, (current_date + interval '3 months')::date
+        );
+
+        -- viewed_at is now part of the key; the rare NULL goes to the oldest month
+        INSERT INTO room_views (
+            id, room_id, viewed_at, session_id, ip_hash, user_agent, referrer,
+            viewer_city, viewer_country
+        )
+        SELECT id, room_id, coalesce(viewed_at, first_month), session_id,
+               ip_hash, user_agent, referrer, viewer_city, viewer_country
+        FROM room_views_unpartitioned;
+
+        PERFORM setval(
+            pg_get_serial_sequence('room_views', 'id'),
+            coalesce((SELECT max(id) FROM room_views), 0) + 1,
+            false
+        );
+        DROP TABLE room_views_unpartitioned;
+    END IF;
+END
+$$
+"""
+
+# Run before create_all()
+PRE_CREATE_STATEMENTS = [ROOM_VIEWS_SET_ASIDE]
+
+SCHEMA_STATEMENTS = [
+    # Path that produced each scraped room (jsonld, dom_text or vision)
+    "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS extraction_source VARCHAR(20)",
+    # Locally ingested photo files (scraper/photo_ingest.py)
+    "ALTER TABLE room_photos ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE room_photos ADD COLUMN IF NOT EXISTS variants JSONB",
+    "CREATE INDEX IF NOT EXISTS ix_room_photos_content_hash"
+    " ON room_photos (content_hash)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_room_photos_room_hash"
+    " ON room_photos (room_id, content_hash)",
+    # Perceptual hash for near-duplicate detection (scraper/image_dedup.py)
+    "ALTER TABLE room_photos ADD COLUMN IF NOT EXISTS phash BIGINT",
+    "CREATE INDEX IF NOT EXISTS ix_room_photos_phash ON room_photos (phash)",
+    # City slug of venues.city, which cities are keyed by
+    # (scraper/city_aggregates.py, api/read_queries.ROOMS_IN_CITY)
+    "CREATE INDEX IF NOT EXISTS ix_venues_city_slug ON venues"
+    " ((trim(both '-' from lower(regexp_replace(city, '[^A-Za-z0-9]+', '-', 'g')))))",
+    # Normalised price for cross-currency filtering (scraper/currency.py)
+    "CREATE INDEX IF NOT EXISTS ix_rooms_price_usd ON rooms (price_usd)",
+    # Full-text search over rooms and their venues (api/search_api.py)
+    "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    ROOM_SEARCH_VECTOR_FUNCTION,
+    ROOMS_SEARCH_TRIGGER_FUNCTION,
+    VENUES_SEARCH_TRIGGER_FUNCTION,
+    "DROP TRIGGER IF EXISTS rooms_search_vector ON rooms",
+    "CREATE TRIGGER rooms_search_vector BEFORE INSERT OR UPDATE OF"
+    " name, theme, sub_themes, short_description, description, venue_id"
+    " ON rooms FOR EACH ROW EXECUTE FUNCTION rooms_search_vector_trigger()",
+    "DROP TRIGGER IF EXISTS venues_search_vector ON venues",
+    "CREATE TRIGGER venues_search_vector AFTER UPDATE OF name, ai_description"
+    " ON venues FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name"
+    " OR OLD.ai_description IS DISTINCT FROM NEW.ai_description)"
+    " EXECUTE FUNCTION venues_search_vector_trigger()",
+    "UPDATE rooms SET search_vector = room_search_vector(name, theme, sub_themes,"
+    " short_description, description, venue_id) WHERE search_vector IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_rooms_search_vector"
+    " ON rooms USING gin (search_vector)",
+    # Monthly room_views partitions (scraper/room_view_partitions.py keeps
+    # them created ahead and applies retention)
+    ROOM_VIEWS_PARTITION_FUNCTION,
+    ROOM_VIEWS_COPY,
+    "SELECT create_room_views_partitions(current_date,"
+    " (current_date + interval '3 months')::date)",
+    # Catches views for months the partitions job has not reached yet
+    "CREATE TABLE IF NOT EXISTS room_views_default PARTITION OF room_views DEFAULT",
+]
+
+
+def apply_schema():
+    # One transaction, so a failed migration leaves the old schema in place
+    with get_engine().begin() as conn:
+        for statement in PRE_CREATE_STATEMENTS:
+            conn.execute(text(statement))
+
+        Base.metadata.create_all(conn)
+
+        for statement in SCHEMA_STATEMENTS:
+            conn.execute(text(statement))
+
+
+if __name__ == "__main__":
+    apply_schema()
+    statements = len(PRE_CREATE_STATEMENTS) + len(SCHEMA_STATEMENTS)
+    print(f"Schema up to date ({statements} statements applied)")
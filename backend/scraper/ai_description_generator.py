@@ -1,17 +1,54 @@
-import anthropic
+"""
+Generate venue descriptions with Claude.
+The default mode makes one request per venue. --batch submits every pending
+venue as a Message Batch, polls until it ends, and bulk-writes the results.
+In-flight batch IDs are stored on disk so a crashed run resumes the same batch
+instead of resubmitting it. --concurrent streams pending venues through a
+bounded pool of async requests and commits results in groups, for incremental
+runs where batch latency is too high.
+
+Run from backend:
+  uv run python -m scraper.ai_description_generator [--batch | --concurrent]
+"""
+
+import argparse
+import asyncio
+import json
 import os
+import random
 import time
+
+import anthropic
 from dotenv import load_dotenv
+from sqlalchemy import select, update
+
 from database import SessionLocal
 from models import Venue
+from scraper.response_cache import CACHE_ROOT
 
 load_dotenv()
 
 client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 300
+
+# Message Batches accept at most 100,000 requests each
+MAX_BATCH_REQUESTS = 100_000
+BATCH_POLL_SECONDS = float(os.getenv("DESCRIPTION_BATCH_POLL_SECONDS", "60"))
+BATCH_STATE_FILE = CACHE_ROOT / "description_batches.json"
+
+DESCRIPTION_CONCURRENCY = int(os.getenv("DESCRIPTION_CONCURRENCY", "8"))
+DESCRIPTION_COMMIT_EVERY = int(os.getenv("DESCRIPTION_COMMIT_EVERY", "50"))
+# Rows fetched per round trip while streaming pending venues
+VENUE_STREAM_CHUNK = 500
+MAX_RETRIES = 6
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
 
-def generate_venue_description(venue: Venue) -> str:
-    prompt = f"""Write a compelling 2-3 sentence description for this escape room venue:
+
+def build_description_prompt(venue) -> str:
+    return f"""Write a compelling 2-3 sentence description for this escape room venue:
 
 Venue: {venue.name}
 Location: {venue.city}, {venue.state}
@@ -19,11 +56,13 @@ Rating: {venue.google_rating}/5 ({venue.google_review_count} reviews)
 
 Make it exciting and mention the city. Focus on the experience, not just facts."""
 
+
+def generate_venue_description(venue: Venue) -> str:
     try:
         response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=300,
-            messages=[{"role": "user", "content": prompt}],
+            model=MODEL,
+            max_tokens=MAX_TOKENS,
+            messages=[{"role": "user", "content": build_description_prompt(venue)}],
         )
         return response.content[0].text.strip()
     except Exception as e:
@@ -33,6 +72,21 @@ Make it exciting and mention the city. Focus on the experience, not just facts."
         )
 
 
+def write_descriptions(db, descriptions: dict):
+    """Bulk-write {venue_id: description} with one executemany UPDATE"""
+    if not descriptions:
+        return
+
+    db.execute(
+        update(Venue),
+        [
+            {"id": venue_id, "ai_description": text, "ai_generated": True}
+            for venue_id, text in descriptions.items()
+        ],
+    )
+    db.commit()
+
+
 def generate_all_descriptions():
     db = SessionLocal()
 
@@ -63,5 +117,311 @@ def generate_all_descriptions():
     print("=" * 60)
 
 
+# ========================================================================
+# BATCH MODE
+# ========================================================================
+
+
+def load_batch_state() -> list:
+    """Batch IDs submitted by a previous run that were not yet written back"""
+    try:
+        with open(BATCH_STATE_FILE, encoding="utf-8") as f:
+            return json.load(f).get("batch_ids", [])
+    except FileNotFoundError:
+        return []
+
+
+def save_batch_state(batch_ids: list):
+    if not batch_ids:
+        BATCH_STATE_FILE.unlink(missing_ok=True)
+        return
+
+    BATCH_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(BATCH_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"batch_ids": batch_ids}, f)
+
+
+def submit_description_batches(db) -> list:
+    venues = db.query(Venue).filter(Venue.ai_description.is_(None)).all()
+    print(f"Submitting {len(venues)} venues as message batches...")
+
+    batch_ids = []
+    for start in range(0, len(venues), MAX_BATCH_REQUESTS):
+        chunk = venues[start : start + MAX_BATCH_REQUESTS]
+        batch = client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": f"venue-{venue.id}",
+                    "params": {
+                        "model": MODEL,
+                        "max_tokens": MAX_TOKENS,
+                        "messages": [
+                            {"role": "user", "content": build_description_prompt(venue)}
+                        ],
+                    },
+                }
+                for venue in chunk
+            ]
+        )
+        batch_ids.append(batch.id)
+        # Persist immediately so a crash while polling resumes this batch
+        save_batch_state(batch_ids)
+        print(f"  Submitted {batch.id} ({len(chunk)} requests)")
+
+    return batch_ids
+
+
+def wait_for_batch(batch_id: str, poll_seconds: float):
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(
+            f"  {batch_id}: {batch.processing_status} "
+            f"(processing {counts.processing}, succeeded {counts.succeeded}, "
+            f"errored {counts.errored})"
+        )
+
+        if batch.processing_status == "ended":
+            return batch
+        time.sleep(poll_seconds)
+
+
+def collect_batch_results(batch_id: str) -> tuple[dict, int]:
+    """Descriptions by venue id, plus the number of failed requests"""
+    descriptions = {}
+    failed = 0
+
+    for entry in client.messages.batches.results(batch_id):
+        if entry.result.type == "succeeded":
+            venue_id = int(entry.custom_id.removeprefix("venue-"))
+            descriptions[venue_id] = entry.result.message.content[0].text.strip()
+        else:
+            failed += 1
+
+    return descriptions, failed
+
+
+def generate_descriptions_batch(poll_seconds: float = BATCH_POLL_SECONDS):
+    db = SessionLocal()
+
+    batch_ids = load_batch_state()
+    if batch_ids:
+        print(f"Resuming {len(batch_ids)} batch(es) from {BATCH_STATE_FILE}")
+    else:
+        batch_ids = submit_description_batches(db)
+
+    if not batch_ids:
+        print("No venues need descriptions")
+        db.close()
+        return
+
+    print("=" * 60)
+
+    written = 0
+    failed = 0
+    remaining = list(batch_ids)
+
+    for batch_id in batch_ids:
+        wait_for_batch(batch_id, poll_seconds)
+
+        descriptions, batch_failed = collect_batch_results(batch_id)
+        write_descriptions(db, descriptions)
+        written += len(descriptions)
+        failed += batch_failed
+
+        remaining.remove(batch_id)
+        save_batch_state(remaining)
+        print(f"  Wrote {len(descriptions)} descriptions, {batch_failed} failed")
+
+    db.close()
+
+    print("\n" + "=" * 60)
+    print(f"COMPLETE! Generated descriptions for {written} venues")
+    if failed:
+        print(f"  {failed} requests failed and will be retried on the next run")
+    print("=" * 60)
+
+
+# ========================================================================
+# CONCURRENT MODE
+# ========================================================================
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, overload, server errors and dropped connections"""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    return isinstance(error, anthropic.APIStatusError) and (
+        error.status_code == 429 or error.status_code >= 500
+    )
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Server-provided retry-after, else exponential backoff with jitter"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(retry_after), RETRY_MAX_SECONDS)
+    except (TypeError, ValueError):
+        backoff = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**attempt)
+        return backoff * random.uniform(0.5, 1.0)
+
+
+async def describe_with_retry(async_client, venue) -> str | None:
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await async_client.messages.create(
+                model=MODEL,
+                max_tokens=MAX_TOKENS,
+                messages=[{"role": "user", "content": build_description_prompt(venue)}],
+            )
+            return response.content[0].text.strip()
+
+        except Exception as e:
+            if not is_retryable(e) or attempt == MAX_RETRIES:
+                print(f"  [{venue.name}] Error: {e}")
+                return None
+            await asyncio.sleep(retry_delay(e, attempt))
+
+
+async def describe_concurrently(
+    venues,
+    write_batch,
+    concurrency: int = DESCRIPTION_CONCURRENCY,
+    commit_every: int = DESCRIPTION_COMMIT_EVERY,
+    async_client=None,
+) -> tuple[int, int]:
+    """Describe venues with at most `concurrency` requests in flight.
+
+    `venues` is consumed on a worker thread, so it can be a streaming DB
+    result, and a bounded queue keeps memory flat. `write_batch` receives
+    {venue_id: description} every `commit_every` results, serialized.
+    Returns (written, failed).
+    """
+    if async_client is None:
+        # Retries are handled here so backoff is shared across the pool
+        async_client = anthropic.AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0
+        )
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    pending = {}
+    write_lock = asyncio.Lock()
+    written = 0
+    failed = 0
+
+    def produce():
+        try:
+            for venue in venues:
+                asyncio.run_coroutine_threadsafe(queue.put(venue), loop).result()
+        finally:
+            for _ in range(concurrency):
+                asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+    async def flush():
+        nonlocal written
+        async with write_lock:
+            if not pending:
+                return
+            rows = dict(pending)
+            pending.clear()
+            await asyncio.to_thread(write_batch, rows)
+            written += len(rows)
+            print(f"  Committed {len(rows)} descriptions ({written} total)")
+
+    async def worker():
+        nonlocal failed
+        while (venue := await queue.get()) is not None:
+            description = await describe_with_retry(async_client, venue)
+            if description is None:
+                failed += 1
+                continue
+
+            pending[venue.id] = description
+            if len(pending) >= commit_every:
+                await flush()
+
+    await asyncio.gather(
+        asyncio.to_thread(produce), *(worker() for _ in range(concurrency))
+    )
+    await flush()
+
+    return written, failed
+
+
+def stream_pending_venues(db):
+    """Venues without a description, fetched VENUE_STREAM_CHUNK rows at a time"""
+    stmt = (
+        select(
+            Venue.id,
+            Venue.name,
+            Venue.city,
+            Venue.state,
+            Venue.google_rating,
+            Venue.google_review_count,
+        )
+        .where(Venue.ai_description.is_(None))
+        .order_by(Venue.id)
+        .execution_options(yield_per=VENUE_STREAM_CHUNK)
+    )
+    return db.execute(stmt)
+
+
+def generate_descriptions_concurrent(
+    concurrency: int = DESCRIPTION_CONCURRENCY,
+    commit_every: int = DESCRIPTION_COMMIT_EVERY,
+):
+    # Separate sessions: commits must not close the streaming read cursor
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+
+    print(
+        f"Generating descriptions with {concurrency} concurrent requests, "
+        f"committing every {commit_every}..."
+    )
+    print("=" * 60)
+
+    try:
+        written, failed = asyncio.run(
+            describe_concurrently(
+                stream_pending_venues(read_db),
+                lambda rows: write_descriptions(write_db, rows),
+                concurrency,
+                commit_every,
+            )
+        )
+    finally:
+        read_db.close()
+        write_db.close()
+
+    print("\n" + "=" * 60)
+    print(f"COMPLETE! Generated descriptions for {written} venues")
+    if failed:
+        print(f"  {failed} venues failed and will be retried on the next run")
+    print("=" * 60)
+
+
 if __name__ == "__main__":
-    generate_all_descriptions()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all pending venues as one Message Batch",
+    )
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="Stream pending venues through concurrent async requests",
+    )
+    parser.add_argument("--poll-interval", type=float, default=BATCH_POLL_SECONDS)
+    parser.add_argument("--concurrency", type=int, default=DESCRIPTION_CONCURRENCY)
+    parser.add_argument("--commit-every", type=int, default=DESCRIPTION_COMMIT_EVERY)
+    args = parser.parse_args()
+
+    if args.batch:
+        generate_descriptions_batch(args.poll_interval)
+    elif args.concurrent:
+        generate_descriptions_concurrent(args.concurrency, args.commit_every)
+    else:
+        generate_all_descriptions()
@@ -0,0 +1,158 @@
+"""
+Maintain the precomputed per-city aggregates on the cities table.
+venue_count (active venues), room_count (published rooms at active venues)
+and avg_price (mean "from" price per person in USD, from rooms.price_usd)
+are recomputed with one set-based statement, only for cities whose venues or
+rooms changed since the city row was last refreshed. A city is every
+venues.city spelling sharing its slug, so changes are found, and aggregates
+computed, by slug. Scrapers call refresh_city_aggregates() after committing,
+so the /api/cities endpoints read a single row instead of aggregating rooms
+on every request. Missing City rows are created on the way.
+
+Run from backend: uv run python -m scraper.city_aggregates [--all]
+"""
+
+import argparse
+
+from sqlalchemy import bindparam, text
+
+from database import SessionLocal
+from scraper.currency import convert_room_prices
+
+# venues.city is free text: spellings that only differ in case or punctuation
+# share one city row through the slug
+_SLUG_SQL = (
+    "trim(both '-' from lower(regexp_replace(v.city, '[^A-Za-z0-9]+', '-', 'g')))"
+)
+
+CHANGED_SLUGS_SQL = text(
+    f"""
+    SELECT DISTINCT {_SLUG_SQL}
+    FROM venues v
+    LEFT JOIN cities c ON c.slug = {_SLUG_SQL}
+    WHERE c.id IS NULL
+       OR v.updated_at > c.updated_at
+       OR EXISTS (
+           SELECT 1 FROM rooms r
+           WHERE r.venue_id = v.id AND r.updated_at > c.updated_at
+       )
+    """
+)
+
+CITY_SLUGS_SQL = text(
+    f"SELECT DISTINCT {_SLUG_SQL} FROM venues v WHERE v.city IN :cities"
+).bindparams(bindparam("cities", expanding=True))
+
+UPSERT_AGGREGATES_SQL = text(
+    f"""
+    INSERT INTO cities (
+        name, state, country, slug, latitude, longitude,
+        venue_count, room_count, avg_price, created_at, updated_at
+    )
+    SELECT
+        min(v.city),
+        min(v.state),
+        min(v.country),
+        {_SLUG_SQL},
+        avg(v.latitude),
+        avg(v.longitude),
+        count(DISTINCT v.id) FILTER (WHERE v.is_active),
+        count(r.id) FILTER (WHERE v.is_active),
+        round(avg(r.price_usd) FILTER (WHERE v.is_active), 2),
+        timezone('utc', now()),
+        timezone('utc', now())
+    FROM venues v
+    LEFT JOIN rooms r ON r.venue_id = v.id AND r.is_published
+    WHERE {_SLUG_SQL} IN :slugs
+    GROUP BY {_SLUG_SQL}
+    ON CONFLICT (slug) DO UPDATE SET
+        venue_count = excluded.venue_count,
+        room_count = excluded.room_count,
+        avg_price = excluded.avg_price,
+        latitude = coalesce(cities.latitude, excluded.latitude),
+        longitude = coalesce(cities.longitude, excluded.longitude),
+        updated_at = excluded.updated_at
+    RETURNING name
+    """
+).bindparams(bindparam("slugs", expanding=True))
+
+# Cities whose last venue was removed get no row from the GROUP BY above
+EMPTY_CITIES_SQL = text(
+    f"""
+    UPDATE cities c
+    SET venue_count = 0, room_count = 0, avg_price = NULL,
+        updated_at = timezone('utc', now())
+    WHERE NOT EXISTS (SELECT 1 FROM venues v WHERE {_SLUG_SQL} = c.slug)
+      AND (c.venue_count <> 0 OR c.room_count <> 0)
+    """
+)
+
+
+def refresh_city_aggregates(db, cities: list | None = None) -> int:
+    """Recompute aggregates for `cities` (default: every changed city) and commit.
+
+    `cities` are venues.city values; each is refreshed across every spelling
+    that shares its slug. Returns the number of city rows written.
+    """
+    if cities is None:
+        slugs = db.execute(CHANGED_SLUGS_SQL).scalars().all()
+    else:
+        cities = sorted({city for city in cities if city})
+        slugs = (
+            db.execute(CITY_SLUGS_SQL, {"cities": cities}).scalars().all()
+            if cities
+            else []
+        )
+
+    slugs = sorted(filter(None, slugs))
+    refreshed = 0
+    if slugs:
+        refreshed = len(db.execute(UPSERT_AGGREGATES_SQL, {"slugs": slugs}).all())
+    db.execute(EMPTY_CITIES_SQL)
+    db.commit()
+    return refreshed
+
+
+def refresh_all_city_aggregates(db) -> int:
+    """Recompute every city, changed or not, and commit"""
+    all_cities = db.execute(text("SELECT DISTINCT city FROM venues")).scalars()
+    return refresh_city_aggregates(db, list(all_cities))
+
+
+def refresh_after_scrape(cities: list | None = None):
+    """Normalise the prices of rooms written since their last conversion,
+    then refresh city aggregates.
+
+    Standalone-session wrapper for scrapers, which never fails their run.
+    Rate loads reconvert every room themselves (scraper/currency.py).
+    """
+    db = SessionLocal()
+    try:
+        converted = convert_room_prices(db, pending_only=True)
+        print(f"  Normalised prices on {converted} rooms")
+        refreshed = refresh_city_aggregates(db, cities)
+        print(f"  City aggregates refreshed for {refreshed} cities")
+    except Exception as e:
+        db.rollback()
+        print(f"  Could not refresh city aggregates: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--all", action="store_true", help="Recompute every city, changed or not"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.all:
+            refreshed = refresh_all_city_aggregates(db)
+        else:
+            refreshed = refresh_city_aggregates(db)
+    finally:
+        db.close()
+
+    print(f"Refreshed aggregates for {refreshed} cities")
@@ -0,0 +1,119 @@
+"""
+Conditional fetching for incremental re-scrapes.
+Each (url, scope) pair remembers the ETag, Last-Modified and content hash of
+the last page its consumer processed. Re-fetches send If-None-Match and
+If-Modified-Since; a 304, or a 200 whose hash is unchanged, means the
+consumer can skip parsing, screenshots and model calls for that page.
+Validators are only recorded after the consumer has finished with a page, so
+a crash mid-run never marks a page as processed.
+"""
+
+import hashlib
+import re
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from models import PageFetch
+
+# Inline scripts and styles often carry nonces or build ids that change on
+# every request without the visible page changing
+_VOLATILE_RE = re.compile(rb"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_WHITESPACE_RE = re.compile(rb"\s+")
+
+
+class Validators(NamedTuple):
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None
+
+
+class FetchResult(NamedTuple):
+    url: str
+    scope: str
+    status_code: int
+    changed: bool
+    content: bytes | None
+    validators: Validators
+
+
+def content_hash(body: bytes) -> str:
+    stable = _WHITESPACE_RE.sub(b" ", _VOLATILE_RE.sub(b"", body)).strip()
+    return hashlib.sha256(stable).hexdigest()
+
+
+def load_validators(db, urls: list, scope: str) -> dict:
+    """Stored validators by URL for one scope"""
+    if not urls:
+        return {}
+
+    rows = (
+        db.query(
+            PageFetch.url,
+            PageFetch.etag,
+            PageFetch.last_modified,
+            PageFetch.content_hash,
+        )
+        .filter(PageFetch.scope == scope, PageFetch.url.in_(urls))
+        .all()
+    )
+    return {row.url: Validators(*row[1:]) for row in rows}
+
+
+def conditional_headers(previous: Validators | None) -> dict:
+    if previous is None:
+        return {}
+
+    headers = {}
+    if previous.etag:
+        headers["If-None-Match"] = previous.etag
+    if previous.last_modified:
+        headers["If-Modified-Since"] = previous.last_modified
+    return headers
+
+
+def evaluate_response(
+    url: str,
+    scope: str,
+    previous: Validators | None,
+    status_code: int,
+    headers,
+    body: bytes | None,
+) -> FetchResult:
+    """Decide whether a (possibly conditional) response is a changed page"""
+    if status_code == 304 and previous is not None:
+        return FetchResult(url, scope, status_code, False, None, previous)
+
+    digest = content_hash(body or b"")
+    validators = Validators(headers.get("etag"), headers.get("last-modified"), digest)
+    changed = previous is None or previous.content_hash != digest
+    return FetchResult(url, scope, status_code, changed, body, validators)
+
+
+def record_fetch(db, result: FetchResult):
+    """Store a processed fetch's validators (caller commits)"""
+    now = datetime.utcnow()
+    stmt = insert(PageFetch).values(
+        url=result.url,
+        scope=result.scope,
+        etag=result.validators.etag,
+        last_modified=result.validators.last_modified,
+        content_hash=result.validators.content_hash,
+        status_code=result.status_code,
+        fetched_at=now,
+        changed_at=now if result.changed else None,
+    )
+    values = {
+        "etag": stmt.excluded.etag,
+        "last_modified": stmt.excluded.last_modified,
+        "content_hash": stmt.excluded.content_hash,
+        "status_code": stmt.excluded.status_code,
+        "fetched_at": stmt.excluded.fetched_at,
+    }
+    if result.changed:
+        values["changed_at"] = stmt.excluded.changed_at
+
+    db.execute(
+        stmt.on_conflict_do_update(constraint="uq_page_fetches_url_scope", set_=values)
+    )
@@ -0,0 +1,138 @@
+"""
+Normalise room prices to USD so filters and sorts work across currencies.
+Rates live in the exchange_rates table, loaded from a local rates file
+(data/exchange_rates.json, units per 1 USD). convert_room_prices() fills
+rooms.price_usd with one set-based UPDATE joined to the rates, writing only
+rows whose converted price actually changed. After a rate update it runs over
+every room (and city averages are refreshed); after each scrape
+(scraper/city_aggregates.refresh_after_scrape) only rooms written since their
+last conversion are converted.
+
+Run from backend: uv run python -m scraper.currency [--rates path/to/rates.json]
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from database import SessionLocal
+from models import ExchangeRate
+
+RATES_FILE = Path(
+    os.getenv(
+        "EXCHANGE_RATES_FILE",
+        Path(__file__).resolve().parent.parent / "data" / "exchange_rates.json",
+    )
+)
+
+CONVERT_PRICES_SQL = text(
+    """
+    UPDATE rooms r
+    SET price_usd = converted.price_usd,
+        price_converted_at = timezone('utc', now())
+    FROM (
+        SELECT r2.id,
+               round(r2.min_price_per_person / x.units_per_usd, 2) AS price_usd
+        FROM rooms r2
+        LEFT JOIN exchange_rates x ON x.currency = upper(r2.currency)
+        WHERE NOT :pending_only
+           OR r2.price_converted_at IS NULL
+           OR r2.updated_at > r2.price_converted_at
+    ) AS converted
+    WHERE r.id = converted.id
+      AND (:pending_only OR r.price_usd IS DISTINCT FROM converted.price_usd)
+    """
+)
+
+
+def load_rates(db, path: Path = RATES_FILE) -> int:
+    """Upsert every rate in a rates file (caller commits).
+
+    File format: {"base": "USD", "source": ..., "as_of": "YYYY-MM-DD",
+    "rates": {"GBP": 0.79, ...}} with rates as units per 1 base unit.
+    """
+    data = json.loads(Path(path).read_text())
+    if data.get("base", "USD").upper() != "USD":
+        raise ValueError(f"Rates in {path} must be based on USD")
+
+    as_of = datetime.fromisoformat(data["as_of"]) if data.get("as_of") else None
+    rows = [
+        {
+            "currency": currency.upper(),
+            "units_per_usd": rate,
+            "source": data.get("source"),
+            "as_of": as_of,
+            "updated_at": datetime.utcnow(),
+        }
+        for currency, rate in data["rates"].items()
+    ]
+    if not rows:
+        return 0
+
+    stmt = insert(ExchangeRate).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ExchangeRate.currency],
+        set_={
+            "units_per_usd": stmt.excluded.units_per_usd,
+            "source": stmt.excluded.source,
+            "as_of": stmt.excluded.as_of,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def convert_room_prices(db, pending_only: bool = False) -> int:
+    """Recompute price_usd and commit: for all rooms, or with `pending_only`
+    just those written since their last conversion (all of which are stamped,
+    so they are not picked up again).
+
+    Rooms without a price or without a known rate get NULL, so they drop out
+    of price filters instead of being compared in the wrong currency.
+    Returns the number of rooms written.
+    """
+    updated = db.execute(CONVERT_PRICES_SQL, {"pending_only": pending_only}).rowcount
+    db.commit()
+    return updated
+
+
+def usd_amount(db, amount: float, currency: str) -> float | None:
+    """Convert an amount in `currency` to USD, or None for an unknown currency"""
+    rate = db.get(ExchangeRate, currency.upper())
+    if rate is None:
+        return None
+    return amount / float(rate.units_per_usd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rates", type=Path, default=RATES_FILE)
+    parser.add_argument(
+        "--skip-load", action="store_true", help="Only reconvert room prices"
+    )
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("CURRENCY NORMALISATION")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        if not args.skip_load:
+            loaded = load_rates(db, args.rates)
+            print(f"Loaded {loaded} rates from {args.rates}")
+        updated = convert_room_prices(db)
+        print(f"Updated price_usd on {updated} rooms")
+        # City averages are in USD, so they move with the rates
+        from scraper.city_aggregates import refresh_all_city_aggregates
+
+        refreshed = refresh_all_city_aggregates(db)
+        print(f"Refreshed aggregates for {refreshed} cities")
+    finally:
+        db.close()
@@ -0,0 +1,298 @@
+"""
+Extract escape room data from rendered HTML before falling back to vision.
+Sources in order of trust: schema.org JSON-LD, then heading-delimited text
+blocks scanned with price, player, duration and difficulty patterns.
+"""
+
+import json
+import re
+from typing import NamedTuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+# A yield below this average confidence is handed to the vision model
+MIN_CONFIDENCE = 0.5
+# Spec fields (price, players, duration, difficulty) a text block needs
+MIN_BLOCK_FIELDS = 2
+MAX_BLOCK_CHARS = 1500
+
+JSONLD_ROOM_TYPES = {"Product", "Event", "TouristAttraction", "Game", "Service"}
+CURRENCY_SYMBOLS = {"£": "GBP", "€": "EUR", "$": "USD"}
+
+PRICE_RE = re.compile(r"([£€$])\s?(\d{1,3}(?:\.\d{2})?)")
+PLAYERS_RE = re.compile(
+    r"(\d{1,2})\s*(?:-|–|—|to)\s*(\d{1,2})\s*(?:players|people|persons|guests|ppl)",
+    re.IGNORECASE,
+)
+DURATION_RE = re.compile(r"(\d{2,3})\s*(?:min|mins|minutes)\b", re.IGNORECASE)
+DIFFICULTY_RE = re.compile(
+    r"difficulty\D{0,15}?(\d{1,2})(?:\s*(?:/|out of)\s*(5|10))?", re.IGNORECASE
+)
+ISO_DURATION_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?")
+
+ROOM_LINK_RE = re.compile(r"room|game|escape|experience|mission|adventure", re.I)
+SKIP_LINK_RE = re.compile(r"book|voucher|gift|basket|cart|login|account", re.I)
+SKIP_HEADING_RE = re.compile(
+    r"book|price|pricing|faq|contact|gift|voucher|about|opening|review|newsletter",
+    re.IGNORECASE,
+)
+
+
+class DomExtraction(NamedTuple):
+    rooms: list
+    room_links: list
+    confidence: float
+
+    @property
+    def confident(self) -> bool:
+        return bool(self.rooms) and self.confidence >= MIN_CONFIDENCE
+
+
+# ========================================================================
+# JSON-LD
+# ========================================================================
+
+
+def _jsonld_items(data):
+    """Flatten @graph containers and lists of JSON-LD nodes"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _jsonld_items(item)
+    elif isinstance(data, dict):
+        if "@graph" in data:
+            yield from _jsonld_items(data["@graph"])
+        yield data
+
+
+def _types(item: dict) -> set:
+    value = item.get("@type", [])
+    return set(value if isinstance(value, list) else [value])
+
+
+def _to_number(value):
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def _offer_prices(offers) -> tuple:
+    """(price_min, price_max, currency) from an Offer/AggregateOffer or list"""
+    if isinstance(offers, dict):
+        offers = [offers]
+    if not isinstance(offers, list):
+        return None, None, None
+
+    prices = []
+    currency = None
+    for offer in offers:
+        if not isinstance(offer, dict):
+            continue
+        for field in ("price", "lowPrice", "highPrice"):
+            number = _to_number(offer.get(field))
+            if number is not None:
+                prices.append(number)
+        currency = currency or offer.get("priceCurrency")
+
+    if not prices:
+        return None, None, currency
+    return min(prices), max(prices), currency
+
+
+def _iso_minutes(value) -> int | None:
+    match = ISO_DURATION_RE.fullmatch(str(value or ""))
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes = (int(g) if g else 0 for g in match.groups())
+    return hours * 60 + minutes
+
+
+def extract_jsonld_rooms(soup: BeautifulSoup) -> list:
+    rooms = []
+
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except json.JSONDecodeError:
+            continue
+
+        for item in _jsonld_items(data):
+            if not (_types(item) & JSONLD_ROOM_TYPES) or not item.get("name"):
+                continue
+
+            price_min, price_max, currency = _offer_prices(item.get("offers"))
+            duration = _iso_minutes(item.get("duration") or item.get("timeRequired"))
+            found = sum(x is not None for x in (price_min, duration))
+            # A typed node with only a name (gift vouchers, merchandise) is not
+            # evidence of a room on its own: keep it below MIN_CONFIDENCE
+            confidence = 0.5 + 0.25 * found if found else 0.25
+
+            rooms.append(
+                {
+                    "name": str(item["name"]).strip(),
+                    "theme": None,
+                    "difficulty": None,
+                    "price_min": price_min,
+                    "price_max": price_max,
+                    "currency": currency,
+                    "min_players": None,
+                    "max_players": None,
+                    "duration_minutes": duration,
+                    "description": (item.get("description") or "").strip()[:500]
+                    or None,
+                    "extraction_source": "jsonld",
+                    "confidence": confidence,
+                }
+            )
+
+    return rooms
+
+
+# ========================================================================
+# VISIBLE TEXT
+# ========================================================================
+
+
+def _block_text(heading) -> str:
+    """Text from a heading up to the next heading"""
+    parts = []
+    length = 0
+    for element in heading.next_elements:
+        if getattr(element, "name", None) in ("h1", "h2", "h3", "h4"):
+            break
+        if isinstance(element, str):
+            text = element.strip()
+            if text:
+                parts.append(text)
+                length += len(text)
+                if length > MAX_BLOCK_CHARS:
+                    break
+    return " ".join(parts)
+
+
+def parse_room_specs(text: str) -> dict:
+    """Price, player, duration and difficulty values found in a text block"""
+    specs = {}
+
+    prices = PRICE_RE.findall(text)
+    if prices:
+        values = [float(amount) for _, amount in prices]
+        specs["price_min"] = min(values)
+        specs["price_max"] = max(values)
+        specs["currency"] = CURRENCY_SYMBOLS[prices[0][0]]
+
+    players = PLAYERS_RE.search(text)
+    if players:
+        low, high = sorted(int(n) for n in players.groups())
+        if 1 <= low <= high <= 20:
+            specs["min_players"] = low
+            specs["max_players"] = high
+
+    duration = DURATION_RE.search(text)
+    if duration and 15 <= int(duration.group(1)) <= 180:
+        specs["duration_minutes"] = int(duration.group(1))
+
+    difficulty = DIFFICULTY_RE.search(text)
+    if difficulty:
+        value = int(difficulty.group(1))
+        if difficulty.group(2) == "10":
+            value = round(value / 2)
+        if 1 <= value <= 5:
+            specs["difficulty"] = value
+
+    return specs
+
+
+def extract_text_rooms(soup: BeautifulSoup) -> list:
+    rooms = []
+
+    for heading in soup.find_all(["h2", "h3", "h4"]):
+        name = heading.get_text(" ", strip=True)
+        if not 2 <= len(name) <= 80 or SKIP_HEADING_RE.search(name):
+            continue
+
+        text = _block_text(heading)
+        specs = parse_room_specs(text)
+        found = sum(
+            field in specs
+            for field in ("price_min", "min_players", "duration_minutes", "difficulty")
+        )
+        if found < MIN_BLOCK_FIELDS:
+            continue
+
+        description = text[len(name) :].strip()[:500] or None
+        rooms.append(
+            {
+                "name": name,
+                "theme": None,
+                "difficulty": specs.get("difficulty"),
+                "price_min": specs.get("price_min"),
+                "price_max": specs.get("price_max"),
+                "currency": specs.get("currency"),
+                "min_players": specs.get("min_players"),
+                "max_players": specs.get("max_players"),
+                "duration_minutes": specs.get("duration_minutes"),
+                "description": description,
+                "extraction_source": "dom_text",
+                "confidence": found / 4,
+            }
+        )
+
+    return rooms
+
+
+def extract_room_links(soup: BeautifulSoup, page_url: str) -> list:
+    """Same-site links that look like individual room pages"""
+    host = urlsplit(page_url).hostname
+    page = urldefrag(page_url).url.rstrip("/")
+    links = []
+
+    for anchor in soup.find_all("a", href=True):
+        url = urldefrag(urljoin(page_url, anchor["href"])).url
+        label = f"{anchor['href']} {anchor.get_text(' ', strip=True)}"
+
+        if (
+            urlsplit(url).hostname != host
+            or url.rstrip("/") == page
+            or not ROOM_LINK_RE.search(label)
+            or SKIP_LINK_RE.search(label)
+            or url in links
+        ):
+            continue
+        links.append(url)
+
+    return links
+
+
+def extract_rooms_from_dom(html: str, page_url: str) -> DomExtraction:
+    """Rooms found in the page's structured data or visible text"""
+    soup = BeautifulSoup(html, "html.parser")
+    room_links = extract_room_links(soup, page_url)
+
+    rooms = _best_per_name(extract_jsonld_rooms(soup))
+    if _mean_confidence(rooms) < MIN_CONFIDENCE:
+        # Weak or no structured data: add the visible text blocks, keeping only
+        # the JSON-LD rooms that carried a spec field
+        for tag in soup(["script", "style", "noscript", "nav", "footer"]):
+            tag.decompose()
+        rooms = _best_per_name(
+            [r for r in rooms if r["confidence"] >= MIN_CONFIDENCE]
+            + extract_text_rooms(soup)
+        )
+
+    return DomExtraction(rooms, room_links, _mean_confidence(rooms))
+
+
+def _best_per_name(rooms: list) -> list:
+    """Deduplicate by name, keeping the most complete entry"""
+    best = {}
+    for room in rooms:
+        key = room["name"].lower()
+        if key not in best or room["confidence"] > best[key]["confidence"]:
+            best[key] = room
+    return list(best.values())
+
+
+def _mean_confidence(rooms: list) -> float:
+    return sum(r["confidence"] for r in rooms) / len(rooms) if rooms else 0.0
@@ -0,0 +1,237 @@
+"""
+Local stand-in for the Anthropic Messages and Message Batches APIs.
+Lets the description generator run and be tested offline: batches end
+--complete-after seconds after they are created, and every request gets a
+canned reply built from its prompt. Single messages wait --latency seconds,
+and every --rate-limit-every'th one is rejected with a 429.
+
+Run from backend: uv run python -m scraper.fake_anthropic_server --port 8765
+Then point the SDK at it:
+  ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=test \
+  uv run python -m scraper.ai_description_generator --batch
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, UTC).isoformat().replace("+00:00", "Z")
+
+
+def fake_message(params: dict) -> dict:
+    """A Messages API response echoing the first line of the prompt"""
+    prompt = params["messages"][-1]["content"]
+    if isinstance(prompt, list):
+        prompt = " ".join(b.get("text", "") for b in prompt if isinstance(b, dict))
+    first_line = next((line for line in prompt.splitlines() if line.strip()), "")
+
+    text = f"Fake reply to: {first_line.strip()}"
+    return {
+        "id": f"msg_fake_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "fake-model"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+    }
+
+
+class FakeAnthropicServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        complete_after: float = 2.0,
+        latency: float = 0.0,
+        rate_limit_every: int = 0,
+    ):
+        super().__init__(address, FakeAnthropicHandler)
+        self.complete_after = complete_after
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.batches = {}
+        self.message_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def batch_object(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        ended = time.time() >= batch["created_at"] + self.complete_after
+        count = len(batch["requests"])
+
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": _timestamp(batch["created_at"]),
+            "ended_at": _timestamp(batch["created_at"] + self.complete_after)
+            if ended
+            else None,
+            "expires_at": _timestamp(
+                batch["created_at"] + timedelta(days=1).total_seconds()
+            ),
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{self.base_url}/v1/messages/batches/{batch_id}/results"
+            if ended
+            else None,
+        }
+
+    def serve_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    server: FakeAnthropicServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status: int, body: bytes, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _not_found(self):
+        self._send_json(
+            404,
+            {
+                "type": "error",
+                "error": {"type": "not_found_error", "message": self.path},
+            },
+        )
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+
+        if path == "/v1/messages":
+            body = self._read_json()
+            with self.server.lock:
+                self.server.message_count += 1
+                count = self.server.message_count
+
+            every = self.server.rate_limit_every
+            if every and count % every == 0:
+                self.send_response(429)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("retry-after", "0.1")
+                payload = json.dumps(
+                    {
+                        "type": "error",
+                        "error": {"type": "rate_limit_error", "message": "slow down"},
+                    }
+                ).encode("utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            time.sleep(self.server.latency)
+            self._send_json(200, fake_message(body))
+
+        elif path == "/v1/messages/batches":
+            body = self._read_json()
+            batch_id = f"msgbatch_fake_{uuid.uuid4().hex[:24]}"
+            with self.server.lock:
+                self.server.batches[batch_id] = {
+                    "created_at": time.time(),
+                    "requests": body.get("requests", []),
+                }
+                payload = self.server.batch_object(batch_id)
+            self._send_json(200, payload)
+        else:
+            self._not_found()
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+
+        if parts[:3] != ["v1", "messages", "batches"] or len(parts) < 4:
+            return self._not_found()
+
+        batch_id = parts[3]
+        with self.server.lock:
+            if batch_id not in self.server.batches:
+                return self._not_found()
+            batch = self.server.batch_object(batch_id)
+            requests = list(self.server.batches[batch_id]["requests"])
+
+        if len(parts) == 4:
+            self._send_json(200, batch)
+        elif parts[4:] == ["results"] and batch["processing_status"] == "ended":
+            lines = [
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "result": {
+                            "type": "succeeded",
+                            "message": fake_message(request["params"]),
+                        },
+                    }
+                )
+                for request in requests
+            ]
+            self._send(200, "\n".join(lines).encode("utf-8"), "application/binary")
+        else:
+            self._not_found()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--complete-after",
+        type=float,
+        default=2.0,
+        help="Seconds before a submitted batch ends",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per single message"
+    )
+    parser.add_argument(
+        "--rate-limit-every",
+        type=int,
+        default=0,
+        help="Reject every Nth single message with a 429 (0 to disable)",
+    )
+    args = parser.parse_args()
+
+    server = FakeAnthropicServer(
+        (args.host, args.port),
+        args.complete_after,
+        args.latency,
+        args.rate_limit_every,
+    )
+    print(f"Fake Anthropic API listening on {server.base_url}")
+    server.serve_forever()
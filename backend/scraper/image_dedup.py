@@ -0,0 +1,206 @@
+"""
+Perceptual hashing and near-duplicate lookup for room photos.
+Venue sites reuse the same hero/banner image for every room, often re-encoded
+or resized, so identical content hashes miss most duplicates. A 64-bit
+difference hash (dHash) survives resizing and recompression; two images whose
+hashes differ in at most PHASH_MAX_DISTANCE bits are treated as the same.
+
+PHashIndex finds those neighbours without comparing against every stored
+hash. Each hash is split into PHASH_MAX_DISTANCE + 1 bit blocks; by the
+pigeonhole principle a hash within that distance matches at least one block
+exactly, so a lookup only scores the candidates sharing a block.
+
+Run from backend to hash existing photos and collapse duplicates per room:
+    uv run python -m scraper.image_dedup
+"""
+
+import os
+from collections import defaultdict
+from datetime import datetime
+from itertools import pairwise
+
+from PIL import Image
+from sqlalchemy import delete, update
+
+from database import SessionLocal
+from media import MEDIA_ROOT
+from models import Room, RoomPhoto
+
+PHASH_BITS = 64
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+
+
+def dhash(image: Image.Image) -> int:
+    """64-bit difference hash: does each pixel of a 9x8 greyscale thumbnail
+    get brighter or darker towards its right-hand neighbour"""
+    small = image.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = small.tobytes()
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def to_signed64(value: int) -> int:
+    """Store an unsigned 64-bit hash in a signed BIGINT column"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class PHashIndex:
+    """Multi-index hash table answering "stored hashes within max_distance"."""
+
+    def __init__(self, max_distance: int = PHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        # Block boundaries covering all 64 bits as evenly as possible
+        edges = [PHASH_BITS * i // blocks for i in range(blocks + 1)]
+        self._blocks = [
+            (start, (1 << (end - start)) - 1) for start, end in pairwise(edges)
+        ]
+        self._tables = [defaultdict(list) for _ in self._blocks]
+        self._items = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def _keys(self, value: int):
+        return [(value >> start) & mask for start, mask in self._blocks]
+
+    def add(self, value: int, item):
+        position = len(self._items)
+        self._items.append((value, item))
+        for table, key in zip(self._tables, self._keys(value), strict=True):
+            table[key].append(position)
+
+    def query(self, value: int) -> list:
+        """(distance, item) for every stored hash within max_distance, nearest first"""
+        candidates = set()
+        for table, key in zip(self._tables, self._keys(value), strict=True):
+            candidates.update(table.get(key, ()))
+
+        matches = []
+        for position in candidates:
+            stored, item = self._items[position]
+            distance = hamming(value, stored)
+            if distance <= self.max_distance:
+                matches.append((distance, position, item))
+        return [(distance, item) for distance, _, item in sorted(matches)]
+
+    def nearest(self, value: int):
+        """The closest stored item within max_distance, or None"""
+        matches = self.query(value)
+        return matches[0][1] if matches else None
+
+
+def collapse_near_duplicates(images: list, key=lambda image: image["phash"]):
+    """Keep the first of each group of near-identical images, in order.
+
+    Returns (kept, dropped) where dropped pairs each removed image with the
+    kept image it duplicates.
+    """
+    index = PHashIndex()
+    kept = []
+    dropped = []
+    for image in images:
+        value = key(image)
+        if value is None:
+            kept.append(image)
+            continue
+
+        original = index.nearest(value)
+        if original is not None:
+            dropped.append((image, original))
+            continue
+
+        index.add(value, image)
+        kept.append(image)
+    return kept, dropped
+
+
+def hash_stored_photo(variants: dict) -> int | None:
+    """dHash of an already ingested photo, from its smallest stored variant"""
+    widths = (variants or {}).get("widths")
+    if not widths:
+        return None
+    with Image.open(MEDIA_ROOT / widths[0]["path"]) as image:
+        return dhash(image)
+
+
+def dedupe_existing_photos():
+    """Backfill phash on ingested photos and collapse near-duplicates per room"""
+    db = SessionLocal()
+
+    photos = (
+        db.query(RoomPhoto)
+        .filter(RoomPhoto.variants.isnot(None))
+        .order_by(
+            RoomPhoto.room_id, RoomPhoto.is_primary.desc(), RoomPhoto.display_order
+        )
+        .all()
+    )
+    print(f"Checking {len(photos)} ingested photos for near-duplicates")
+    print("=" * 70)
+
+    hashed = 0
+    for photo in photos:
+        if photo.phash is None:
+            try:
+                value = hash_stored_photo(photo.variants)
+            except OSError as e:
+                print(f"  Photo {photo.id}: cannot read variant ({e})")
+                continue
+            if value is not None:
+                photo.phash = to_signed64(value)
+                hashed += 1
+    print(f"Hashed {hashed} photos")
+
+    by_room = defaultdict(list)
+    for photo in photos:
+        by_room[photo.room_id].append(photo)
+
+    duplicate_ids = []
+    changed_rooms = set()
+    for room_id, room_photos in by_room.items():
+        _, dropped = collapse_near_duplicates(
+            room_photos,
+            key=lambda p: None if p.phash is None else from_signed64(p.phash),
+        )
+        duplicate_ids.extend(photo.id for photo, _ in dropped)
+        if dropped:
+            changed_rooms.add(room_id)
+
+    db.flush()
+    if duplicate_ids:
+        db.execute(
+            delete(RoomPhoto)
+            .where(RoomPhoto.id.in_(duplicate_ids))
+            .execution_options(synchronize_session=False)
+        )
+        # Lets snapshot exports see the rooms' photo lists changed
+        db.execute(
+            update(Room)
+            .where(Room.id.in_(changed_rooms))
+            .values(updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"COMPLETE! Removed {len(duplicate_ids)} near-duplicate photos")
+
+
+if __name__ == "__main__":
+    dedupe_existing_photos()
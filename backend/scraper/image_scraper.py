@@ -1,15 +1,23 @@
 """
 Scrape image URLs from venue websites and attach them to rooms.
+Rooms are grouped by venue so each site is fetched and parsed once. Pages are
+fetched concurrently through one pooled async client, with per-host politeness
+limits, and each venue's rooms are updated in a single batch.
 Run from project root: uv run python -m backend.scraper.image_scraper
 Or from backend: cd backend && uv run python -m scraper.image_scraper
 """
+import argparse
+import asyncio
+import importlib.util
+import os
 import sys
-import time
 from pathlib import Path
 from urllib.parse import urljoin
 
+import httpx
 import requests
 from bs4 import BeautifulSoup
+from sqlalchemy import update
 
 # Ensure backend is on path so imports work from project root or backend
 _backend_dir = Path(__file__).resolve().parent.parent
@@ -18,85 +26,227 @@ if str(_backend_dir) not in sys.path:
 
 from database import SessionLocal
 from models import Room, Venue
+from scraper.conditional_fetch import (
+    conditional_headers,
+    evaluate_response,
+    load_validators,
+    record_fetch,
+)
+from scraper.politeness import HostLimiter
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+}
+# Page validators are stored per consumer; this scraper's share
+FETCH_SCOPE = "images"
+# Venues in flight across all hosts; each host is additionally held to
+# SCRAPER_HOST_CONCURRENCY requests, SCRAPER_HOST_DELAY seconds apart
+IMAGE_SCRAPER_CONCURRENCY = int(os.getenv("IMAGE_SCRAPER_CONCURRENCY", "16"))
+FETCH_TIMEOUT_SECONDS = 10
+# lxml is several times faster than the stdlib parser when it is installed
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
 
 
 def scrape_venue_images(venue_url: str) -> list:
     """Scrape image URLs from venue website."""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        }
-        response = requests.get(venue_url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, "html.parser")
+        response = requests.get(venue_url, headers=HEADERS, timeout=10)
+        return extract_image_urls(response.content, venue_url)
+    except Exception as e:
+        print(f"  Error: {e}")
+        return []
+
+
+def extract_image_urls(content: bytes, venue_url: str) -> list:
+    """Likely room images from a venue page's HTML."""
+    soup = BeautifulSoup(content, HTML_PARSER)
+
+    images = []
+
+    for img in soup.find_all("img"):
+        src = img.get("src") or img.get("data-src")
+        if not src:
+            continue
+
+        src = urljoin(venue_url, src)
+        if not src.startswith("http"):
+            continue
 
-        images = []
+        if any(
+            kw in src.lower()
+            for kw in ["room", "escape", "game", "experience", "photo", "image", "img"]
+        ):
+            images.append(src)
 
+    if not images:
         for img in soup.find_all("img"):
             src = img.get("src") or img.get("data-src")
-            if not src:
-                continue
+            if src and src.startswith("http") and "logo" not in src.lower() and "icon" not in src.lower():
+                images.append(src)
 
-            src = urljoin(venue_url, src)
-            if not src.startswith("http"):
-                continue
+    return images[:5]
 
-            if any(
-                kw in src.lower()
-                for kw in ["room", "escape", "game", "experience", "photo", "image", "img"]
-            ):
-                images.append(src)
 
-        if not images:
-            for img in soup.find_all("img"):
-                src = img.get("src") or img.get("data-src")
-                if src and src.startswith("http") and "logo" not in src.lower() and "icon" not in src.lower():
-                    images.append(src)
+def load_venue_rooms(db, city: str, refresh: bool) -> dict:
+    """{venue id: (name, website, room ids to update)}; keyed by id, since
+    venues can share a name and site (a chain's branches on one platform)"""
+    query = (
+        db.query(Room.id, Room.venue_id, Venue.name, Venue.website)
+        .join(Venue, Room.venue_id == Venue.id)
+        .filter(Venue.city == city, Venue.website.isnot(None))
+        .order_by(Venue.id, Room.id)
+    )
+    if not refresh:
+        query = query.filter(Room.image_urls.is_(None))
+
+    grouped = {}
+    for room_id, venue_id, venue_name, website in query:
+        grouped.setdefault(venue_id, (venue_name, website, []))[2].append(room_id)
+    return grouped
+
+
+def write_room_images(db, room_ids: list, images: list):
+    """Give all of a venue's rooms the same images with one executemany UPDATE"""
+    db.execute(
+        update(Room),
+        [
+            {"id": room_id, "image_urls": images, "primary_image_url": images[0]}
+            for room_id in room_ids
+        ],
+    )
+
 
-        return images[:5]
+async def fetch_venue_page(client, limiter, semaphore, venue, previous):
+    """(venue, FetchResult or the exception that prevented one); `venue` is
+    (id, name, website)"""
+    _, _, url = venue
+    try:
+        # Wait for the host first: venues queued on one slow host must not
+        # hold global slots that other hosts could use
+        async with limiter.slot(url), semaphore:
+            response = await client.get(url, headers=conditional_headers(previous))
     except Exception as e:
-        print(f"  Error: {e}")
-        return []
+        return venue, e
+
+    return venue, evaluate_response(
+        url,
+        FETCH_SCOPE,
+        previous,
+        response.status_code,
+        response.headers,
+        response.content,
+    )
 
 
-def add_images_to_rooms():
+async def scrape_images(
+    city: str = "London",
+    refresh: bool = False,
+    concurrency: int = IMAGE_SCRAPER_CONCURRENCY,
+):
+    """Fetch each venue's site once and attach its images to the venue's rooms.
+
+    By default only rooms without images are considered and every site is
+    fetched. With `refresh`, every room is considered, but pages unchanged
+    since the last run (304, or an identical content hash) are skipped
+    without parsing.
+    """
     db = SessionLocal()
 
-    rooms = (
-        db.query(Room)
-        .join(Venue)
-        .filter(Venue.city == "London", Room.image_urls.is_(None))
-        .all()
+    venues = load_venue_rooms(db, city, refresh)
+    previous = (
+        load_validators(db, [url for _, url, _ in venues.values()], FETCH_SCOPE)
+        if refresh
+        else {}
     )
+    room_count = sum(len(room_ids) for _, _, room_ids in venues.values())
 
-    print(f"Adding images to {len(rooms)} rooms...")
+    print(f"Adding images to {room_count} rooms across {len(venues)} venues...")
+    print(f"Concurrency: {concurrency}, parser: {HTML_PARSER}")
     print("=" * 60)
 
-    for i, room in enumerate(rooms, 1):
-        venue = room.venue
+    limiter = HostLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
 
-        if not venue or not venue.website:
-            print(f"[{i}/{len(rooms)}] {room.name} - No website, skipping")
-            continue
+    updated_rooms = skipped = failed = 0
+
+    async with httpx.AsyncClient(
+        headers=HEADERS,
+        limits=limits,
+        timeout=FETCH_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    ) as client:
+        fetches = [
+            fetch_venue_page(
+                client, limiter, semaphore, (venue_id, name, url), previous.get(url)
+            )
+            for venue_id, (name, url, _) in venues.items()
+        ]
+
+        for i, fetch in enumerate(asyncio.as_completed(fetches), 1):
+            venue, result = await fetch
+            venue_id, venue_name, url = venue
+            room_ids = venues[venue_id][2]
+            print(f"[{i}/{len(venues)}] {venue_name} ({len(room_ids)} rooms)")
+
+            if isinstance(result, Exception):
+                print(f"  Error: {result}")
+                failed += 1
+                continue
 
-        print(f"[{i}/{len(rooms)}] {room.name}")
-        print(f"  Scraping: {venue.website}")
+            if not result.changed:
+                print("  Unchanged, skipping")
+                skipped += 1
+                continue
 
-        images = scrape_venue_images(venue.website)
+            images = extract_image_urls(result.content, url)
+            if images:
+                write_room_images(db, room_ids, images)
+                updated_rooms += len(room_ids)
+                print(f"  Added {len(images)} images to {len(room_ids)} rooms")
+            else:
+                print("  No images found")
 
-        if images:
-            room.image_urls = images
-            room.primary_image_url = images[0]
+            record_fetch(db, result)
             db.commit()
-            print(f"  Added {len(images)} images")
-        else:
-            print(f"  No images found")
-
-        time.sleep(2)
 
     db.close()
     print("\n" + "=" * 60)
-    print("COMPLETE!")
+    print(
+        f"COMPLETE! Updated {updated_rooms} rooms, "
+        f"skipped {skipped} unchanged venues, {failed} failed"
+    )
+
+
+def add_images_to_rooms():
+    asyncio.run(scrape_images())
+
+
+def refresh_venue_images():
+    """Re-scrape images for venues whose page changed since the last run."""
+    asyncio.run(scrape_images(refresh=True))
 
 
 if __name__ == "__main__":
-    add_images_to_rooms()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city", default="London")
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-scrape venues whose page changed since the last run",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=IMAGE_SCRAPER_CONCURRENCY,
+        help="Venue pages fetched at once across all hosts",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        scrape_images(
+            city=args.city, refresh=args.refresh, concurrency=args.concurrency
+        )
+    )
@@ -0,0 +1,217 @@
+"""
+Durable job queue for the scrapers, stored in the scrape_jobs table.
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+worker processes, on any number of machines, can drain the same queue without
+handing a job to two of them. A claimed job is kept alive by heartbeats; jobs
+whose worker stopped heartbeating are reclaimed. Failures are retried with
+exponential backoff until max_attempts, then parked as failed.
+
+All times come from the database clock (UTC) so workers on different
+machines agree on them.
+"""
+
+import random
+from datetime import timedelta
+
+from sqlalchemy import TIMESTAMP, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from models import ScrapeJob
+
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30.0
+RETRY_MAX_SECONDS = 3600.0
+LAST_ERROR_MAX_CHARS = 2000
+
+db_now = func.timezone("utc", func.now(), type_=TIMESTAMP)
+
+
+def enqueue(
+    db,
+    stage: str,
+    jobs: list,
+    requeue: bool = False,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> int:
+    """Add (job_key, payload) pairs to a stage's queue (caller commits).
+
+    A key that is already queued is left alone. With `requeue`, finished and
+    failed jobs with that key are reset to pending so they run again.
+    Returns the number of jobs inserted or reset.
+    """
+    if not jobs:
+        return 0
+
+    rows = {
+        key: {
+            "stage": stage,
+            "job_key": key,
+            "payload": payload,
+            "status": "pending",
+            "max_attempts": max_attempts,
+        }
+        for key, payload in jobs
+    }
+    stmt = insert(ScrapeJob).values(list(rows.values()))
+
+    if requeue:
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_scrape_jobs_stage_key",
+            set_={
+                "payload": stmt.excluded.payload,
+                "status": "pending",
+                "attempts": 0,
+                "run_after": db_now,
+                "last_error": None,
+                "finished_at": None,
+            },
+            where=ScrapeJob.status.in_(("done", "failed")),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_scrape_jobs_stage_key")
+
+    return len(db.execute(stmt.returning(ScrapeJob.id)).all())
+
+
+def claim(db, stage: str, worker_id: str, limit: int = 1) -> list:
+    """Lock up to `limit` runnable jobs of a stage for this worker and commit.
+
+    Rows locked by another worker's in-progress claim are skipped rather than
+    waited on, so concurrent claims never block each other.
+    """
+    candidates = (
+        select(ScrapeJob.id)
+        .where(
+            ScrapeJob.stage == stage,
+            ScrapeJob.status == "pending",
+            ScrapeJob.run_after <= db_now,
+        )
+        .order_by(ScrapeJob.run_after, ScrapeJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id.in_(candidates))
+        .values(
+            status="running",
+            attempts=ScrapeJob.attempts + 1,
+            locked_by=worker_id,
+            locked_at=db_now,
+            heartbeat_at=db_now,
+        )
+        .returning(
+            ScrapeJob.id,
+            ScrapeJob.stage,
+            ScrapeJob.job_key,
+            ScrapeJob.payload,
+            ScrapeJob.attempts,
+            ScrapeJob.max_attempts,
+        )
+    ).all()
+    db.commit()
+    return claimed
+
+
+def heartbeat(db, job_ids: list, worker_id: str):
+    """Mark this worker's running jobs as alive and commit"""
+    if not job_ids:
+        return
+
+    db.execute(
+        update(ScrapeJob)
+        .where(
+            ScrapeJob.id.in_(job_ids),
+            ScrapeJob.locked_by == worker_id,
+            ScrapeJob.status == "running",
+        )
+        .values(heartbeat_at=db_now)
+    )
+    db.commit()
+
+
+def complete(db, job_id: int, worker_id: str):
+    """Mark a job done (caller commits, together with any follow-up jobs)"""
+    db.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id == job_id, ScrapeJob.locked_by == worker_id)
+        .values(status="done", finished_at=db_now, last_error=None, locked_by=None)
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: ~30s, 1m, 2m, ... capped at an hour"""
+    backoff = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return backoff * random.uniform(0.5, 1.0)
+
+
+def fail(db, job, worker_id: str, error: Exception):
+    """Schedule a retry, or park the job as failed once out of attempts, and commit"""
+    message = f"{type(error).__name__}: {error}"[:LAST_ERROR_MAX_CHARS]
+    exhausted = job.attempts >= job.max_attempts
+
+    values = {"last_error": message, "locked_by": None}
+    if exhausted:
+        values.update(status="failed", finished_at=db_now)
+    else:
+        values.update(
+            status="pending",
+            run_after=db_now + timedelta(seconds=retry_delay(job.attempts)),
+        )
+
+    db.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id == job.id, ScrapeJob.locked_by == worker_id)
+        .values(**values)
+    )
+    db.commit()
+    return exhausted
+
+
+def reclaim_stale(db, stale_after_seconds: float) -> int:
+    """Return running jobs whose worker stopped heartbeating to the queue.
+
+    The interrupted run already counted as an attempt, so a job that keeps
+    killing its worker ends up failed instead of looping forever.
+    """
+    stale = (
+        ScrapeJob.status == "running",
+        ScrapeJob.heartbeat_at < db_now - timedelta(seconds=stale_after_seconds),
+    )
+
+    reclaimed = db.execute(
+        update(ScrapeJob)
+        .where(*stale, ScrapeJob.attempts < ScrapeJob.max_attempts)
+        .values(
+            status="pending",
+            run_after=db_now,
+            locked_by=None,
+            last_error="Worker stopped heartbeating",
+        )
+    ).rowcount
+    db.execute(
+        update(ScrapeJob)
+        .where(*stale, ScrapeJob.attempts >= ScrapeJob.max_attempts)
+        .values(
+            status="failed",
+            finished_at=db_now,
+            locked_by=None,
+            last_error="Worker stopped heartbeating",
+        )
+    )
+    db.commit()
+    return reclaimed
+
+
+def queue_stats(db) -> dict:
+    """{stage: {status: count}}"""
+    rows = db.execute(
+        select(ScrapeJob.stage, ScrapeJob.status, func.count())
+        .group_by(ScrapeJob.stage, ScrapeJob.status)
+        .order_by(ScrapeJob.stage)
+    )
+
+    stats = {}
+    for stage, status, count in rows:
+        stats.setdefault(stage, {})[status] = count
+    return stats
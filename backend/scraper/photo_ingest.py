@@ -0,0 +1,356 @@
+"""
+Download room images once and turn them into locally served RoomPhoto rows.
+Each image URL in Room.image_urls is fetched, probed for its dimensions and
+size, and re-encoded as WebP at a few responsive widths plus a square
+thumbnail. Files are stored content-addressed under MEDIA_ROOT, so the same
+image used by several rooms (or found again on a re-scrape) is processed and
+stored once. Downloading and encoding run in a pool of worker processes.
+Near-duplicates (the same banner re-encoded or resized) are detected by
+perceptual hash: they are collapsed within a room, and within a venue every
+room reuses the first copy's files.
+
+Run from backend: uv run python -m scraper.photo_ingest [--city London]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+import requests
+from PIL import Image, ImageOps
+from sqlalchemy import exists, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from database import SessionLocal
+from media import MEDIA_ROOT
+from models import Room, RoomPhoto, Venue
+from scraper.image_dedup import (
+    PHashIndex,
+    dhash,
+    from_signed64,
+    hash_stored_photo,
+    to_signed64,
+)
+
+# Widths of the responsive variants; images narrower than a width are not
+# upscaled, their own width is used as the largest variant instead
+PHOTO_WIDTHS = (320, 640, 1280)
+THUMBNAIL_SIZE = 160
+WEBP_QUALITY = 80
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Rooms whose photos are downloaded, then written and committed, together
+PHOTO_BATCH_ROOMS = 50
+DOWNLOAD_TIMEOUT_SECONDS = 20
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+}
+PHOTO_SOURCE = "venue_website"
+
+# One pooled session per worker process
+_session = None
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.headers.update(HEADERS)
+    return _session
+
+
+def download_image(url: str) -> bytes:
+    with get_session().get(url, timeout=DOWNLOAD_TIMEOUT_SECONDS, stream=True) as r:
+        r.raise_for_status()
+        body = bytearray()
+        for chunk in r.iter_content(64 * 1024):
+            body.extend(chunk)
+            if len(body) > MAX_DOWNLOAD_BYTES:
+                raise ValueError(f"larger than {MAX_DOWNLOAD_BYTES} bytes")
+    return bytes(body)
+
+
+def write_atomic(path: Path, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def encode_webp(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def variant_widths(width: int) -> list:
+    widths = {w for w in PHOTO_WIDTHS if w < width}
+    widths.add(min(width, PHOTO_WIDTHS[-1]))
+    return sorted(widths)
+
+
+def render_variants(data: bytes, digest: str) -> dict:
+    """Probe an image and write its WebP variants; returns its manifest"""
+    directory = MEDIA_ROOT / digest[:2] / digest
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+        manifest = {
+            "content_hash": digest,
+            "width": width,
+            "height": height,
+            "file_size": len(data),
+            "format": original.format,
+            "widths": [],
+        }
+
+        for target in variant_widths(width):
+            size = (target, max(1, round(height * target / width)))
+            resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+            if "phash" not in manifest:
+                # Hashing the smallest variant is cheap and just as stable
+                manifest["phash"] = dhash(resized)
+            body = encode_webp(resized)
+            path = f"{digest[:2]}/{digest}/w{target}.webp"
+            write_atomic(MEDIA_ROOT / path, body)
+            manifest["widths"].append(
+                {"width": size[0], "height": size[1], "bytes": len(body), "path": path}
+            )
+
+        thumb = ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+        body = encode_webp(thumb)
+        path = f"{digest[:2]}/{digest}/thumb.webp"
+        write_atomic(MEDIA_ROOT / path, body)
+        manifest["thumbnail"] = {
+            "width": THUMBNAIL_SIZE,
+            "height": THUMBNAIL_SIZE,
+            "bytes": len(body),
+            "path": path,
+        }
+
+    # Written last: its presence means every variant is complete
+    write_atomic(directory / "manifest.json", json.dumps(manifest).encode())
+    return manifest
+
+
+def ingest_image(url: str) -> dict:
+    """Download one image and make sure its variants exist (runs in a worker).
+
+    Returns the image's manifest, or {"error": ...} so one bad URL never
+    takes down the pool.
+    """
+    try:
+        data = download_image(url)
+        digest = hashlib.sha256(data).hexdigest()
+
+        manifest_path = MEDIA_ROOT / digest[:2] / digest / "manifest.json"
+        if not manifest_path.exists():
+            return render_variants(data, digest)
+
+        manifest = json.loads(manifest_path.read_text())
+        if "phash" not in manifest:
+            manifest["phash"] = hash_stored_photo(manifest)
+            write_atomic(manifest_path, json.dumps(manifest).encode())
+        return manifest
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def photo_rows(room: Room, manifests: dict, venue_index: PHashIndex) -> list:
+    """RoomPhoto rows for one room, in image_urls order, one per distinct image.
+
+    `venue_index` holds the images already used by the room's venue; a
+    near-duplicate of one of them is stored as that image, so the venue's
+    rooms share its files and a room never lists the same picture twice.
+    """
+    rows = []
+    seen = set()
+    for url in room.image_urls or []:
+        manifest = manifests.get(url)
+        if not manifest or "error" in manifest:
+            continue
+
+        canonical = venue_index.nearest(manifest["phash"])
+        if canonical is None:
+            venue_index.add(manifest["phash"], manifest)
+            canonical = manifest
+        manifest = canonical
+
+        if manifest["content_hash"] in seen:
+            continue
+        seen.add(manifest["content_hash"])
+
+        rows.append(
+            {
+                "room_id": room.id,
+                "url": url,
+                "source": PHOTO_SOURCE,
+                "is_primary": False,
+                "display_order": len(rows),
+                "width": manifest["width"],
+                "height": manifest["height"],
+                "file_size": manifest["file_size"],
+                "content_hash": manifest["content_hash"],
+                "phash": to_signed64(manifest["phash"]),
+                "variants": {
+                    "thumbnail": manifest["thumbnail"],
+                    "widths": manifest["widths"],
+                },
+            }
+        )
+
+    # The room's chosen primary image keeps that role, else the first photo
+    primary = next(
+        (row for row in rows if row["url"] == room.primary_image_url),
+        rows[0] if rows else None,
+    )
+    if primary:
+        primary["is_primary"] = True
+    return rows
+
+
+def insert_photos(db, rows: list):
+    """Insert photo rows, skipping images a room already has (caller commits).
+
+    The rooms' updated_at is bumped too: it is what static snapshot exports
+    compare to find rooms whose photos changed.
+    """
+    if not rows:
+        return
+    db.execute(
+        insert(RoomPhoto).on_conflict_do_nothing(
+            index_elements=["room_id", "content_hash"]
+        ),
+        rows,
+    )
+    db.execute(
+        update(Room)
+        .where(Room.id.in_({row["room_id"] for row in rows}))
+        .values(updated_at=datetime.utcnow())
+    )
+
+
+def load_venue_indexes(db, venue_ids: set) -> dict:
+    """Near-duplicate indexes of the photos already stored for each venue"""
+    indexes = {venue_id: PHashIndex() for venue_id in venue_ids}
+
+    rows = db.execute(
+        select(
+            Room.venue_id,
+            RoomPhoto.content_hash,
+            RoomPhoto.phash,
+            RoomPhoto.width,
+            RoomPhoto.height,
+            RoomPhoto.file_size,
+            RoomPhoto.variants,
+        )
+        .join(Room, RoomPhoto.room_id == Room.id)
+        .where(Room.venue_id.in_(venue_ids), RoomPhoto.phash.isnot(None))
+        .distinct(Room.venue_id, RoomPhoto.content_hash)
+    )
+    for row in rows:
+        phash = from_signed64(row.phash)
+        indexes[row.venue_id].add(
+            phash,
+            {
+                "content_hash": row.content_hash,
+                "phash": phash,
+                "width": row.width,
+                "height": row.height,
+                "file_size": row.file_size,
+                "thumbnail": row.variants["thumbnail"],
+                "widths": row.variants["widths"],
+            },
+        )
+    return indexes
+
+
+def load_pending_rooms(db, city: str | None) -> list:
+    """Rooms with scraped image URLs but no RoomPhoto rows yet"""
+    query = (
+        select(Room)
+        .where(
+            Room.image_urls.isnot(None),
+            ~exists().where(RoomPhoto.room_id == Room.id),
+        )
+        .order_by(Room.id)
+    )
+    if city:
+        query = query.join(Venue).where(Venue.city == city)
+    return db.scalars(query).all()
+
+
+def ingest_room_photos(city: str | None = None, workers: int = PHOTO_WORKERS):
+    db = SessionLocal()
+
+    rooms = load_pending_rooms(db, city)
+    print(f"Ingesting photos for {len(rooms)} rooms with {workers} workers")
+    print("=" * 70)
+
+    manifests = {}
+    venue_indexes = {}
+    photos = failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(rooms), PHOTO_BATCH_ROOMS):
+            batch = rooms[start : start + PHOTO_BATCH_ROOMS]
+
+            # Each URL is downloaded once per run, however many rooms use it
+            urls = list(
+                dict.fromkeys(
+                    url
+                    for room in batch
+                    for url in room.image_urls
+                    if url not in manifests
+                )
+            )
+            for url, manifest in zip(
+                urls, pool.map(ingest_image, urls, chunksize=4), strict=True
+            ):
+                manifests[url] = manifest
+                if "error" in manifest:
+                    failed += 1
+                    print(f"  Failed {url}: {manifest['error']}")
+
+            new_venues = {room.venue_id for room in batch} - venue_indexes.keys()
+            venue_indexes.update(load_venue_indexes(db, new_venues))
+
+            rows = [
+                row
+                for room in batch
+                for row in photo_rows(room, manifests, venue_indexes[room.venue_id])
+            ]
+            insert_photos(db, rows)
+            db.commit()
+            photos += len(rows)
+
+            print(
+                f"Rooms {start + 1}-{start + len(batch)}/{len(rooms)}: "
+                f"{len(rows)} photos ({len(urls)} images downloaded)"
+            )
+
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"COMPLETE! {photos} photos stored, {failed} images failed")
+    print(f"Media directory: {MEDIA_ROOT}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city", help="Only rooms at venues in this city")
+    parser.add_argument("--workers", type=int, default=PHOTO_WORKERS)
+    args = parser.parse_args()
+
+    ingest_room_photos(city=args.city, workers=args.workers)
@@ -0,0 +1,40 @@
+"""
+Per-host politeness limits shared by the async scrapers.
+Requests to the same host are capped in concurrency and spaced out in time,
+while different hosts proceed independently.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+HOST_CONCURRENCY = int(os.getenv("SCRAPER_HOST_CONCURRENCY", "1"))
+HOST_DELAY_SECONDS = float(os.getenv("SCRAPER_HOST_DELAY", "1.0"))
+
+
+class HostLimiter:
+    """At most `concurrency` requests per host, started `delay` seconds apart"""
+
+    def __init__(
+        self, concurrency: int = HOST_CONCURRENCY, delay: float = HOST_DELAY_SECONDS
+    ):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._semaphores = {}
+        self._next_start = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = (urlsplit(url).hostname or "").lower()
+        semaphore = self._semaphores.setdefault(
+            host, asyncio.Semaphore(self.concurrency)
+        )
+
+        async with semaphore:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
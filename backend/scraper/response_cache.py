@@ -0,0 +1,117 @@
+"""
+Content-addressed on-disk cache for raw JSON API responses.
+Entries are keyed by a SHA-256 of the request parts and stored as
+<cache_dir>/<key[:2]>/<key>.json so reruns can skip the network entirely.
+A hit refreshes the file's mtime, which evict() uses as the last-use time.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_ROOT = Path(
+    os.getenv("SCRAPER_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache")
+)
+
+
+class CacheMiss(LookupError):
+    """Raised in replay-only mode when a request is not in the cache"""
+
+
+class ResponseCache:
+    def __init__(self, directory, ttl_seconds: float | None = None):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Stable hash of any JSON-serialisable request parts"""
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str, ignore_ttl: bool = False):
+        """Cached response for key, or None if missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        expired = (
+            self.ttl_seconds is not None
+            and time.time() - entry["stored_at"] > self.ttl_seconds
+        )
+        if expired and not ignore_ttl:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["response"]
+
+    def put(self, key: str, response, request=None):
+        """Store a response atomically so readers never see partial files"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"stored_at": time.time(), "request": request, "response": response}
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def evict(
+        self, max_age_seconds: float | None = None, max_bytes: int | None = None
+    ) -> tuple[int, int]:
+        """Drop entries unused for max_age_seconds, then least recently used
+        entries until the cache fits in max_bytes.
+
+        Returns (entries removed, bytes remaining).
+        """
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for last_used, size, path in entries:
+            too_old = max_age_seconds is not None and now - last_used > max_age_seconds
+            too_big = max_bytes is not None and total > max_bytes
+            if not (too_old or too_big):
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        return removed, total
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
@@ -1,44 +1,71 @@
-from playwright.sync_api import sync_playwright
-import anthropic
+"""
+AI room scraper: renders venue websites with Playwright and extracts rooms
+from the DOM, using Claude vision only when the page yields too little.
+One Chromium is launched per run and each venue gets an
+isolated browser context from the pool, so venues are scraped concurrently.
+Rooms are committed as each venue finishes.
+Parsed vision results are cached on disk, keyed on the page's content, the
+prompt version and the model, so reruns over unchanged pages make no model
+calls.
+
+Run from backend: uv run python -m scraper.room_scraper [--workers 4]
+"""
+
+import argparse
+import asyncio
 import base64
+import hashlib
 import json
-import time
 import os
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from io import BytesIO
+
+import anthropic
 from dotenv import load_dotenv
+from PIL import Image
+from playwright.async_api import async_playwright
+from sqlalchemy import func, or_
+
 from database import SessionLocal
-from models import Venue, Room
-from sqlalchemy import func
+from models import Room, Venue
+from scraper.city_aggregates import refresh_after_scrape
+from scraper.conditional_fetch import (
+    FetchResult,
+    Validators,
+    conditional_headers,
+    evaluate_response,
+    load_validators,
+    record_fetch,
+)
+from scraper.dom_extractor import extract_rooms_from_dom
+from scraper.politeness import HostLimiter
+from scraper.response_cache import CACHE_ROOT, ResponseCache
 
 load_dotenv()
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-
-def screenshot_to_base64(screenshot_bytes):
-    return base64.b64encode(screenshot_bytes).decode("utf-8")
-
-
-def scrape_venue_with_vision(venue_url: str, venue_name: str):
-    """AI agent navigates and extracts room data"""
-
-    print(f"\n  Scraping {venue_name}")
-    print(f"  URL: {venue_url}")
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
-        try:
-            page.goto(venue_url, wait_until="networkidle", timeout=30000)
-        except Exception as e:
-            print(f"  Failed to load page: {e}")
-            browser.close()
-            return []
+MODEL = "claude-sonnet-4-20250514"
+ROOM_SCRAPER_WORKERS = int(os.getenv("ROOM_SCRAPER_WORKERS", "4"))
+MAX_SUBPAGES = 5
+# Page validators are stored per consumer; this scraper's share
+FETCH_SCOPE = "rooms"
+# --refresh only re-checks venues last scraped longer ago than this
+REFRESH_MIN_AGE_HOURS = float(os.getenv("ROOM_REFRESH_MIN_AGE_HOURS", "20"))
 
-        # Step 1: Analyze main page
-        main_screenshot = page.screenshot()
+# Bump whenever MAIN_PAGE_PROMPT or SUBPAGE_PROMPT changes meaning, so cached
+# results from the old prompts are no longer used
+PROMPT_VERSION = 1
+MODEL_CACHE_MAX_AGE_DAYS = float(os.getenv("MODEL_CACHE_MAX_AGE_DAYS", "60"))
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "200"))
+# Pages with at least this much visible text are fingerprinted by their text,
+# others (image-heavy pages) by a downscaled screenshot
+FINGERPRINT_MIN_TEXT = 200
+model_cache = ResponseCache(CACHE_ROOT / "model_responses")
 
-        prompt_1 = f"""Analyze this escape room venue website for {venue_name}.
+MAIN_PAGE_PROMPT = """Analyze this escape room venue website for {venue_name}.
 
 You MUST respond with ONLY valid JSON, nothing else. No explanations, no markdown, no text before or after.
 
@@ -60,62 +87,7 @@ RULES:
 What rooms and links do you see?
 """
 
-        response_1 = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=3000,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/png",
-                                "data": screenshot_to_base64(main_screenshot),
-                            },
-                        },
-                        {"type": "text", "text": prompt_1},
-                    ],
-                }
-            ],
-        )
-
-        # Parse response
-        try:
-            text = response_1.content[0].text.strip()
-            if text.startswith("```"):
-                text = text.split("```")[1]
-                if text.startswith("json"):
-                    text = text[4:]
-            result_1 = json.loads(text.strip())
-        except Exception as e:
-            print(f"  Failed to parse AI response: {e}")
-            browser.close()
-            return []
-
-        all_rooms = result_1.get("rooms_found", [])
-
-        # Step 2: Navigate to subpages if needed
-        if result_1.get("needs_navigation") and result_1.get("room_links"):
-            print(f"  Found {len(result_1['room_links'])} subpages to check")
-
-            for link in result_1["room_links"][:5]:
-                try:
-                    if link.startswith("/"):
-                        full_url = venue_url.rstrip("/") + link
-                    elif link.startswith("http"):
-                        full_url = link
-                    else:
-                        continue
-
-                    print(f"    Visiting: {full_url}")
-                    page.goto(full_url, wait_until="networkidle", timeout=15000)
-                    time.sleep(2)
-
-                    subpage_screenshot = page.screenshot()
-
-                    prompt_2 = """Extract escape room data from this page.
+SUBPAGE_PROMPT = """Extract escape room data from this page.
 
 Return ONLY JSON array (no markdown):
 [{
@@ -133,135 +105,560 @@ Return ONLY JSON array (no markdown):
 Only extract explicitly stated info. Do not estimate or guess.
 """
 
-                    response_2 = client.messages.create(
-                        model="claude-sonnet-4-20250514",
-                        max_tokens=2000,
-                        messages=[
-                            {
-                                "role": "user",
-                                "content": [
-                                    {
-                                        "type": "image",
-                                        "source": {
-                                            "type": "base64",
-                                            "media_type": "image/png",
-                                            "data": screenshot_to_base64(
-                                                subpage_screenshot
-                                            ),
-                                        },
-                                    },
-                                    {"type": "text", "text": prompt_2},
-                                ],
-                            }
-                        ],
-                    )
-
-                    text = response_2.content[0].text.strip()
-                    if text.startswith("```"):
-                        text = text.split("```")[1]
-                        if text.startswith("json"):
-                            text = text[4:]
-
-                    subpage_rooms = json.loads(text.strip())
-                    if isinstance(subpage_rooms, list):
-                        all_rooms.extend(subpage_rooms)
-
-                    time.sleep(2)
-
-                except Exception as e:
-                    print(f"    Error on subpage: {e}")
-                    continue
-
-        browser.close()
-
-        # Deduplicate by name
-        unique_rooms = []
-        seen = set()
-        for room in all_rooms:
-            if room.get("name") and room["name"] not in seen:
-                seen.add(room["name"])
-                unique_rooms.append(room)
-
-        print(f"  Extracted {len(unique_rooms)} unique rooms")
-        return unique_rooms
 
+class BrowserPool:
+    """A single Chromium for the whole run, handing out isolated contexts"""
 
-def scrape_london_rooms_with_vision():
-    """Main function: Scrape all London venues with vision"""
+    def __init__(self, size: int = ROOM_SCRAPER_WORKERS):
+        self.size = size
+        self._semaphore = asyncio.Semaphore(size)
+        self._playwright = None
+        self._browser = None
 
-    db = SessionLocal()
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._browser.close()
+        await self._playwright.stop()
 
-    # Get London venues with websites, no rooms yet
-    london_venues = (
-        db.query(Venue)
-        .filter(Venue.city == "London", Venue.website != None)
-        .outerjoin(Room)
-        .group_by(Venue.id)
-        .having(func.count(Room.id) == 0)
-        .order_by(Venue.google_rating.desc())
-        .all()
+    @asynccontextmanager
+    async def context(self):
+        """A fresh context (cookies, cache, storage) for one worker"""
+        async with self._semaphore:
+            context = await self._browser.new_context()
+            try:
+                yield context
+            finally:
+                await context.close()
+
+
+def screenshot_to_base64(screenshot_bytes):
+    return base64.b64encode(screenshot_bytes).decode("utf-8")
+
+
+def parse_model_json(text: str):
+    """Parse a JSON reply, tolerating a surrounding markdown fence"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    return json.loads(text.strip())
+
+
+async def ask_vision(screenshot: bytes, prompt: str, max_tokens: int):
+    response = await client.messages.create(
+        model=MODEL,
+        max_tokens=max_tokens,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "image/png",
+                            "data": screenshot_to_base64(screenshot),
+                        },
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ],
+    )
+    return parse_model_json(response.content[0].text)
+
+
+async def page_fingerprint(page, screenshot: bytes) -> str:
+    """Hash of what the model would see on the page.
+
+    Visible text is stable across renders where pixels are not (carousels,
+    lazy images, cookie banners), so it is preferred when the page has
+    enough of it. Otherwise the screenshot is shrunk to coarse greyscale so
+    rendering noise does not change the hash.
+    """
+    try:
+        text = " ".join((await page.inner_text("body")).split())
+    except Exception:
+        text = ""
+
+    if len(text) >= FINGERPRINT_MIN_TEXT:
+        return "text:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    with Image.open(BytesIO(screenshot)) as image:
+        width, height = image.size
+        small = image.convert("L").resize((64, max(1, height * 64 // width)))
+        coarse = bytes(pixel >> 4 for pixel in small.tobytes())
+    return "image:" + hashlib.sha256(coarse).hexdigest()
+
+
+async def ask_vision_cached(
+    screenshot: bytes, fingerprint: str, prompt: str, max_tokens: int
+):
+    """ask_vision, reusing the parsed result for previously seen page content"""
+    key = ResponseCache.key(MODEL, PROMPT_VERSION, prompt, max_tokens, fingerprint)
+    cached = model_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await ask_vision(screenshot, prompt, max_tokens)
+    model_cache.put(
+        key,
+        result,
+        request={
+            "model": MODEL,
+            "prompt_version": PROMPT_VERSION,
+            "fingerprint": fingerprint,
+        },
     )
+    return result
 
-    print(f"Starting vision scraper for {len(london_venues)} London venues")
-    print("=" * 70)
 
-    total_rooms = 0
+def evict_model_cache():
+    removed, remaining = model_cache.evict(
+        max_age_seconds=MODEL_CACHE_MAX_AGE_DAYS * 86400,
+        max_bytes=int(MODEL_CACHE_MAX_MB * 1024 * 1024),
+    )
+    print(
+        f"  Model cache: {model_cache.stats()}; evicted {removed} entries, "
+        f"{remaining / 1024 / 1024:.1f} MB kept"
+    )
+
+
+def resolve_link(venue_url: str, link: str) -> str | None:
+    if link.startswith("/"):
+        return venue_url.rstrip("/") + link
+    if link.startswith("http"):
+        return link
+    return None
+
+
+async def load_page(page, url: str, limiter: HostLimiter, timeout: int):
+    async with limiter.slot(url):
+        await page.goto(url, wait_until="networkidle", timeout=timeout)
+
 
-    for i, venue in enumerate(london_venues, 1):
-        print(f"\n[{i}/{len(london_venues)}] {venue.name}")
+def tag_vision_rooms(rooms) -> list:
+    if not isinstance(rooms, list):
+        return []
+    return [
+        {**room, "extraction_source": "vision"}
+        for room in rooms
+        if isinstance(room, dict)
+    ]
 
-        if not venue.website:
-            print("  No website, skipping")
+
+async def scrape_subpages(
+    page,
+    venue_url: str,
+    links: list,
+    venue_name: str,
+    limiter: HostLimiter,
+    vision_fallback: bool,
+) -> list:
+    """Rooms from linked pages, DOM first and vision only if allowed"""
+    rooms = []
+
+    for link in links[:MAX_SUBPAGES]:
+        full_url = resolve_link(venue_url, link)
+        if not full_url:
             continue
 
-        # Scrape with vision
-        rooms_data = scrape_venue_with_vision(venue.website, venue.name)
+        try:
+            print(f"    [{venue_name}] Visiting: {full_url}")
+            await load_page(page, full_url, limiter, timeout=15000)
+
+            dom = extract_rooms_from_dom(await page.content(), full_url)
+            if dom.confident:
+                rooms.extend(dom.rooms)
+            elif vision_fallback:
+                subpage_screenshot = await page.screenshot()
+                subpage_rooms = await ask_vision_cached(
+                    subpage_screenshot,
+                    await page_fingerprint(page, subpage_screenshot),
+                    SUBPAGE_PROMPT,
+                    2000,
+                )
+                rooms.extend(tag_vision_rooms(subpage_rooms))
 
-        if not rooms_data:
-            print("  No rooms extracted")
+        except Exception as e:
+            print(f"    [{venue_name}] Error on subpage: {e}")
             continue
 
-        # Save to database
-        for room_data in rooms_data:
+    return rooms
+
+
+async def scrape_venue_with_vision(
+    context,
+    venue_url: str,
+    venue_name: str,
+    limiter: HostLimiter,
+    raise_errors: bool = False,
+) -> list:
+    """Extract room data from the rendered DOM, asking vision only as a fallback.
+
+    Each room records the path that produced it in `extraction_source`
+    ("jsonld", "dom_text" or "vision"). A page that fails to load or a failed
+    vision call yields no rooms, or is raised with `raise_errors`.
+    """
+
+    print(f"\n  Scraping {venue_name}")
+    print(f"  URL: {venue_url}")
+
+    page = await context.new_page()
+
+    try:
+        await load_page(page, venue_url, limiter, timeout=30000)
+    except Exception as e:
+        print(f"  [{venue_name}] Failed to load page: {e}")
+        if raise_errors:
+            raise
+        return []
+
+    # Step 1: Structured data and visible text on the main page
+    main_dom = extract_rooms_from_dom(await page.content(), venue_url)
+
+    if main_dom.confident:
+        all_rooms = list(main_dom.rooms)
+    else:
+        # Step 2: Listing pages often only link to rooms; try those via DOM
+        main_screenshot = await page.screenshot()
+        main_fingerprint = await page_fingerprint(page, main_screenshot)
+        all_rooms = await scrape_subpages(
+            page,
+            venue_url,
+            main_dom.room_links,
+            venue_name,
+            limiter,
+            vision_fallback=False,
+        )
+
+        # Step 3: Vision on the main page, then on the subpages it points to
+        if not all_rooms:
             try:
-                room = Room(
-                    venue_id=venue.id,
-                    name=room_data.get("name"),
-                    theme=room_data.get("theme"),
-                    difficulty=room_data.get("difficulty"),
-                    min_players=room_data.get("min_players"),
-                    max_players=room_data.get("max_players"),
-                    # Only store a duration if we actually scraped one.
-                    duration_minutes=room_data.get("duration_minutes"),
-                    # Store min/max price per person separately; don't fabricate defaults.
-                    min_price_per_person=room_data.get("price_min"),
-                    max_price_per_person=room_data.get("price_max"),
-                    currency="GBP",
-                    description=room_data.get("description"),
-                    latitude=venue.latitude,
-                    longitude=venue.longitude,
-                    location=venue.location,
-                    ai_generated_content=True,
+                result_1 = await ask_vision_cached(
+                    main_screenshot,
+                    main_fingerprint,
+                    MAIN_PAGE_PROMPT.format(venue_name=venue_name),
+                    3000,
                 )
+            except Exception as e:
+                print(f"  [{venue_name}] Failed to parse AI response: {e}")
+                if raise_errors:
+                    raise
+                return []
+
+            all_rooms = tag_vision_rooms(result_1.get("rooms_found", []))
+
+            if result_1.get("needs_navigation") and result_1.get("room_links"):
+                print(
+                    f"  [{venue_name}] Found {len(result_1['room_links'])} subpages to check"
+                )
+                all_rooms += await scrape_subpages(
+                    page,
+                    venue_url,
+                    result_1["room_links"],
+                    venue_name,
+                    limiter,
+                    vision_fallback=True,
+                )
+
+    # Deduplicate by name
+    unique_rooms = []
+    seen = set()
+    for room in all_rooms:
+        if room.get("name") and room["name"] not in seen:
+            seen.add(room["name"])
+            unique_rooms.append(room)
+
+    sources = Counter(room["extraction_source"] for room in unique_rooms)
+    print(
+        f"  [{venue_name}] Extracted {len(unique_rooms)} unique rooms "
+        f"({', '.join(f'{k}: {v}' for k, v in sources.items()) or 'none'})"
+    )
+    return unique_rooms
+
+
+def load_pending_venues(city: str) -> list:
+    """Venues in a city with a website and no rooms yet"""
+    db = SessionLocal()
+
+    try:
+        return (
+            db.query(Venue.id, Venue.name, Venue.website)
+            .filter(Venue.city == city, Venue.website.isnot(None))
+            .outerjoin(Room)
+            .group_by(Venue.id)
+            .having(func.count(Room.id) == 0)
+            .order_by(Venue.google_rating.desc())
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def load_refresh_venues(city: str, min_age_hours: float) -> list:
+    """Venues in a city with a website not scraped in the last min_age_hours"""
+    cutoff = datetime.utcnow() - timedelta(hours=min_age_hours)
+    db = SessionLocal()
+
+    try:
+        return (
+            db.query(Venue.id, Venue.name, Venue.website)
+            .filter(
+                Venue.city == city,
+                Venue.website.isnot(None),
+                or_(Venue.last_scraped_at.is_(None), Venue.last_scraped_at < cutoff),
+            )
+            .order_by(Venue.last_scraped_at.asc().nullsfirst())
+            .all()
+        )
+    finally:
+        db.close()
 
-                db.add(room)
-                total_rooms += 1
-                print(f"    Added: {room.name}")
+
+def load_page_validators(urls: list) -> dict:
+    db = SessionLocal()
+    try:
+        return load_validators(db, urls, FETCH_SCOPE)
+    finally:
+        db.close()
+
+
+def room_fields(room_data: dict, venue: Venue) -> dict:
+    return {
+        "name": room_data.get("name"),
+        "theme": room_data.get("theme"),
+        "difficulty": room_data.get("difficulty"),
+        "min_players": room_data.get("min_players"),
+        "max_players": room_data.get("max_players"),
+        # Only store a duration if we actually scraped one.
+        "duration_minutes": room_data.get("duration_minutes"),
+        # Store min/max price per person separately; don't fabricate defaults.
+        "min_price_per_person": room_data.get("price_min"),
+        "max_price_per_person": room_data.get("price_max"),
+        "currency": room_data.get("currency") or "GBP",
+        "description": room_data.get("description"),
+        "latitude": venue.latitude,
+        "longitude": venue.longitude,
+        "location": venue.location,
+        "extraction_source": room_data.get("extraction_source"),
+        "ai_generated_content": room_data.get("extraction_source") == "vision",
+    }
+
+
+def save_rooms(venue_id: int, rooms_data: list, fetch: FetchResult | None = None):
+    """Save the scraped rooms of one venue in a single commit.
+
+    Rooms already stored under the same name are updated with any newly
+    scraped values; the rest are inserted. The venue's page validators are
+    recorded in the same transaction.
+    """
+    db = SessionLocal()
+    saved = 0
+
+    try:
+        venue = db.get(Venue, venue_id)
+        existing = {room.name.lower(): room for room in venue.rooms if room.name}
+
+        for room_data in rooms_data:
+            try:
+                fields = room_fields(room_data, venue)
+                room = existing.get(fields["name"].lower())
+
+                if room:
+                    for field, value in fields.items():
+                        if value is not None:
+                            setattr(room, field, value)
+                    print(f"    Updated: {room.name}")
+                else:
+                    room = Room(venue_id=venue.id, **fields)
+                    db.add(room)
+                    print(f"    Added: {room.name}")
+
+                saved += 1
 
             except Exception as e:
                 print(f"    Error saving room: {e}")
                 continue
 
+        venue.last_scraped_at = datetime.now(UTC)
+        if fetch is not None:
+            record_fetch(db, fetch)
+
+        db.commit()
+        return saved
+
+    finally:
+        db.close()
+
+
+def touch_venues(venue_ids: list):
+    """Mark unchanged venues as scraped without rewriting their rooms"""
+    if not venue_ids:
+        return
+
+    db = SessionLocal()
+    try:
+        db.query(Venue).filter(Venue.id.in_(venue_ids)).update(
+            {Venue.last_scraped_at: datetime.now(UTC)}, synchronize_session=False
+        )
         db.commit()
-        time.sleep(3)  # Rate limiting between venues
+    finally:
+        db.close()
+
 
-    db.close()
+async def check_page(
+    context, url: str, previous: Validators | None, limiter: HostLimiter
+) -> FetchResult:
+    """Conditional GET of the venue page, without rendering it"""
+    async with limiter.slot(url):
+        response = await context.request.get(
+            url, headers=conditional_headers(previous), timeout=15000
+        )
+        body = await response.body() if response.status != 304 else None
+
+    return evaluate_response(
+        url, FETCH_SCOPE, previous, response.status, response.headers, body
+    )
+
+
+async def scrape_and_save(
+    pool,
+    limiter,
+    venue,
+    position: str,
+    previous: Validators | None = None,
+    raise_errors: bool = False,
+) -> int | None:
+    """Rooms saved for one venue, or None when its page is unchanged.
+
+    Load, model and save errors count as 0 rooms, so one venue never stops a
+    city run; with `raise_errors` they are raised instead, and 0 only means
+    the page had no rooms (the worker retries failed jobs).
+    """
+    async with pool.context() as context:
+        print(f"\n[{position}] {venue.name}")
+
+        fetch = None
+        if previous is not None:
+            try:
+                fetch = await check_page(context, venue.website, previous, limiter)
+            except Exception as e:
+                print(f"  [{venue.name}] Conditional check failed: {e}")
+
+            if fetch is not None and not fetch.changed:
+                print(f"  [{venue.name}] Unchanged since last scrape, skipping")
+                return None
+
+        try:
+            rooms_data = await scrape_venue_with_vision(
+                context, venue.website, venue.name, limiter, raise_errors
+            )
+        except Exception as e:
+            print(f"  [{venue.name}] Error: {e}")
+            if raise_errors:
+                raise
+            return 0
+
+        if not rooms_data:
+            print(f"  [{venue.name}] No rooms extracted")
+            return 0
+
+        # Validators are only stored once rooms were actually extracted
+        if fetch is None:
+            try:
+                fetch = await check_page(context, venue.website, None, limiter)
+            except Exception as e:
+                print(f"  [{venue.name}] Could not record page validators: {e}")
+
+    try:
+        return await asyncio.to_thread(save_rooms, venue.id, rooms_data, fetch)
+    except Exception as e:
+        print(f"  [{venue.name}] Error saving rooms: {e}")
+        if raise_errors:
+            raise
+        return 0
+
+
+async def scrape_rooms_with_vision(
+    city: str = "London",
+    workers: int = ROOM_SCRAPER_WORKERS,
+    refresh: bool = False,
+    min_age_hours: float = REFRESH_MIN_AGE_HOURS,
+):
+    """Scrape venues in a city with `workers` parallel contexts.
+
+    By default only venues without rooms are scraped. With `refresh`, every
+    venue not scraped in the last `min_age_hours` is re-checked, and venues
+    whose page is unchanged since the last scrape are skipped entirely.
+    """
+
+    if refresh:
+        venues = await asyncio.to_thread(load_refresh_venues, city, min_age_hours)
+    else:
+        venues = await asyncio.to_thread(load_pending_venues, city)
+    validators = await asyncio.to_thread(
+        load_page_validators, [venue.website for venue in venues]
+    )
+
+    print(f"Starting vision scraper for {len(venues)} {city} venues")
+    print(f"Workers: {workers}, refresh: {refresh}")
+    print("=" * 70)
+
+    limiter = HostLimiter()
+
+    async with BrowserPool(workers) as pool:
+        results = await asyncio.gather(
+            *(
+                scrape_and_save(
+                    pool,
+                    limiter,
+                    venue,
+                    f"{i}/{len(venues)}",
+                    validators.get(venue.website),
+                )
+                for i, venue in enumerate(venues, 1)
+            )
+        )
+
+    unchanged = [
+        venue.id for venue, saved in zip(venues, results, strict=True) if saved is None
+    ]
+    await asyncio.to_thread(touch_venues, unchanged)
+    await asyncio.to_thread(refresh_after_scrape, [city])
 
     print("\n" + "=" * 70)
-    print(f"COMPLETE! Added {total_rooms} rooms")
+    print(f"COMPLETE! Saved {sum(r or 0 for r in results)} rooms")
+    print(f"  Skipped {len(unchanged)} unchanged venues")
+    evict_model_cache()
     print("=" * 70)
 
 
+def scrape_london_rooms_with_vision():
+    """Main function: Scrape all London venues with vision"""
+    asyncio.run(scrape_rooms_with_vision("London"))
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city", default="London")
+    parser.add_argument("--workers", type=int, default=ROOM_SCRAPER_WORKERS)
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-check every venue, skipping pages unchanged since the last scrape",
+    )
+    parser.add_argument("--min-age-hours", type=float, default=REFRESH_MIN_AGE_HOURS)
+    args = parser.parse_args()
+
     print("STARTING AI ROOM SCRAPER WITH VISION...")
-    scrape_london_rooms_with_vision()
+    asyncio.run(
+        scrape_rooms_with_vision(
+            args.city, args.workers, args.refresh, args.min_age_hours
+        )
+    )
@@ -0,0 +1,171 @@
+"""
+Maintain the monthly partitions of room_views (see schema.py).
+Partitions are created ROOM_VIEWS_MONTHS_AHEAD months ahead, so a view always
+has a partition to land in. Should this job stop running, later views go to
+room_views_default instead, and the next run creates partitions from the
+oldest month found there, moving those rows into them. The API also ensures
+the months ahead at startup (ensure_partitions).
+
+Retention: every month that ended more than ROOM_VIEWS_RETENTION_MONTHS
+months ago is rolled up into room_view_daily (views and distinct sessions per
+room per day), then detached and dropped.
+Each month is one transaction, so a failure never loses views that were not
+rolled up. Dropping whole partitions replaces row-by-row deletes, so the
+table and its indexes stop growing without needing vacuum.
+
+Queries bounded on viewed_at (the trending sort's last 30 days) are pruned
+by the planner to the partitions covering that range.
+
+Run daily from backend: uv run python -m scraper.room_view_partitions [--dry-run]
+"""
+
+import argparse
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from database import SessionLocal
+
+ROOM_VIEWS_MONTHS_AHEAD = int(os.getenv("ROOM_VIEWS_MONTHS_AHEAD", "3"))
+# Raw views are kept for this many whole months before the current one
+ROOM_VIEWS_RETENTION_MONTHS = int(os.getenv("ROOM_VIEWS_RETENTION_MONTHS", "13"))
+
+PARTITION_NAME = re.compile(r"^room_views_y(\d{4})m(\d{2})$")
+
+PARTITIONS_SQL = text(
+    """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'room_views'::regclass
+    ORDER BY c.relname
+    """
+)
+
+CREATE_PARTITIONS_SQL = text("SELECT create_room_views_partitions(:start, :end)")
+
+OLDEST_DEFAULT_VIEW_SQL = text("SELECT min(viewed_at) FROM room_views_default")
+
+# Days never span two months, so a partition holds every view of its days and
+# re-running a rollup after a failed drop just rewrites the same counts
+ROLLUP_SQL = """
+    INSERT INTO room_view_daily (room_id, day, views, sessions)
+    SELECT room_id, viewed_at::date, count(*), count(DISTINCT session_id)
+    FROM {partition}
+    GROUP BY room_id, viewed_at::date
+    ON CONFLICT (room_id, day) DO UPDATE
+    SET views = EXCLUDED.views, sessions = EXCLUDED.sessions
+"""
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def list_partitions(db) -> list:
+    """(month, partition name) for every monthly partition, oldest first"""
+    partitions = []
+    for name in db.execute(PARTITIONS_SQL).scalars():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return partitions
+
+
+def create_future_partitions(db, months_ahead: int = ROOM_VIEWS_MONTHS_AHEAD) -> int:
+    """Ensure partitions from this month (or the oldest month of any views in
+    room_views_default, which are moved into theirs) to `months_ahead` months
+    on; commits"""
+    this_month = date.today().replace(day=1)
+    start = this_month
+    oldest = db.execute(OLDEST_DEFAULT_VIEW_SQL).scalar()
+    if oldest is not None:
+        start = min(start, oldest.date().replace(day=1))
+    created = db.execute(
+        CREATE_PARTITIONS_SQL,
+        {"start": start, "end": add_months(this_month, months_ahead)},
+    ).scalar()
+    db.commit()
+    return created
+
+
+def ensure_partitions():
+    """Standalone-session create_future_partitions for the API's startup,
+    which never fails it: without partitions, views go to room_views_default"""
+    db = SessionLocal()
+    try:
+        created = create_future_partitions(db)
+        if created:
+            print(f"Created {created} room_views partitions")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Could not create room_views partitions: {e}")
+    finally:
+        db.close()
+
+
+def expire_partition(db, name: str) -> int:
+    """Roll one partition into room_view_daily, then detach and drop it.
+
+    Returns the number of daily rows written.
+    """
+    partition = f'"{name}"'
+    try:
+        rolled_up = db.execute(text(ROLLUP_SQL.format(partition=partition))).rowcount
+        db.execute(text(f"ALTER TABLE room_views DETACH PARTITION {partition}"))
+        db.execute(text(f"DROP TABLE {partition}"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return rolled_up
+
+
+def maintain_room_views(
+    months_ahead: int = ROOM_VIEWS_MONTHS_AHEAD,
+    retention_months: int = ROOM_VIEWS_RETENTION_MONTHS,
+    dry_run: bool = False,
+):
+    print("=" * 70)
+    print("ROOM VIEWS PARTITIONS")
+    print("=" * 70)
+
+    cutoff = add_months(date.today().replace(day=1), -retention_months)
+    db = SessionLocal()
+    try:
+        if not dry_run:
+            created = create_future_partitions(db, months_ahead)
+            print(f"Created {created} partitions ({months_ahead} months ahead)")
+
+        expired = [name for month, name in list_partitions(db) if month < cutoff]
+        print(f"Retention: raw views kept from {cutoff}; {len(expired)} to expire")
+
+        for name in expired:
+            if dry_run:
+                print(f"  would roll up and drop {name}")
+                continue
+            rolled_up = expire_partition(db, name)
+            print(f"  ✓ {name}: {rolled_up} daily rows, partition dropped")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months-ahead", type=int, default=ROOM_VIEWS_MONTHS_AHEAD)
+    parser.add_argument(
+        "--retention-months", type=int, default=ROOM_VIEWS_RETENTION_MONTHS
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only list partitions to expire"
+    )
+    args = parser.parse_args()
+
+    # The trending sort reads the last 30 days of raw views
+    if args.retention_months < 1:
+        parser.error("--retention-months must be at least 1")
+
+    maintain_room_views(args.months_ahead, args.retention_months, args.dry_run)
@@ -0,0 +1,209 @@
+"""
+Precompute "similar rooms" for every published room.
+Each room becomes a feature vector (theme and sub-theme multi-hot,
+difficulty, player range, duration, normalised price), compared by cosine
+similarity and blended with geographic proximity, all in blocked NumPy
+matrix operations. The top SIMILAR_ROOMS_K neighbours per room are written
+to room_similar, which /api/rooms/{id}/similar reads with one indexed lookup.
+
+Run from backend: uv run python -m scraper.similar_rooms [--k 12]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from database import SessionLocal
+from models import Room, RoomSimilar, Venue
+
+SIMILAR_ROOMS_K = int(os.getenv("SIMILAR_ROOMS_K", "12"))
+# Rows of the similarity matrix computed at once; memory is BLOCK_ROWS x rooms
+BLOCK_ROWS = 256
+INSERT_BATCH = 5000
+
+# Relative weight of each feature block in the cosine similarity
+THEME_WEIGHT = 2.0
+DIFFICULTY_WEIGHT = 1.0
+PLAYERS_WEIGHT = 0.5
+DURATION_WEIGHT = 0.3
+PRICE_WEIGHT = 0.7
+
+# Final score = (1 - LOCATION_WEIGHT) * feature cosine
+#             + LOCATION_WEIGHT * exp(-distance / LOCATION_SCALE_KM)
+LOCATION_WEIGHT = 0.3
+LOCATION_SCALE_KM = 15.0
+EARTH_RADIUS_KM = 6371.0
+
+
+def load_rooms(db) -> list:
+    return db.execute(
+        select(
+            Room.id,
+            Room.theme,
+            Room.sub_themes,
+            Room.difficulty,
+            Room.min_players,
+            Room.max_players,
+            Room.duration_minutes,
+            Room.price_usd,
+            Room.latitude,
+            Room.longitude,
+            Venue.latitude.label("venue_latitude"),
+            Venue.longitude.label("venue_longitude"),
+        )
+        .join(Venue, Room.venue_id == Venue.id)
+        .where(Room.is_published == True, Venue.is_active == True)
+        .order_by(Room.id)
+    ).all()
+
+
+def standardized(values: list, log: bool = False) -> np.ndarray:
+    """Column of z-scores; missing values become 0 (the mean)"""
+    column = np.array(
+        [np.nan if v is None else float(v) for v in values], dtype=np.float32
+    )
+    if log:
+        column = np.log1p(column)
+    known = ~np.isnan(column)
+    if known.any():
+        mean = column[known].mean()
+        std = column[known].std() or 1.0
+        column = (column - mean) / std
+    return np.nan_to_num(column, nan=0.0)[:, None]
+
+
+def theme_matrix(rooms: list) -> np.ndarray:
+    """Multi-hot of theme and sub-themes, each row scaled to unit length"""
+    tags = [
+        {t.strip().lower() for t in [room.theme, *(room.sub_themes or [])] if t}
+        for room in rooms
+    ]
+    vocabulary = {tag: i for i, tag in enumerate(sorted(set().union(*tags)))}
+
+    matrix = np.zeros((len(rooms), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, room_tags in enumerate(tags):
+        matrix[row, [vocabulary[tag] for tag in room_tags]] = 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def feature_matrix(rooms: list) -> np.ndarray:
+    """Weighted features per room, L2-normalised so dot product = cosine"""
+    features = np.hstack(
+        [
+            THEME_WEIGHT * theme_matrix(rooms),
+            DIFFICULTY_WEIGHT * standardized([r.difficulty for r in rooms]),
+            PLAYERS_WEIGHT * standardized([r.min_players for r in rooms]),
+            PLAYERS_WEIGHT * standardized([r.max_players for r in rooms]),
+            DURATION_WEIGHT * standardized([r.duration_minutes for r in rooms]),
+            PRICE_WEIGHT * standardized([r.price_usd for r in rooms], log=True),
+        ]
+    )
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.where(norms == 0, 1.0, norms)
+
+
+def unit_vectors(rooms: list) -> tuple:
+    """Points on the unit sphere (room location, else venue) and a known mask"""
+    lat = np.array(
+        [r.latitude if r.latitude is not None else r.venue_latitude for r in rooms],
+        dtype=object,
+    )
+    lng = np.array(
+        [r.longitude if r.longitude is not None else r.venue_longitude for r in rooms],
+        dtype=object,
+    )
+    known = np.array(
+        [a is not None and b is not None for a, b in zip(lat, lng, strict=True)]
+    )
+    lat = np.radians(np.where(known, lat, 0).astype(np.float64))
+    lng = np.radians(np.where(known, lng, 0).astype(np.float64))
+    points = np.stack(
+        [np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)], axis=1
+    )
+    return points, known
+
+
+def top_neighbours(features: np.ndarray, points: np.ndarray, known: np.ndarray, k: int):
+    """Yield (row, neighbour rows, scores) for every room, best first"""
+    count = len(features)
+    k = min(k, count - 1)
+    if k <= 0:
+        return
+
+    for start in range(0, count, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, count)
+        scores = features[start:stop] @ features.T
+
+        # Great-circle distance from the angle between the unit vectors
+        cosine = np.clip(points[start:stop] @ points.T, -1.0, 1.0)
+        distance_km = EARTH_RADIUS_KM * np.arccos(cosine)
+        proximity = np.exp(-distance_km / LOCATION_SCALE_KM).astype(np.float32)
+        proximity[~known[start:stop], :] = 0.0
+        proximity[:, ~known] = 0.0
+        scores = (1 - LOCATION_WEIGHT) * scores + LOCATION_WEIGHT * proximity
+
+        rows = np.arange(start, stop)
+        scores[rows - start, rows] = -np.inf  # never recommend a room to itself
+
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        for offset, row in enumerate(rows):
+            yield row, candidates[offset], candidate_scores[offset]
+
+
+def compute_similar_rooms(k: int = SIMILAR_ROOMS_K):
+    print("=" * 70)
+    print("SIMILAR ROOMS")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        rooms = load_rooms(db)
+        print(f"Loaded {len(rooms)} published rooms")
+
+        features = feature_matrix(rooms)
+        points, known = unit_vectors(rooms)
+        print(f"Feature matrix: {features.shape[0]} x {features.shape[1]}")
+
+        computed_at = datetime.utcnow()
+        rows = [
+            {
+                "room_id": rooms[row].id,
+                "rank": rank,
+                "similar_room_id": rooms[neighbour].id,
+                "score": round(float(score), 5),
+                "computed_at": computed_at,
+            }
+            for row, neighbours, scores in top_neighbours(features, points, known, k)
+            for rank, (neighbour, score) in enumerate(
+                zip(neighbours, scores, strict=True), start=1
+            )
+        ]
+        print(f"Computed {len(rows)} neighbours in {time.perf_counter() - start:.1f}s")
+
+        # Replace the whole table in one transaction; readers see old or new
+        db.execute(delete(RoomSimilar))
+        for i in range(0, len(rows), INSERT_BATCH):
+            db.execute(insert(RoomSimilar), rows[i : i + INSERT_BATCH])
+        db.commit()
+        print(f"Stored neighbours for {len(rooms)} rooms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=SIMILAR_ROOMS_K)
+    args = parser.parse_args()
+
+    compute_similar_rooms(args.k)
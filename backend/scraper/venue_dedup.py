@@ -0,0 +1,281 @@
+"""
+Fuzzy deduplication of scraped venues.
+Candidates are bucketed by geohash cell and each one is only compared with
+venues in its own and the 8 surrounding cells. Two venues are merged when
+their normalized names are similar and they are close together. That keeps
+the stage near-linear, and identically named chains in different places
+stay separate.
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import UTC, datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from scraper.response_cache import CACHE_ROOT
+
+# Precision 6 cells are ~1.2 x 0.6 km, so the 3x3 neighbourhood always
+# covers DEDUP_MAX_DISTANCE_M
+GEOHASH_PRECISION = 6
+DEDUP_MAX_DISTANCE_M = float(os.getenv("DEDUP_MAX_DISTANCE_M", "250"))
+DEDUP_MIN_SIMILARITY = float(os.getenv("DEDUP_MIN_SIMILARITY", "0.85"))
+DEDUP_REPORT_DIR = Path(os.getenv("DEDUP_REPORT_DIR", CACHE_ROOT / "reports"))
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_NAME_STOPWORDS = {"the", "ltd", "limited", "and", "co", "uk"}
+_EARTH_RADIUS_M = 6371000
+
+
+# ========================================================================
+# GEOMETRY
+# ========================================================================
+
+
+def geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int = GEOHASH_PRECISION) -> tuple[float, float]:
+    """(height, width) of a geohash cell in degrees"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180 / 2**lat_bits, 360 / 2**lng_bits
+
+
+def neighbour_cells(lat: float, lng: float, precision: int = GEOHASH_PRECISION):
+    """Geohashes of the cell containing the point and the 8 around it"""
+    height, width = geohash_cell_size(precision)
+    return {
+        geohash(
+            max(-90.0, min(90.0, lat + dy * height)),
+            (lng + dx * width + 180) % 360 - 180,
+            precision,
+        )
+        for dy in (-1, 0, 1)
+        for dx in (-1, 0, 1)
+    }
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Haversine distance in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+# ========================================================================
+# NAME MATCHING
+# ========================================================================
+
+
+def normalize_name(name: str, city: str | None = None) -> str:
+    """Lowercase, accent-free name without punctuation, filler or city words"""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    tokens = re.findall(r"[a-z0-9]+", text)
+
+    drop = set(_NAME_STOPWORDS)
+    if city:
+        drop.update(re.findall(r"[a-z0-9]+", city.lower()))
+
+    kept = [t for t in tokens if t not in drop]
+    return " ".join(kept or tokens)
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two normalized names in [0, 1]"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+
+    # "escape hunt" vs "escape hunt experience": one name contains the other
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    shorter = min(tokens_a, tokens_b, key=len)
+    if len(shorter) >= 2 and (tokens_a <= tokens_b or tokens_b <= tokens_a):
+        return 0.95
+
+    return SequenceMatcher(None, a, b).ratio()
+
+
+# ========================================================================
+# DEDUPLICATION
+# ========================================================================
+
+
+def _has_coordinates(venue: dict) -> bool:
+    return venue.get("latitude") is not None and venue.get("longitude") is not None
+
+
+def _canonical_rank(venue: dict):
+    """Prefer venues with a place id, then the most reviewed"""
+    return (
+        bool(venue.get("source_id")),
+        venue.get("review_count") or 0,
+        venue.get("rating") or 0,
+    )
+
+
+def dedupe_venues(
+    venues: list,
+    max_distance_m: float = DEDUP_MAX_DISTANCE_M,
+    min_similarity: float = DEDUP_MIN_SIMILARITY,
+) -> tuple[list, list]:
+    """Collapse near-duplicate venues.
+
+    Returns (unique venues, merge report). Each report entry names the kept
+    venue and the venues merged into it, with distance and name similarity.
+    Missing fields on the kept venue are filled from its duplicates.
+    """
+    parent = list(range(len(venues)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    names = [normalize_name(v["name"], v.get("city")) for v in venues]
+
+    buckets = defaultdict(list)
+    for i, venue in enumerate(venues):
+        if _has_coordinates(venue):
+            buckets[geohash(venue["latitude"], venue["longitude"])].append(i)
+
+    for i, venue in enumerate(venues):
+        if not _has_coordinates(venue):
+            continue
+
+        for cell in neighbour_cells(venue["latitude"], venue["longitude"]):
+            for j in buckets.get(cell, ()):
+                if j <= i:
+                    continue
+
+                other = venues[j]
+                distance = distance_m(
+                    venue["latitude"],
+                    venue["longitude"],
+                    other["latitude"],
+                    other["longitude"],
+                )
+                if distance > max_distance_m:
+                    continue
+
+                similarity = name_similarity(names[i], names[j])
+                if similarity >= min_similarity:
+                    parent[find(j)] = find(i)
+
+    # Without coordinates only an exact normalized name in the same city counts
+    by_name = {}
+    for i, venue in enumerate(venues):
+        if _has_coordinates(venue):
+            continue
+        key = (names[i], (venue.get("city") or "").lower())
+        if key in by_name:
+            parent[find(i)] = find(by_name[key])
+        else:
+            by_name[key] = i
+
+    clusters = defaultdict(list)
+    for i in range(len(venues)):
+        clusters[find(i)].append(i)
+
+    unique = []
+    report = []
+    for members in clusters.values():
+        members.sort(key=lambda i: _canonical_rank(venues[i]), reverse=True)
+        original = venues[members[0]]
+        kept = dict(original)
+        unique.append(kept)
+
+        if len(members) == 1:
+            continue
+
+        merged = []
+        for i in members[1:]:
+            duplicate = venues[i]
+            for field, value in duplicate.items():
+                if kept.get(field) in (None, "") and value not in (None, ""):
+                    kept[field] = value
+
+            distance = None
+            if _has_coordinates(original) and _has_coordinates(duplicate):
+                distance = distance_m(
+                    original["latitude"],
+                    original["longitude"],
+                    duplicate["latitude"],
+                    duplicate["longitude"],
+                )
+            merged.append(
+                {
+                    "name": duplicate["name"],
+                    "source_id": duplicate.get("source_id"),
+                    "distance_m": round(distance, 1) if distance is not None else None,
+                    "similarity": round(
+                        name_similarity(names[members[0]], names[i]), 3
+                    ),
+                }
+            )
+
+        report.append(
+            {
+                "kept": kept["name"],
+                "source_id": kept.get("source_id"),
+                "merged": merged,
+            }
+        )
+
+    return unique, report
+
+
+def write_merge_report(report: list, label: str = "venues") -> Path | None:
+    """Save the merge report as JSON and print a short summary"""
+    merged_count = sum(len(entry["merged"]) for entry in report)
+    print(f"  Dedup: merged {merged_count} duplicates into {len(report)} venues")
+
+    if not report:
+        return None
+
+    DEDUP_REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+    path = DEDUP_REPORT_DIR / f"{label}-merges-{timestamp}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"  Merge report: {path}")
+    return path
@@ -0,0 +1,254 @@
+"""
+Grid-tiled venue discovery for the cities in the `cities` table.
+Each city's search area is tiled into rectangles that are searched with a
+location restriction and full result pagination. Rectangles that hit the
+result cap are split into quadrants until they stop saturating. Cells of a
+city are searched in parallel.
+
+Run from backend: uv run python -m scraper.venue_discovery [--city london]
+"""
+
+import argparse
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+from database import SessionLocal
+from models import City
+from scraper import venue_scraper
+from scraper.city_aggregates import refresh_after_scrape
+from scraper.venue_dedup import dedupe_venues, write_merge_report
+from scraper.venue_scraper import (
+    PLACES_FIELD_MASK,
+    fetch_places,
+    parse_places,
+    places_cache,
+    upsert_venues_batched,
+)
+
+KM_PER_DEGREE_LAT = 111.32
+
+DISCOVERY_QUERY = os.getenv("DISCOVERY_QUERY", "escape room")
+# Search area around each city's centre point
+DISCOVERY_RADIUS_KM = float(os.getenv("DISCOVERY_RADIUS_KM", "20"))
+DISCOVERY_CELL_KM = float(os.getenv("DISCOVERY_CELL_KM", "5"))
+# Saturated cells are not split below this size
+DISCOVERY_MIN_CELL_KM = float(os.getenv("DISCOVERY_MIN_CELL_KM", "0.5"))
+DISCOVERY_WORKERS = int(os.getenv("DISCOVERY_WORKERS", "4"))
+
+# Text Search returns at most 20 places per page and 3 pages per query
+PAGE_SIZE = 20
+MAX_PAGES = 3
+DISCOVERY_FIELD_MASK = f"{PLACES_FIELD_MASK},nextPageToken"
+
+
+def km_per_degree_lng(lat: float) -> float:
+    return KM_PER_DEGREE_LAT * math.cos(math.radians(lat))
+
+
+class Cell(NamedTuple):
+    south: float
+    west: float
+    north: float
+    east: float
+
+    def size_km(self) -> float:
+        """Length of the longer side"""
+        mid_lat = (self.south + self.north) / 2
+        return max(
+            (self.north - self.south) * KM_PER_DEGREE_LAT,
+            (self.east - self.west) * km_per_degree_lng(mid_lat),
+        )
+
+    def split(self) -> list["Cell"]:
+        mid_lat = (self.south + self.north) / 2
+        mid_lng = (self.west + self.east) / 2
+        return [
+            Cell(self.south, self.west, mid_lat, mid_lng),
+            Cell(self.south, mid_lng, mid_lat, self.east),
+            Cell(mid_lat, self.west, self.north, mid_lng),
+            Cell(mid_lat, mid_lng, self.north, self.east),
+        ]
+
+    def intersects_circle(self, lat: float, lng: float, radius_km: float) -> bool:
+        nearest_lat = min(max(lat, self.south), self.north)
+        nearest_lng = min(max(lng, self.west), self.east)
+        dy = (nearest_lat - lat) * KM_PER_DEGREE_LAT
+        dx = (nearest_lng - lng) * km_per_degree_lng(lat)
+        return math.hypot(dx, dy) <= radius_km
+
+    def restriction(self) -> dict:
+        return {
+            "rectangle": {
+                "low": {"latitude": self.south, "longitude": self.west},
+                "high": {"latitude": self.north, "longitude": self.east},
+            }
+        }
+
+
+def tile_area(lat: float, lng: float, radius_km: float, cell_km: float) -> list:
+    """Square cells covering the circle around (lat, lng)"""
+    dlat = cell_km / KM_PER_DEGREE_LAT
+    dlng = cell_km / km_per_degree_lng(lat)
+    steps = math.ceil(radius_km / cell_km)
+
+    cells = []
+    for row in range(-steps, steps):
+        for col in range(-steps, steps):
+            cell = Cell(
+                lat + row * dlat,
+                lng + col * dlng,
+                lat + (row + 1) * dlat,
+                lng + (col + 1) * dlng,
+            )
+            if cell.intersects_circle(lat, lng, radius_km):
+                cells.append(cell)
+
+    return cells
+
+
+def search_cell(cell: Cell) -> tuple[list, bool, int]:
+    """Search one cell, following every result page.
+
+    Returns (venues, saturated, requests made). A cell is saturated when
+    results were still available after the last page, or when the last page
+    came back full: Text Search stops at PAGE_SIZE * MAX_PAGES results and
+    then returns no nextPageToken, even though more places match.
+    """
+    body = {
+        "textQuery": DISCOVERY_QUERY,
+        "pageSize": PAGE_SIZE,
+        "locationRestriction": cell.restriction(),
+    }
+    venues = []
+
+    for page in range(1, MAX_PAGES + 1):
+        payload = fetch_places(body, DISCOVERY_FIELD_MASK)
+        venues.extend(parse_places(payload))
+
+        token = payload.get("nextPageToken")
+        if not token:
+            full_last_page = (
+                page == MAX_PAGES and len(payload.get("places", [])) >= PAGE_SIZE
+            )
+            return venues, full_last_page, page
+        body = {**body, "pageToken": token}
+
+    return venues, True, MAX_PAGES
+
+
+def discover_city(
+    city: City,
+    radius_km: float = DISCOVERY_RADIUS_KM,
+    cell_km: float = DISCOVERY_CELL_KM,
+) -> list:
+    """All venues found in the search area of one city"""
+    lat, lng = float(city.latitude), float(city.longitude)
+    cells = tile_area(lat, lng, radius_km, cell_km)
+    print(f"  {len(cells)} cells of {cell_km} km within {radius_km} km")
+
+    found = {}
+    requests_made = 0
+    cells_searched = 0
+    cells_split = 0
+
+    with ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS) as pool:
+        pending = {pool.submit(search_cell, cell): cell for cell in cells}
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                cell = pending.pop(future)
+                cells_searched += 1
+
+                try:
+                    venues, saturated, n = future.result()
+                except Exception as e:
+                    print(f"    Error in cell {cell}: {e}")
+                    continue
+
+                requests_made += n
+                for venue in venues:
+                    if venue["source_id"]:
+                        found[venue["source_id"]] = venue
+
+                # Dense cell: its results were capped, so search each quadrant
+                if saturated and cell.size_km() / 2 >= DISCOVERY_MIN_CELL_KM:
+                    cells_split += 1
+                    for child in cell.split():
+                        if child.intersects_circle(lat, lng, radius_km):
+                            pending[pool.submit(search_cell, child)] = child
+
+    for venue in found.values():
+        venue["city"] = city.name
+        venue["state"] = city.state
+        venue["country"] = city.country
+
+    print(
+        f"  {cells_searched} cells searched ({cells_split} split), "
+        f"{requests_made} requests, {len(found)} unique venues"
+    )
+    return list(found.values())
+
+
+def discover_all_cities(
+    slugs: list | None = None,
+    radius_km: float = DISCOVERY_RADIUS_KM,
+    cell_km: float = DISCOVERY_CELL_KM,
+):
+    db = SessionLocal()
+
+    query = db.query(City).filter(City.latitude.isnot(None), City.longitude.isnot(None))
+    if slugs:
+        query = query.filter(City.slug.in_(slugs))
+    cities = query.order_by(City.name).all()
+
+    print("=" * 70)
+    print(f"VENUE DISCOVERY FOR {len(cities)} CITIES")
+    print("=" * 70)
+
+    total_added = 0
+    total_updated = 0
+
+    for i, city in enumerate(cities, 1):
+        print(f"\n[{i}/{len(cities)}] {city.name}, {city.country}")
+
+        venues = discover_city(city, radius_km, cell_km)
+        venues, merge_report = dedupe_venues(venues)
+        write_merge_report(merge_report, city.slug or city.name)
+        added, updated = upsert_venues_batched(db, venues)
+        total_added += added
+        total_updated += updated
+
+    db.close()
+
+    refresh_after_scrape([city.name for city in cities])
+
+    print("\n" + "=" * 70)
+    print("FINAL RESULTS")
+    print("=" * 70)
+    print(f"  New venues added: {total_added}")
+    print(f"  Existing updated: {total_updated}")
+    print(f"  Places cache: {places_cache.stats()}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--city", action="append", dest="cities", help="City slug (repeatable)"
+    )
+    parser.add_argument("--radius", type=float, default=DISCOVERY_RADIUS_KM)
+    parser.add_argument("--cell", type=float, default=DISCOVERY_CELL_KM)
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Serve Places responses from the on-disk cache only (no network)",
+    )
+    args = parser.parse_args()
+    if args.replay:
+        venue_scraper.PLACES_REPLAY_ONLY = True
+
+    discover_all_cities(args.cities, args.radius, args.cell)
@@ -1,12 +1,19 @@
+import argparse
 import os
 import time
 from datetime import UTC, datetime
 
 import requests
 from dotenv import load_dotenv
+from geoalchemy2.functions import ST_DWithin, ST_GeogFromText
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 
 from database import SessionLocal
 from models import Venue
+from scraper.city_aggregates import refresh_after_scrape
+from scraper.response_cache import CACHE_ROOT, CacheMiss, ResponseCache
+from scraper.venue_dedup import DEDUP_MAX_DISTANCE_M, dedupe_venues, write_merge_report
 
 load_dotenv()
 
@@ -18,6 +25,21 @@ GOOGLE_API_URL = "https://places.googleapis.com/v1/places:searchText"
 # YELP_API_URL = "https://api.yelp.com/v3/businesses/search"
 # FOURSQUARE_API_URL = "https://api.foursquare.com/v3/places/search"
 
+PLACES_FIELD_MASK = "places.displayName,places.formattedAddress,places.location,places.nationalPhoneNumber,places.websiteUri,places.rating,places.userRatingCount,places.priceLevel,places.id"
+
+# Raw Places responses are cached on disk, keyed by request body and field mask
+PLACES_CACHE_TTL_HOURS = float(os.getenv("PLACES_CACHE_TTL_HOURS", "168"))
+# Serve every Places request from the cache and never call the live API
+PLACES_REPLAY_ONLY = os.getenv("PLACES_REPLAY_ONLY", "").lower() in ("1", "true")
+PLACES_REQUEST_DELAY = 1.0
+
+places_cache = ResponseCache(
+    CACHE_ROOT / "places", ttl_seconds=PLACES_CACHE_TTL_HOURS * 3600
+)
+
+# Rows per INSERT ... ON CONFLICT statement when saving scraped venues
+VENUE_UPSERT_BATCH_SIZE = int(os.getenv("VENUE_UPSERT_BATCH_SIZE", "500"))
+
 LONDON_SEARCHES = [
     # General searches
     "escape room London",
@@ -117,40 +139,61 @@ def convert_price_level(price_level_str):
 # ========================================================================
 
 
-def scrape_google_places(query: str) -> list:
+def fetch_places(body: dict, field_mask: str = PLACES_FIELD_MASK) -> dict:
+    """POST a searchText request, serving it from the response cache if possible"""
+    key = places_cache.key(GOOGLE_API_URL, field_mask, body)
+    cached = places_cache.get(key, ignore_ttl=PLACES_REPLAY_ONLY)
+    if cached is not None:
+        return cached
+
+    if PLACES_REPLAY_ONLY:
+        raise CacheMiss(f"Not in cache (replay only): {body}")
+
     headers = {
         "Content-Type": "application/json",
         "X-Goog-Api-Key": GOOGLE_API_KEY,
-        "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.location,places.nationalPhoneNumber,places.websiteUri,places.rating,places.userRatingCount,places.priceLevel,places.id",
+        "X-Goog-FieldMask": field_mask,
     }
-    body = {"textQuery": query}
+    response = requests.post(GOOGLE_API_URL, json=body, headers=headers, timeout=15)
+    response.raise_for_status()
+    payload = response.json()
+
+    places_cache.put(
+        key,
+        payload,
+        request={"url": GOOGLE_API_URL, "field_mask": field_mask, "body": body},
+    )
+    time.sleep(PLACES_REQUEST_DELAY)  # Rate limiting, live requests only
+    return payload
+
+
+def parse_places(payload: dict) -> list:
+    """Convert a searchText response to the standard venue format"""
+    venues = []
+    for place in payload.get("places", []):
+        location = place.get("location", {})
+        venues.append(
+            {
+                "source": "google",
+                "source_id": place.get("id"),
+                "name": place.get("displayName", {}).get("text", ""),
+                "address": place.get("formattedAddress", ""),
+                "latitude": location.get("latitude"),
+                "longitude": location.get("longitude"),
+                "phone": place.get("nationalPhoneNumber"),
+                "website": place.get("websiteUri"),
+                "rating": place.get("rating"),
+                "review_count": place.get("userRatingCount", 0),
+                "price_level": convert_price_level(place.get("priceLevel")),
+            }
+        )
+
+    return venues
+
 
+def scrape_google_places(query: str) -> list:
     try:
-        response = requests.post(GOOGLE_API_URL, json=body, headers=headers, timeout=15)
-        response.raise_for_status()
-        places = response.json().get("places", [])
-
-        # Convert to standard format
-        venues = []
-        for place in places:
-            location = place.get("location", {})
-            venues.append(
-                {
-                    "source": "google",
-                    "source_id": place.get("id"),
-                    "name": place.get("displayName", {}).get("text", ""),
-                    "address": place.get("formattedAddress", ""),
-                    "latitude": location.get("latitude"),
-                    "longitude": location.get("longitude"),
-                    "phone": place.get("nationalPhoneNumber"),
-                    "website": place.get("websiteUri"),
-                    "rating": place.get("rating"),
-                    "review_count": place.get("userRatingCount", 0),
-                    "price_level": convert_price_level(place.get("priceLevel")),
-                }
-            )
-
-        return venues
+        return parse_places(fetch_places({"textQuery": query}))
 
     except Exception as e:
         print(f"    Error: {e}")
@@ -334,6 +377,166 @@ def scrape_google_places(query: str) -> list:
 #         return []
 
 
+# ========================================================================
+# SAVING
+# ========================================================================
+
+
+def venue_location(latitude, longitude):
+    """EWKT point for the `location` geography column"""
+    if latitude and longitude:
+        return f"SRID=4326;POINT({longitude} {latitude})"
+    return None
+
+
+def venue_row(venue_data: dict, scraped_at: datetime) -> dict:
+    """Map a scraped venue onto `venues` columns"""
+    return {
+        "name": venue_data["name"],
+        "google_place_id": venue_data["source_id"]
+        if venue_data["source"] == "google"
+        else None,
+        "address": venue_data["address"],
+        "city": venue_data.get("city", "London"),
+        "state": venue_data.get("state", "England"),
+        "country": venue_data.get("country", "GB"),
+        "latitude": venue_data["latitude"],
+        "longitude": venue_data["longitude"],
+        "location": venue_location(venue_data["latitude"], venue_data["longitude"]),
+        "phone": venue_data["phone"],
+        "website": venue_data["website"],
+        "google_rating": venue_data["rating"],
+        "google_review_count": venue_data["review_count"],
+        "google_price_level": venue_data["price_level"],
+        "data_source": venue_data["source"],
+        "last_scraped_at": scraped_at,
+    }
+
+
+def venue_upsert_statement():
+    """INSERT ... ON CONFLICT (google_place_id) DO UPDATE for scraped venues.
+
+    Updates mirror the per-row path: ratings only overwrite when the new
+    value is present, and coordinates/location are only filled when missing.
+    RETURNING reports whether each row was inserted (xmax = 0) or updated.
+    """
+    stmt = insert(Venue)
+    excluded = stmt.excluded
+
+    return stmt.on_conflict_do_update(
+        index_elements=[Venue.google_place_id],
+        set_={
+            "google_rating": func.coalesce(excluded.google_rating, Venue.google_rating),
+            "google_review_count": func.coalesce(
+                func.nullif(excluded.google_review_count, 0),
+                Venue.google_review_count,
+            ),
+            "latitude": func.coalesce(Venue.latitude, excluded.latitude),
+            "longitude": func.coalesce(Venue.longitude, excluded.longitude),
+            "location": func.coalesce(Venue.location, excluded.location),
+            "last_scraped_at": excluded.last_scraped_at,
+            "updated_at": excluded.updated_at,
+        },
+    ).returning(Venue.id, literal_column("xmax = 0").label("inserted"))
+
+
+def upsert_venues_batched(
+    db, venues_data: list, batch_size: int = VENUE_UPSERT_BATCH_SIZE
+) -> tuple[int, int]:
+    """Bulk upsert venues keyed on google_place_id, committing per batch.
+
+    Returns (inserted, updated) totals.
+    """
+    if not venues_data:
+        return 0, 0
+
+    # ON CONFLICT cannot affect the same row twice in one statement, so keep
+    # only the last scraped copy of each place.
+    scraped_at = datetime.now(UTC)
+    rows = list(
+        {
+            row["google_place_id"]: row
+            for row in (venue_row(v, scraped_at) for v in venues_data)
+        }.values()
+    )
+
+    stmt = venue_upsert_statement()
+    total_batches = (len(rows) + batch_size - 1) // batch_size
+    inserted = 0
+    updated = 0
+
+    for n, start in enumerate(range(0, len(rows), batch_size), 1):
+        batch = rows[start : start + batch_size]
+
+        try:
+            results = db.connection().execute(stmt, batch).all()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"  Batch {n}/{total_batches}: Error: {e}")
+            continue
+
+        batch_inserted = sum(1 for r in results if r.inserted)
+        batch_updated = len(results) - batch_inserted
+        inserted += batch_inserted
+        updated += batch_updated
+        print(
+            f"  Batch {n}/{total_batches}: "
+            f"{batch_inserted} inserted, {batch_updated} updated"
+        )
+
+    return inserted, updated
+
+
+def save_venues_individually(db, venues_data: list) -> tuple[int, int]:
+    """Per-row save for venues without a Google place id.
+
+    An existing venue only matches by name when it is also within
+    DEDUP_MAX_DISTANCE_M, so same-named chains in other places stay separate.
+    Returns (inserted, updated) totals.
+    """
+    venues_added = 0
+    venues_updated = 0
+
+    for i, venue_data in enumerate(venues_data, 1):
+        try:
+            query = db.query(Venue).filter(Venue.name == venue_data["name"])
+            point = venue_location(venue_data["latitude"], venue_data["longitude"])
+            if point:
+                query = query.filter(
+                    ST_DWithin(
+                        Venue.location, ST_GeogFromText(point), DEDUP_MAX_DISTANCE_M
+                    )
+                )
+            existing = query.first()
+
+            if existing:
+                # Update
+                if venue_data["rating"]:
+                    existing.google_rating = venue_data["rating"]
+                if venue_data["review_count"]:
+                    existing.google_review_count = venue_data["review_count"]
+                existing.last_scraped_at = datetime.now(UTC)
+                venues_updated += 1
+                print(f"[{i}/{len(venues_data)}] Updated: {existing.name}")
+
+            else:
+                venue = Venue(**venue_row(venue_data, datetime.now(UTC)))
+                db.add(venue)
+                venues_added += 1
+                print(
+                    f"[{i}/{len(venues_data)}] Added: {venue.name} ({venue_data['source']})"
+                )
+
+        except Exception as e:
+            print(f"  Error: {e}")
+            continue
+
+    db.commit()
+
+    return venues_added, venues_updated
+
+
 # ========================================================================
 # MASTER SCRAPER
 # ========================================================================
@@ -347,7 +550,8 @@ def scrape_london_all_sources():
     print("=" * 70)
 
     all_venues_data = []
-    seen_names = set()  # Track by name to avoid duplicates
+    # Exact repeats across queries; near-duplicates go to dedupe_venues
+    seen_ids = set()
 
     # ===== GOOGLE PLACES =====
     print("\n1. GOOGLE PLACES API")
@@ -360,15 +564,16 @@ def scrape_london_all_sources():
         # Add unique only
         new = 0
         for v in venues:
-            if v["name"] not in seen_names:
-                seen_names.add(v["name"])
+            key = (v["source"], v["source_id"] or v["name"])
+            if key not in seen_ids:
+                seen_ids.add(key)
                 all_venues_data.append(v)
                 new += 1
 
         print(f"    {len(venues)} found, {new} new")
-        time.sleep(1)
 
     print(f"\nGoogle total: {len(all_venues_data)} unique venues")
+    print(f"Places cache: {places_cache.stats()}")
 
     # # ===== YELP =====
     # print("\n2. YELP API")
@@ -377,8 +582,9 @@ def scrape_london_all_sources():
     # yelp_venues = scrape_yelp_london()
     # yelp_new = 0
     # for v in yelp_venues:
-    #     if v["name"] not in seen_names:
-    #         seen_names.add(v["name"])
+    #     key = (v["source"], v["source_id"] or v["name"])
+    #     if key not in seen_ids:
+    #         seen_ids.add(key)
     #         all_venues_data.append(v)
     #         yelp_new += 1
 
@@ -391,85 +597,43 @@ def scrape_london_all_sources():
     # fs_venues = scrape_foursquare_london()
     # fs_new = 0
     # for v in fs_venues:
-    #     if v["name"] not in seen_names:
-    #         seen_names.add(v["name"])
+    #     key = (v["source"], v["source_id"] or v["name"])
+    #     if key not in seen_ids:
+    #         seen_ids.add(key)
     #         all_venues_data.append(v)
     #         fs_new += 1
 
     # print(f"Foursquare added {fs_new} new venues")
 
-    # ===== SAVE TO DATABASE =====
+    # ===== DEDUPLICATE =====
     print("\n" + "=" * 70)
-    print("SAVING TO DATABASE")
+    print("DEDUPLICATING")
     print("=" * 70)
 
-    db = SessionLocal()
-    venues_added = 0
-    venues_updated = 0
-
-    for i, venue_data in enumerate(all_venues_data, 1):
-        try:
-            # Check if exists (by name or source_id)
-            existing = None
-            if venue_data["source"] == "google" and venue_data["source_id"]:
-                existing = (
-                    db.query(Venue)
-                    .filter(Venue.google_place_id == venue_data["source_id"])
-                    .first()
-                )
-
-            if not existing:
-                existing = (
-                    db.query(Venue).filter(Venue.name == venue_data["name"]).first()
-                )
-
-            if existing:
-                # Update
-                if venue_data["rating"]:
-                    existing.google_rating = venue_data["rating"]
-                if venue_data["review_count"]:
-                    existing.google_review_count = venue_data["review_count"]
-                existing.last_scraped_at = datetime.now(UTC)
-                venues_updated += 1
-                print(f"[{i}/{len(all_venues_data)}] Updated: {existing.name}")
-
-            else:
-                venue = Venue(
-                    name=venue_data["name"],
-                    google_place_id=venue_data["source_id"]
-                    if venue_data["source"] == "google"
-                    else None,
-                    address=venue_data["address"],
-                    city="London",
-                    state="England",
-                    country="GB",
-                    latitude=venue_data["latitude"],
-                    longitude=venue_data["longitude"],
-                    phone=venue_data["phone"],
-                    website=venue_data["website"],
-                    google_rating=venue_data["rating"],
-                    google_review_count=venue_data["review_count"],
-                    google_price_level=venue_data["price_level"],
-                    data_source=venue_data["source"],
-                    last_scraped_at=datetime.now(UTC),
-                )
-
-                if venue_data["latitude"] and venue_data["longitude"]:
-                    venue.location = f"SRID=4326;POINT({venue_data['longitude']} {venue_data['latitude']})"
+    all_venues_data, merge_report = dedupe_venues(all_venues_data)
+    write_merge_report(merge_report, "london")
 
-                db.add(venue)
-                venues_added += 1
-                print(
-                    f"[{i}/{len(all_venues_data)}] Added: {venue.name} ({venue_data['source']})"
-                )
+    # ===== SAVE TO DATABASE =====
+    print("\n" + "=" * 70)
+    print("SAVING TO DATABASE")
+    print("=" * 70)
 
-        except Exception as e:
-            print(f"  Error: {e}")
-            continue
+    # Venues with a Google place id go through the bulk upsert; anything
+    # else has no conflict key and falls back to the per-row lookup.
+    keyed = [v for v in all_venues_data if v["source"] == "google" and v["source_id"]]
+    unkeyed = [
+        v for v in all_venues_data if not (v["source"] == "google" and v["source_id"])
+    ]
 
-    db.commit()
+    db = SessionLocal()
+    venues_added, venues_updated = upsert_venues_batched(db, keyed)
+    added, updated = save_venues_individually(db, unkeyed)
+    venues_added += added
+    venues_updated += updated
     db.close()
 
+    refresh_after_scrape(["London"])
+
     print("\n" + "=" * 70)
     print("FINAL RESULTS")
     print("=" * 70)
@@ -480,4 +644,14 @@ def scrape_london_all_sources():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Serve Places responses from the on-disk cache only (no network)",
+    )
+    args = parser.parse_args()
+    if args.replay:
+        PLACES_REPLAY_ONLY = True
+
     scrape_london_all_sources()
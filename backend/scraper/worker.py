@@ -0,0 +1,608 @@
+"""
+Scrape worker: drains the scrape_jobs queue (scraper/jobs.py).
+Each stage is one kind of work unit, with its own concurrency:
+
+  venue_search       one Places text query      -> venue_rooms, venue_description
+  venue_rooms        one venue's website        -> venue_images
+  venue_images       one venue's image URLs     -> room_photos
+  venue_description  one venue's AI description
+  room_photos        one room's photo ingest
+
+Finishing a job enqueues its follow-ups in the same transaction, so a crash
+never loses the next step. Run as many workers as you like, on one machine or
+several; they share the queue through the database.
+
+Run from backend:
+  uv run python -m scraper.worker enqueue venue_search --city London
+  uv run python -m scraper.worker enqueue venue_search --city Lyon --country FR
+  uv run python -m scraper.worker run [--stage venue_rooms=2 ...] [--drain]
+  uv run python -m scraper.worker status
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from contextlib import nullcontext
+from typing import NamedTuple
+
+import anthropic
+import httpx
+from sqlalchemy import exists, select
+
+from database import SessionLocal
+from models import City, Room, RoomPhoto, Venue
+from scraper import jobs
+from scraper.ai_description_generator import describe_with_retry, write_descriptions
+from scraper.city_aggregates import refresh_after_scrape
+from scraper.conditional_fetch import record_fetch
+from scraper.image_scraper import (
+    FETCH_TIMEOUT_SECONDS,
+    HEADERS,
+    extract_image_urls,
+    fetch_venue_page,
+    write_room_images,
+)
+from scraper.photo_ingest import (
+    ingest_image,
+    insert_photos,
+    load_venue_indexes,
+    photo_rows,
+)
+from scraper.politeness import HostLimiter
+from scraper.room_scraper import BrowserPool, scrape_and_save
+from scraper.venue_scraper import (
+    LONDON_SEARCHES,
+    fetch_places,
+    parse_places,
+    upsert_venues_batched,
+)
+
+HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "30"))
+# A running job with no heartbeat for this long is assumed abandoned
+STALE_AFTER_SECONDS = float(os.getenv("WORKER_STALE_AFTER_SECONDS", "300"))
+IDLE_POLL_SECONDS = float(os.getenv("WORKER_IDLE_POLL_SECONDS", "5"))
+
+
+class Stage(NamedTuple):
+    handler: object
+    concurrency: int
+
+
+def stage_concurrency(stage: str, default: int) -> int:
+    return int(os.getenv(f"WORKER_CONCURRENCY_{stage.upper()}", str(default)))
+
+
+def venue_job(venue_id: int) -> tuple:
+    return f"venue:{venue_id}", {"venue_id": venue_id}
+
+
+class Resources:
+    """Clients shared by every job a worker runs, opened on first use"""
+
+    def __init__(self, stages: dict):
+        self.stages = stages
+        self.limiter = HostLimiter()
+        self._browser_pool = None
+        self._browser_lock = asyncio.Lock()
+        self._http = None
+        self._anthropic = None
+
+    async def browser_pool(self) -> BrowserPool:
+        async with self._browser_lock:
+            if self._browser_pool is None:
+                pool = BrowserPool(self.stages.get("venue_rooms", 1))
+                self._browser_pool = await pool.__aenter__()
+        return self._browser_pool
+
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                headers=HEADERS, timeout=FETCH_TIMEOUT_SECONDS, follow_redirects=True
+            )
+        return self._http
+
+    def anthropic(self) -> anthropic.AsyncAnthropic:
+        if self._anthropic is None:
+            self._anthropic = anthropic.AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY")
+            )
+        return self._anthropic
+
+    async def close(self):
+        if self._browser_pool is not None:
+            await self._browser_pool.__aexit__(None, None, None)
+        if self._http is not None:
+            await self._http.aclose()
+        if self._anthropic is not None:
+            await self._anthropic.close()
+
+
+# ========================================================================
+# STAGE HANDLERS
+# ========================================================================
+# Each takes a job payload and returns follow-up jobs as
+# (stage, job_key, payload). Raising marks the job for retry.
+
+
+def load_venue(venue_id: int):
+    db = SessionLocal()
+    try:
+        venue = db.get(Venue, venue_id)
+        if venue is None:
+            raise LookupError(f"Venue {venue_id} no longer exists")
+        db.expunge(venue)
+        return venue
+    finally:
+        db.close()
+
+
+async def handle_venue_search(payload: dict, resources: Resources) -> list:
+    query = payload["query"]
+    venues = await asyncio.to_thread(
+        lambda: parse_places(fetch_places({"textQuery": query}))
+    )
+    # The searched city, so venue_row's London defaults never apply elsewhere
+    place = {
+        key: payload[key] for key in ("city", "state", "country") if key in payload
+    }
+    for venue in venues:
+        venue.update(place)
+
+    def save():
+        db = SessionLocal()
+        try:
+            upsert_venues_batched(db, venues)
+            place_ids = [v["source_id"] for v in venues if v.get("source_id")]
+            return db.scalars(
+                select(Venue.id).where(
+                    Venue.google_place_id.in_(place_ids), Venue.website.isnot(None)
+                )
+            ).all()
+        finally:
+            db.close()
+
+    venue_ids = await asyncio.to_thread(save)
+    await asyncio.to_thread(refresh_after_scrape)
+    print(f"  '{query}': {len(venues)} places, {len(venue_ids)} with websites")
+    return [
+        (stage, *venue_job(venue_id))
+        for venue_id in venue_ids
+        for stage in ("venue_rooms", "venue_description")
+    ]
+
+
+async def handle_venue_rooms(payload: dict, resources: Resources) -> list:
+    venue = await asyncio.to_thread(load_venue, payload["venue_id"])
+    if not venue.website:
+        return []
+
+    # Errors raise, so the job is retried instead of completing with 0 rooms
+    saved = await scrape_and_save(
+        await resources.browser_pool(),
+        resources.limiter,
+        venue,
+        f"venue {venue.id}",
+        raise_errors=True,
+    )
+    if saved:
+        await asyncio.to_thread(refresh_after_scrape, [venue.city])
+    return [("venue_images", *venue_job(venue.id))] if saved else []
+
+
+async def handle_venue_images(payload: dict, resources: Resources) -> list:
+    venue = await asyncio.to_thread(load_venue, payload["venue_id"])
+    if not venue.website:
+        return []
+
+    _, fetch = await fetch_venue_page(
+        resources.http(),
+        resources.limiter,
+        nullcontext(),
+        (venue.id, venue.name, venue.website),
+        None,
+    )
+    if isinstance(fetch, Exception):
+        raise fetch
+
+    images = extract_image_urls(fetch.content, venue.website)
+
+    def save():
+        db = SessionLocal()
+        try:
+            room_ids = db.scalars(
+                select(Room.id).where(Room.venue_id == venue.id)
+            ).all()
+            if images and room_ids:
+                write_room_images(db, room_ids, images)
+            record_fetch(db, fetch)
+            db.commit()
+            return room_ids
+        finally:
+            db.close()
+
+    room_ids = await asyncio.to_thread(save)
+    print(f"  [{venue.name}] {len(images)} images for {len(room_ids)} rooms")
+    if not images:
+        return []
+    return [
+        ("room_photos", f"room:{room_id}", {"room_id": room_id}) for room_id in room_ids
+    ]
+
+
+async def handle_venue_description(payload: dict, resources: Resources) -> list:
+    venue = await asyncio.to_thread(load_venue, payload["venue_id"])
+
+    description = await describe_with_retry(resources.anthropic(), venue)
+    if description is None:
+        raise RuntimeError(f"No description generated for {venue.name}")
+
+    def save():
+        db = SessionLocal()
+        try:
+            write_descriptions(db, {venue.id: description})
+        finally:
+            db.close()
+
+    await asyncio.to_thread(save)
+    return []
+
+
+async def handle_room_photos(payload: dict, resources: Resources) -> list:
+    def load_room():
+        db = SessionLocal()
+        try:
+            room = db.get(Room, payload["room_id"])
+            if room is None:
+                raise LookupError(f"Room {payload['room_id']} no longer exists")
+            db.expunge(room)
+            return room
+        finally:
+            db.close()
+
+    room = await asyncio.to_thread(load_room)
+    urls = list(dict.fromkeys(room.image_urls or []))
+    manifests = dict(
+        zip(
+            urls,
+            await asyncio.gather(*(asyncio.to_thread(ingest_image, u) for u in urls)),
+            strict=True,
+        )
+    )
+    if urls and all("error" in m for m in manifests.values()):
+        raise RuntimeError(next(iter(manifests.values()))["error"])
+
+    def save():
+        db = SessionLocal()
+        try:
+            index = load_venue_indexes(db, {room.venue_id})[room.venue_id]
+            rows = photo_rows(room, manifests, index)
+            insert_photos(db, rows)
+            db.commit()
+            return len(rows)
+        finally:
+            db.close()
+
+    stored = await asyncio.to_thread(save)
+    print(f"  [room {room.id}] {stored} photos from {len(urls)} images")
+    return []
+
+
+STAGES = {
+    "venue_search": Stage(handle_venue_search, stage_concurrency("venue_search", 1)),
+    "venue_rooms": Stage(handle_venue_rooms, stage_concurrency("venue_rooms", 4)),
+    "venue_images": Stage(handle_venue_images, stage_concurrency("venue_images", 8)),
+    "venue_description": Stage(
+        handle_venue_description, stage_concurrency("venue_description", 8)
+    ),
+    "room_photos": Stage(handle_room_photos, stage_concurrency("room_photos", 4)),
+}
+
+
+# ========================================================================
+# RUNNER
+# ========================================================================
+
+
+def claim_one(stage: str, worker_id: str):
+    db = SessionLocal()
+    try:
+        claimed = jobs.claim(db, stage, worker_id, limit=1)
+        return claimed[0] if claimed else None
+    finally:
+        db.close()
+
+
+def finish_job(job, worker_id: str, follow_ups: list):
+    """Mark a job done and enqueue its follow-ups in one transaction"""
+    db = SessionLocal()
+    try:
+        by_stage = {}
+        for stage, key, payload in follow_ups:
+            by_stage.setdefault(stage, []).append((key, payload))
+        for stage, stage_jobs in by_stage.items():
+            jobs.enqueue(db, stage, stage_jobs)
+        jobs.complete(db, job.id, worker_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+def fail_job(job, worker_id: str, error: Exception) -> bool:
+    db = SessionLocal()
+    try:
+        return jobs.fail(db, job, worker_id, error)
+    finally:
+        db.close()
+
+
+def keep_alive(job_ids: list, worker_id: str) -> int:
+    db = SessionLocal()
+    try:
+        jobs.heartbeat(db, job_ids, worker_id)
+        return jobs.reclaim_stale(db, STALE_AFTER_SECONDS)
+    finally:
+        db.close()
+
+
+class Drain:
+    """Stops a draining worker once every consumer, whatever its stage, has
+    found nothing to claim since the last job ended, and none is in flight.
+    Any job ending resets it, since its follow-ups may feed an idle stage;
+    a claim that started before the reset doesn't count."""
+
+    def __init__(self, consumers: int, in_flight: set, stopping: asyncio.Event):
+        self.consumers = consumers
+        self.in_flight = in_flight
+        self.stopping = stopping
+        self.idle = set()
+        self.generation = 0
+
+    def found_nothing(self, consumer: int, generation: int):
+        if generation != self.generation:
+            return
+        self.idle.add(consumer)
+        if len(self.idle) == self.consumers and not self.in_flight:
+            self.stopping.set()
+
+    def job_ended(self):
+        self.idle.clear()
+        self.generation += 1
+
+
+async def consume(
+    consumer: int,
+    stage: str,
+    worker_id: str,
+    resources: Resources,
+    in_flight: set,
+    stopping: asyncio.Event,
+    drain: Drain | None,
+    counts: dict,
+):
+    """Claim and run jobs of one stage until stopped (or, when draining,
+    until no consumer has anything left to claim)"""
+    handler = STAGES[stage].handler
+
+    while not stopping.is_set():
+        generation = drain.generation if drain is not None else 0
+        job = await asyncio.to_thread(claim_one, stage, worker_id)
+        if job is None:
+            if drain is not None:
+                drain.found_nothing(consumer, generation)
+                if stopping.is_set():
+                    return
+            try:
+                await asyncio.wait_for(stopping.wait(), IDLE_POLL_SECONDS)
+            except TimeoutError:
+                pass
+            continue
+
+        in_flight.add(job.id)
+        print(f"[{stage}] job {job.id} {job.job_key} (attempt {job.attempts})")
+        try:
+            follow_ups = await handler(job.payload, resources)
+        except Exception as e:
+            exhausted = await asyncio.to_thread(fail_job, job, worker_id, e)
+            counts["failed" if exhausted else "retried"] += 1
+            print(
+                f"[{stage}] job {job.id} {'failed' if exhausted else 'will retry'}: {e}"
+            )
+        else:
+            await asyncio.to_thread(finish_job, job, worker_id, follow_ups)
+            counts["done"] += 1
+        finally:
+            in_flight.discard(job.id)
+            if drain is not None:
+                drain.job_ended()
+
+
+async def heartbeat_loop(worker_id: str, in_flight: set):
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        try:
+            reclaimed = await asyncio.to_thread(keep_alive, list(in_flight), worker_id)
+        except Exception as e:
+            print(f"Heartbeat failed: {e}")
+            continue
+        if reclaimed:
+            print(f"Reclaimed {reclaimed} jobs from unresponsive workers")
+
+
+async def run_worker(stages: dict, drain: bool = False):
+    """Run `stages` ({stage: concurrency}) until SIGINT/SIGTERM, or until no
+    job is claimable when `drain` is set. Jobs in progress finish first."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    resources = Resources(stages)
+    in_flight = set()
+    counts = {"done": 0, "retried": 0, "failed": 0}
+    stopping = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    print(f"Worker {worker_id}")
+    print(", ".join(f"{stage}: {n}" for stage, n in stages.items()))
+    print("=" * 70)
+
+    consumers = [
+        stage for stage, concurrency in stages.items() for _ in range(concurrency)
+    ]
+    drained = Drain(len(consumers), in_flight, stopping) if drain else None
+
+    await asyncio.to_thread(keep_alive, [], worker_id)
+    heartbeats = asyncio.create_task(heartbeat_loop(worker_id, in_flight))
+    try:
+        await asyncio.gather(
+            *(
+                consume(
+                    i, stage, worker_id, resources, in_flight, stopping, drained, counts
+                )
+                for i, stage in enumerate(consumers)
+            )
+        )
+    finally:
+        heartbeats.cancel()
+        await resources.close()
+
+    print("\n" + "=" * 70)
+    print(
+        f"Worker stopped: {counts['done']} done, "
+        f"{counts['retried']} retried, {counts['failed']} failed"
+    )
+
+
+# ========================================================================
+# ENQUEUEING
+# ========================================================================
+
+
+def city_place(
+    db, city: str, state: str | None = None, country: str | None = None
+) -> dict:
+    """city, state and country for venues found searching `city`: the given
+    values, else the city's cities row (London needs neither)"""
+    row = db.scalars(select(City).where(City.name == city)).first()
+    if row is not None:
+        state = state or row.state
+        country = country or row.country
+    elif city == "London":
+        state = state or "England"
+        country = country or "GB"
+    if country is None:
+        raise ValueError(f"No cities row for {city}: pass --country (and --state)")
+    return {"city": city, "state": state, "country": country}
+
+
+def seed_jobs(
+    db, stage: str, city: str, state: str | None = None, country: str | None = None
+) -> list:
+    """(job_key, payload) for every work unit of a stage in a city"""
+    if stage == "venue_search":
+        place = city_place(db, city, state, country)
+        queries = LONDON_SEARCHES if city == "London" else [f"escape room {city}"]
+        return [(f"query:{q}", {"query": q, **place}) for q in queries]
+
+    if stage == "room_photos":
+        room_ids = db.scalars(
+            select(Room.id)
+            .join(Venue)
+            .where(
+                Venue.city == city,
+                Room.image_urls.isnot(None),
+                ~exists().where(RoomPhoto.room_id == Room.id),
+            )
+        )
+        return [(f"room:{room_id}", {"room_id": room_id}) for room_id in room_ids]
+
+    query = select(Venue.id).where(Venue.city == city, Venue.website.isnot(None))
+    if stage == "venue_description":
+        query = query.where(Venue.ai_description.is_(None))
+    return [venue_job(venue_id) for venue_id in db.scalars(query)]
+
+
+def enqueue_stage(
+    stage: str,
+    city: str,
+    requeue: bool,
+    state: str | None = None,
+    country: str | None = None,
+):
+    db = SessionLocal()
+    try:
+        seeds = seed_jobs(db, stage, city, state, country)
+        added = jobs.enqueue(db, stage, seeds, requeue=requeue)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Queued {added} of {len(seeds)} {stage} jobs for {city}")
+
+
+def print_status():
+    db = SessionLocal()
+    try:
+        stats = jobs.queue_stats(db)
+    finally:
+        db.close()
+
+    print(f"{'stage':<20}{'pending':>9}{'running':>9}{'done':>9}{'failed':>9}")
+    print("=" * 56)
+    for stage in STAGES:
+        counts = stats.get(stage, {})
+        print(
+            f"{stage:<20}"
+            + "".join(
+                f"{counts.get(s, 0):>9}"
+                for s in ("pending", "running", "done", "failed")
+            )
+        )
+
+
+def parse_stage_option(value: str) -> tuple:
+    stage, _, concurrency = value.partition("=")
+    if stage not in STAGES:
+        raise argparse.ArgumentTypeError(f"unknown stage {stage!r}")
+    return stage, int(concurrency) if concurrency else STAGES[stage].concurrency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Process queued jobs")
+    run_parser.add_argument(
+        "--stage",
+        action="append",
+        type=parse_stage_option,
+        help="STAGE or STAGE=CONCURRENCY; repeatable (default: every stage)",
+    )
+    run_parser.add_argument(
+        "--drain", action="store_true", help="Exit once no job is claimable"
+    )
+
+    enqueue_parser = commands.add_parser("enqueue", help="Queue work for a stage")
+    enqueue_parser.add_argument("stage", choices=list(STAGES))
+    enqueue_parser.add_argument("--city", default="London")
+    enqueue_parser.add_argument(
+        "--state", help="venue_search: state of new venues (default: cities row)"
+    )
+    enqueue_parser.add_argument(
+        "--country", help="venue_search: country code (default: cities row)"
+    )
+    enqueue_parser.add_argument(
+        "--requeue", action="store_true", help="Run finished and failed jobs again"
+    )
+
+    commands.add_parser("status", help="Show job counts per stage")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        stages = dict(args.stage or ((s, st.concurrency) for s, st in STAGES.items()))
+        asyncio.run(run_worker(stages, drain=args.drain))
+    elif args.command == "enqueue":
+        enqueue_stage(args.stage, args.city, args.requeue, args.state, args.country)
+    else:
+        print_status()
@@ -0,0 +1,318 @@
+"""
+Export the read-mostly API data as static JSON files for a CDN or the
+Next.js build to serve without touching FastAPI:
+
+    cities/index.json          cities with rooms (as /api/cities)
+    cities/<slug>.json         room list per city (as /api/rooms?city=)
+    rooms/<id>.json            room detail with venue, photos and similar rooms
+    rooms/slug/<slug>.json     the same document, keyed by slug
+    themes.json                themes with room counts
+    manifest.json              sha256 and size of every file, plus the watermark
+
+Exports are incremental: only rooms whose room, venue or similar-room rows
+changed since the previous manifest's watermark are re-read (photo writes and
+deletes bump rooms.updated_at), only cities containing them are re-listed, and
+a file is only rewritten when its content hash differs. Rooms that were
+unpublished or deleted have their files removed. A city list covers every
+venues.city spelling sharing the city's slug, as the cities table does.
+
+Run from backend: uv run python -m snapshot_export [--full] [--out DIR]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import exists, func, or_, select
+
+from api.read_queries import room_photos, rooms_by_ids, rooms_in_city
+from api.room_detail import photo_dicts, room_detail_dict, room_list_item, venue_dict
+from api.similar_api import load_similar_rooms_bulk
+from database import SessionLocal
+from media import MEDIA_URL, photo_urls
+from models import City, Room, RoomSimilar, Venue
+
+SNAPSHOT_ROOT = Path(
+    os.getenv("SNAPSHOT_ROOT", Path(__file__).resolve().parent / "snapshot")
+)
+# Photo URLs in the documents; MEDIA_URL works as-is when the CDN also serves
+# /media, otherwise point this at the absolute media host
+SNAPSHOT_MEDIA_URL = os.getenv("SNAPSHOT_MEDIA_URL", MEDIA_URL)
+SIMILAR_LIMIT = 6
+ROOM_BATCH = 500
+
+
+def city_slug(name: str) -> str:
+    """Same slug as scraper/city_aggregates.py gives a venues.city value"""
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).lower().strip("-")
+
+
+class Snapshot:
+    """Writes files under `root`, skipping any whose content hash is unchanged"""
+
+    def __init__(self, root: Path, manifest: dict):
+        self.root = root
+        self.files = dict(manifest.get("files", {}))
+        self.rooms = dict(manifest.get("rooms", {}))
+        self.written = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def write(self, relpath: str, data) -> bool:
+        body = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        body = body.encode()
+        digest = hashlib.sha256(body).hexdigest()
+
+        path = self.root / relpath
+        previous = self.files.get(relpath)
+        if previous and previous["sha256"] == digest and path.exists():
+            self.unchanged += 1
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        self.files[relpath] = {"sha256": digest, "bytes": len(body)}
+        self.written += 1
+        return True
+
+    def remove(self, relpath: str):
+        if self.files.pop(relpath, None) is not None:
+            (self.root / relpath).unlink(missing_ok=True)
+            self.removed += 1
+
+    def manifest(self, watermark) -> dict:
+        return {
+            "generated_at": datetime.utcnow().isoformat(),
+            "watermark": watermark.isoformat() if watermark else None,
+            "files": dict(sorted(self.files.items())),
+            "rooms": self.rooms,
+        }
+
+
+def load_manifest(root: Path) -> dict:
+    path = root / "manifest.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def changed_room_ids(db, since: datetime | None) -> list:
+    """Published rooms whose document may have changed since `since`.
+    Photo changes show up as Room.updated_at (scraper/photo_ingest.py and
+    image_dedup.py bump it), so deleted photos are noticed too."""
+    stmt = (
+        select(Room.id)
+        .join(Venue, Room.venue_id == Venue.id)
+        .where(Room.is_published == True, Venue.is_active == True)
+    )
+    if since is not None:
+        stmt = stmt.where(
+            or_(
+                Room.updated_at > since,
+                Venue.updated_at > since,
+                exists().where(
+                    RoomSimilar.room_id == Room.id, RoomSimilar.computed_at > since
+                ),
+            )
+        )
+    return db.scalars(stmt.order_by(Room.id)).all()
+
+
+def data_watermark(db):
+    """Newest change time the next incremental export must look past"""
+    return max(
+        filter(
+            None,
+            db.execute(
+                select(
+                    select(func.max(Room.updated_at)).scalar_subquery(),
+                    select(func.max(Venue.updated_at)).scalar_subquery(),
+                    select(func.max(RoomSimilar.computed_at)).scalar_subquery(),
+                )
+            ).one(),
+        ),
+        default=None,
+    )
+
+
+def export_rooms(db, snapshot: Snapshot, room_ids: list) -> set:
+    """Write detail documents; returns the slugs of the cities they belong to"""
+    cities = set()
+    for i in range(0, len(room_ids), ROOM_BATCH):
+        batch = room_ids[i : i + ROOM_BATCH]
+        rooms = rooms_by_ids(db, batch)
+        photos = room_photos(db, batch)
+        similar = load_similar_rooms_bulk(db, batch, SIMILAR_LIMIT)
+
+        for room in rooms:
+            document = room_detail_dict(
+                room,
+                {
+                    "venue": venue_dict(room),
+                    "photos": photo_dicts(photos[room.id], SNAPSHOT_MEDIA_URL),
+                    "similar": similar[room.id],
+                },
+            )
+            paths = [f"rooms/{room.id}.json"]
+            if room.slug:
+                paths.append(f"rooms/slug/{room.slug}.json")
+            for path in paths:
+                snapshot.write(path, document)
+
+            # A renamed room leaves its old slug file behind
+            previous = snapshot.rooms.get(str(room.id), {})
+            for path in set(previous.get("files", [])) - set(paths):
+                snapshot.remove(path)
+            if previous.get("city"):
+                cities.add(city_slug(previous["city"]))
+
+            snapshot.rooms[str(room.id)] = {"city": room.venue_city, "files": paths}
+            if room.venue_city:
+                cities.add(city_slug(room.venue_city))
+    return cities
+
+
+def remove_unpublished(db, snapshot: Snapshot) -> set:
+    """Drop files of rooms no longer published; returns their city slugs"""
+    published = {
+        str(room_id)
+        for room_id in db.scalars(
+            select(Room.id)
+            .join(Venue, Room.venue_id == Venue.id)
+            .where(Room.is_published == True, Venue.is_active == True)
+        )
+    }
+    cities = set()
+    for room_id in set(snapshot.rooms) - published:
+        entry = snapshot.rooms.pop(room_id)
+        for path in entry["files"]:
+            snapshot.remove(path)
+        if entry["city"]:
+            cities.add(city_slug(entry["city"]))
+    return cities
+
+
+def export_city_lists(db, snapshot: Snapshot, slugs: set):
+    names = dict(db.execute(select(City.slug, City.name)).all())
+    for slug in sorted(filter(None, slugs)):
+        rooms = rooms_in_city(db, slug)
+
+        path = f"cities/{slug}.json"
+        if rooms:
+            snapshot.write(
+                path,
+                {
+                    "city": names.get(slug, rooms[0].city),
+                    "rooms": [
+                        room_list_item(
+                            room,
+                            photo_urls(room.primary_photo_variants, SNAPSHOT_MEDIA_URL),
+                        )
+                        for room in rooms
+                    ],
+                },
+            )
+        else:
+            snapshot.remove(path)
+
+
+def export_indexes(db, snapshot: Snapshot):
+    """Small whole-catalog files, regenerated every run (hash-checked)"""
+    cities = db.scalars(
+        select(City).where(City.room_count > 0).order_by(City.room_count.desc())
+    ).all()
+    snapshot.write(
+        "cities/index.json",
+        {
+            "cities": [
+                {
+                    "name": city.name,
+                    "slug": city.slug,
+                    "state": city.state,
+                    "country": city.country,
+                    "venue_count": city.venue_count,
+                    "room_count": city.room_count,
+                    "avg_price": float(city.avg_price)
+                    if city.avg_price is not None
+                    else None,
+                }
+                for city in cities
+            ]
+        },
+    )
+
+    themes = db.execute(
+        select(Room.theme, func.count())
+        .join(Venue, Room.venue_id == Venue.id)
+        .where(
+            Room.theme.isnot(None), Room.is_published == True, Venue.is_active == True
+        )
+        .group_by(Room.theme)
+        .order_by(func.count().desc(), Room.theme)
+    )
+    snapshot.write(
+        "themes.json",
+        {"themes": [{"theme": theme, "rooms": count} for theme, count in themes]},
+    )
+
+
+def export_snapshot(root: Path = SNAPSHOT_ROOT, full: bool = False):
+    print("=" * 70)
+    print("STATIC SNAPSHOT EXPORT")
+    print("=" * 70)
+
+    manifest = {} if full else load_manifest(root)
+    since = manifest.get("watermark")
+    since = datetime.fromisoformat(since) if since else None
+    print(f"Output: {root}")
+    print(f"Changes since: {since or 'beginning (full export)'}")
+
+    snapshot = Snapshot(root, manifest)
+    db = SessionLocal()
+    try:
+        # Read the watermark first: anything changing during the export is
+        # picked up again next time rather than missed
+        watermark = data_watermark(db)
+
+        room_ids = changed_room_ids(db, since)
+        print(f"Rooms to re-export: {len(room_ids)}")
+
+        cities = export_rooms(db, snapshot, room_ids)
+        cities |= remove_unpublished(db, snapshot)
+        if since is not None:
+            cities.update(db.scalars(select(City.slug).where(City.updated_at > since)))
+        export_city_lists(db, snapshot, cities)
+        export_indexes(db, snapshot)
+    finally:
+        db.close()
+
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / "manifest.json"
+    tmp = manifest_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(snapshot.manifest(watermark), indent=1))
+    os.replace(tmp, manifest_path)
+
+    print(
+        f"✓ {snapshot.written} written, {snapshot.unchanged} unchanged, "
+        f"{snapshot.removed} removed ({len(snapshot.files)} files)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=Path, default=SNAPSHOT_ROOT)
+    parser.add_argument(
+        "--full", action="store_true", help="Ignore the manifest and export all"
+    )
+    args = parser.parse_args()
+
+    export_snapshot(args.out, args.full)
@@ -0,0 +1,120 @@
+"""
+Warm-up for a fresh API worker, run by main.lifespan before it takes traffic.
+Without it the first requests on each worker pay for connecting to Postgres,
+configuring the ORM mappers, compiling every statement's SQL and building the
+response validators. Here the pool is filled, the room detail statements are
+compiled against a real room, and each hot read route is requested once
+in-process (with filters that match little or nothing), so /ready only
+reports the worker ready once those costs have been paid.
+"""
+
+import asyncio
+import os
+import time
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import configure_mappers
+
+from api.read_queries import room_by_id
+from api.room_detail import expansions
+from database import DB_POOL_SIZE, SessionLocal, prewarm_pool
+from media import MEDIA_URL
+from models import Room, Venue
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") != "0"
+# Connections opened before serving (at most DB_POOL_SIZE are kept)
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", str(DB_POOL_SIZE)))
+
+WARMUP_PATHS = (
+    "/api/rooms?city=__warmup__",
+    "/api/rooms?city=__warmup__&sort=trending",
+    "/api/rooms/map?lat=0&lng=0&radius=0.1",
+    "/api/rooms/map?lat=0&lng=0&radius=0.1&group_size=4&max_price=1&sort_by=price",
+    "/api/rooms/themes",
+    "/api/rooms/facets?city=__warmup__",
+    "/api/rooms/slug/__warmup__",
+    "/api/rooms/0/similar",
+    "/api/search?q=warmup",
+    "/api/autocomplete?q=wa",
+    "/api/cities",
+    "/api/cities/__warmup__",
+)
+
+_warm_up_lock = asyncio.Lock()
+
+
+def warm_database() -> int:
+    """Fill the pool and compile the room detail statements; returns the
+    number of connections opened"""
+    connections = prewarm_pool(DB_POOL_PREWARM)
+    configure_mappers()
+
+    db = SessionLocal()
+    try:
+        room_id = db.scalar(
+            select(Room.id)
+            .join(Venue, Room.venue_id == Venue.id)
+            .where(Room.is_published == True, Venue.is_active == True)
+            .limit(1)
+        )
+        if room_id is not None:
+            # The same statements /api/rooms/{id} runs, minus the view count
+            room = room_by_id(db, room_id)
+            expansions(db, room, {"venue", "photos", "nearby", "similar"}, MEDIA_URL)
+    finally:
+        db.close()
+    return connections
+
+
+async def warm_routes(app) -> dict:
+    """Request each of WARMUP_PATHS once in-process; returns their statuses"""
+    statuses = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://warmup"
+    ) as client:
+        for path in WARMUP_PATHS:
+            response = await client.get(path)
+            statuses[path] = response.status_code
+    return statuses
+
+
+async def warm_up(app) -> bool:
+    """Warm the worker once; records the outcome on app.state for /ready.
+    A failure (say, the database is down at startup) is retried by the next
+    /ready probe instead of stopping the API from starting."""
+    async with _warm_up_lock:
+        if app.state.warm:
+            return True
+
+        start = time.perf_counter()
+        try:
+            if WARMUP_ENABLED:
+                connections = await asyncio.to_thread(warm_database)
+                statuses = await warm_routes(app)
+            else:
+                connections, statuses = 0, {}
+            # A route that errors now (say, its first query failed) would
+            # fail real traffic too, so /ready must not pass yet
+            failed = {path: s for path, s in statuses.items() if s >= 500}
+            if failed:
+                raise RuntimeError(f"warm-up routes failed: {failed}")
+        except Exception as e:
+            app.state.warm_up_error = str(e)
+            print(f"⚠️  Warm-up failed: {e}")
+            return False
+
+        seconds = time.perf_counter() - start
+        app.state.warm = True
+        app.state.warm_up_error = None
+        app.state.warm_up = {
+            "seconds": round(seconds, 3),
+            "connections": connections,
+            "routes": statuses,
+        }
+        print(
+            f"🔥 Warmed up in {seconds:.2f}s "
+            f"({connections} connections, {len(statuses)} routes)"
+        )
+        return True
@@ -36,6 +36,7 @@ function mapApiRoomToCard(room: {
   venue_name?: string | null;
   city?: string | null;
   primary_image_url?: string | null;
+  primary_image_srcset?: string | null;
   duration_minutes?: number | null;
 }): RoomCardData {
   return {
@@ -50,6 +51,7 @@ function mapApiRoomToCard(room: {
     venue_name: room.venue_name ?? null,
     city: room.city ?? null,
     primary_image_url: room.primary_image_url ?? null,
+    primary_image_srcset: room.primary_image_srcset ?? null,
     duration_minutes: room.duration_minutes ?? null,
   };
 }
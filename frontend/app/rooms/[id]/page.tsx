@@ -4,6 +4,7 @@ import { useEffect } from 'react';
 import { useParams } from 'next/navigation';
 import Link from 'next/link';
 import SiteHeader from '@/components/SiteHeader';
+import RoomCard from '@/components/RoomCard';
 import { useRoomById, formatPlayerRange } from '@/lib/api-client';
 
 const DIFFICULTY_COLORS: Record<number, string> = {
@@ -181,6 +182,8 @@ export default function RoomDetailPage() {
               <>
                 <img
                   src={room.primary_image_url}
+                  srcSet={room.primary_image_srcset ?? undefined}
+                  sizes="(max-width: 1024px) 100vw, 1024px"
                   alt=""
                   className="absolute inset-0 h-full w-full object-cover"
                 />
@@ -432,6 +435,20 @@ export default function RoomDetailPage() {
             </div>
           </div>
         </div>
+
+        {/* Similar Rooms */}
+        {room.similar && room.similar.length > 0 && (
+          <section className="mt-12">
+            <h2 className="text-xl font-semibold tracking-tight text-[var(--foreground)]">
+              You Might Also Like
+            </h2>
+            <div className="mt-6 grid gap-6 sm:grid-cols-2 lg:grid-cols-3">
+              {room.similar.map((similar) => (
+                <RoomCard key={similar.id} room={similar} />
+              ))}
+            </div>
+          </section>
+        )}
       </main>
     </div>
   );
@@ -14,6 +14,7 @@ export interface RoomCardData {
   venue_name: string | null;
   city: string | null;
   primary_image_url?: string | null;
+  primary_image_srcset?: string | null;
   duration_minutes?: number | null;
 }
 
@@ -73,6 +74,7 @@ export default function RoomCard({ room }: { room: RoomCardData }) {
         {room.primary_image_url ? (
           <img
             src={room.primary_image_url}
+            srcSet={room.primary_image_srcset ?? undefined}
             alt=""
             className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-[1.02]"
             loading="lazy"
@@ -59,6 +59,8 @@ export default function RoomListItem({ room }: { room: RoomCardData }) {
         {room.primary_image_url ? (
           <img
             src={room.primary_image_url}
+            srcSet={room.primary_image_srcset ?? undefined}
+            sizes="128px"
             alt=""
             className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-105"
             loading="lazy"
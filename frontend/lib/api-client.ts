@@ -4,7 +4,7 @@
  */
 
 import { useState, useEffect } from 'react';
-import type { Room, MapResponse, MapFilters, ThemesResponse, RoomDetail } from './types';
+import type { Room, MapResponse, MapFilters, ThemesResponse, RoomDetail, FacetFilters, FacetsResponse, SearchResponse, AutocompleteResponse, SimilarRoom, SimilarRoomsResponse } from './types';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -44,8 +44,11 @@ export async function fetchRoomBySlug(slug: string): Promise<Room> {
   return response.json();
 }
 
-export async function fetchRoomById(id: number): Promise<RoomDetail> {
-  const url = `${API_BASE_URL}/api/rooms/${id}`;
+export async function fetchRoomById(
+  id: number,
+  include = 'venue,photos,similar'
+): Promise<RoomDetail> {
+  const url = `${API_BASE_URL}/api/rooms/${id}?include=${include}`;
   console.log('Fetching room from:', url);
   
   const response = await fetch(url);
@@ -75,6 +78,67 @@ export async function fetchThemes(): Promise<string[]> {
   return data.themes;
 }
 
+export async function fetchRoomFacets(filters: FacetFilters = {}): Promise<FacetsResponse> {
+  const params = new URLSearchParams();
+
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') {
+      params.append(key, value.toString());
+    }
+  });
+
+  const response = await fetch(`${API_BASE_URL}/api/rooms/facets?${params}`);
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch facets: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+export async function searchRooms(
+  query: string,
+  options: { lat?: number; lng?: number; city?: string; page?: number; page_size?: number } = {}
+): Promise<SearchResponse> {
+  const params = new URLSearchParams({ q: query });
+
+  Object.entries(options).forEach(([key, value]) => {
+    if (value !== undefined && value !== null) {
+      params.append(key, value.toString());
+    }
+  });
+
+  const response = await fetch(`${API_BASE_URL}/api/search?${params}`);
+
+  if (!response.ok) {
+    throw new Error(`Search failed: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+export async function fetchAutocomplete(query: string, limit = 5): Promise<AutocompleteResponse> {
+  const params = new URLSearchParams({ q: query, limit: limit.toString() });
+  const response = await fetch(`${API_BASE_URL}/api/autocomplete?${params}`);
+
+  if (!response.ok) {
+    throw new Error(`Autocomplete failed: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+export async function fetchSimilarRooms(roomId: number, limit = 6): Promise<SimilarRoom[]> {
+  const response = await fetch(`${API_BASE_URL}/api/rooms/${roomId}/similar?limit=${limit}`);
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch similar rooms: ${response.statusText}`);
+  }
+
+  const data: SimilarRoomsResponse = await response.json();
+  return data.rooms;
+}
+
 export async function trackRoomView(roomId: number, sessionId?: string): Promise<void> {
   await fetch(`${API_BASE_URL}/api/rooms/${roomId}/view`, {
     method: 'POST',
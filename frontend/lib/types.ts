@@ -59,6 +59,7 @@ export interface MapFilters {
   max_players?: number;
   group_size?: number;
   max_price?: number;
+  price_currency?: string;
   min_rating?: number;
   sort_by?: 'distance' | 'rating' | 'price' | 'difficulty' | 'popularity';
   page?: number;
@@ -69,12 +70,110 @@ export interface ThemesResponse {
   themes: string[];
 }
 
+export interface FacetFilters {
+  city?: string;
+  lat?: number;
+  lng?: number;
+  radius?: number;
+  theme?: string;
+  min_difficulty?: number;
+  max_difficulty?: number;
+  group_size?: number;
+  max_price?: number;
+  price_currency?: string;
+}
+
+export interface FacetCount {
+  value: number | string;
+  count: number;
+}
+
+export interface FacetsResponse {
+  total: number;
+  themes: FacetCount[];
+  difficulties: FacetCount[];
+  price_buckets: FacetCount[];
+  player_buckets: FacetCount[];
+}
+
+export interface SearchResult {
+  id: number;
+  name: string;
+  slug: string | null;
+  short_description: string | null;
+  theme: string | null;
+  difficulty: number | null;
+  min_price_per_person: number | null;
+  currency: string | null;
+  primary_image_url: string | null;
+  venue_id: number;
+  venue_name: string;
+  city: string;
+  distance_km: number | null;
+  score: number;
+}
+
+export interface SearchResponse {
+  query: string;
+  total: number;
+  page: number;
+  page_size: number;
+  results: SearchResult[];
+}
+
+export interface Suggestion {
+  id: number | string;
+  label: string;
+  slug: string | null;
+  subtitle: string | null;
+}
+
+export interface AutocompleteResponse {
+  query: string;
+  rooms: Suggestion[];
+  venues: Suggestion[];
+  themes: Suggestion[];
+  cities: Suggestion[];
+}
+
+export interface SimilarRoom {
+  id: number;
+  name: string;
+  slug: string | null;
+  theme: string | null;
+  difficulty: number | null;
+  duration_minutes: number | null;
+  price_min: number | null;
+  price_max: number | null;
+  price: number | null;
+  currency: string | null;
+  primary_image_url: string | null;
+  venue_name: string;
+  city: string;
+  score: number;
+}
+
+export interface SimilarRoomsResponse {
+  room_id: number;
+  rooms: SimilarRoom[];
+}
+
 export interface HealthResponse {
   status: 'healthy' | 'unhealthy';
   database: 'connected' | 'disconnected';
   error?: string;
 }
 
+export interface RoomPhoto {
+  id: number;
+  width: number | null;
+  height: number | null;
+  is_primary: boolean;
+  src: string;
+  srcset: string;
+  thumbnail: string;
+}
+
 export interface RoomDetail {
   id: number;
   name: string;
@@ -91,12 +190,17 @@ export interface RoomDetail {
   currency: string | null;
   success_rate: number | null;
   primary_image_url: string | null;
+  primary_image_srcset: string | null;
   image_urls: string[];
-  venue: {
+  // Expansions, present when requested with ?include=
+  photos?: RoomPhoto[];
+  venue?: {
     name: string;
     city: string;
     address: string | null;
     phone: string | null;
     website: string | null;
   } | null;
+  nearby?: (SimilarRoom & { distance_km: number | null })[];
+  similar?: SimilarRoom[];
 }
\ No newline at end of file